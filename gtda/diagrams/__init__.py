@@ -7,6 +7,7 @@ from .distance import PairwiseDistance
 from .features import PersistenceEntropy, Amplitude
 from .representations import BettiCurve, PersistenceLandscape, HeatKernel, \
     Silhouette, PersistenceImage
+from ..utils._ragged import RaggedDiagrams
 
 __all__ = [
     'ForgetDimension',
@@ -19,5 +20,6 @@ __all__ = [
     'HeatKernel',
     'PersistenceEntropy',
     'Silhouette',
-    'PersistenceImage'
+    'PersistenceImage',
+    'RaggedDiagrams'
 ]
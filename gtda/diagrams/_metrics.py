@@ -7,12 +7,14 @@ import numpy as np
 from joblib import Parallel, delayed, effective_n_jobs
 from scipy.ndimage import gaussian_filter
 from scipy.spatial.distance import cdist, pdist, squareform
-from sklearn.utils import gen_even_slices
+from sklearn.utils import gen_batches, gen_even_slices
 from sklearn.utils.validation import _num_samples
 
-from ._utils import _subdiagrams, _sample_image
-from ..externals.modules.gtda_bottleneck import bottleneck_distance
-from ..externals.modules.gtda_wasserstein import wasserstein_distance
+from ._utils import _subdiagrams, _sample_image, _subdiagram_pairs, \
+    _apply_by_size, _padded_subdiagram
+from ..externals.modules.gtda_bottleneck import bottleneck_distance_matrix
+from ..externals.modules.gtda_wasserstein import wasserstein_distance_matrix
+from ..utils._ragged import RaggedDiagrams
 from ..utils.intervals import Interval
 
 _AVAILABLE_METRICS = {
@@ -47,24 +49,58 @@ _AVAILABLE_METRICS = {
         'power': {'type': Real, 'in': Interval(0, np.inf, closed='right')},
         'p': {'type': Real, 'in': Interval(1, np.inf, closed='both')},
         'n_bins': {'type': int, 'in': Interval(1, np.inf, closed='left')}
+        },
+    'sliced_wasserstein': {
+        'n_directions': {'type': int,
+                         'in': Interval(1, np.inf, closed='left')}
+        },
+    'heat_closed_form': {
+        'sigma': {'type': Real, 'in': Interval(0, np.inf, closed='neither')},
+        'kernel': {'type': bool}
         }
     }
 
 _AVAILABLE_AMPLITUDE_METRICS = {}
 for _metric, _metric_params in _AVAILABLE_METRICS.items():
-    if _metric not in ['bottleneck', 'wasserstein']:
-        _AVAILABLE_AMPLITUDE_METRICS[_metric] = _metric_params.copy()
-    else:
-        _AVAILABLE_AMPLITUDE_METRICS[_metric] = \
-            {name: descr for name, descr in _metric_params.items()
-             if name != 'delta'}
+    # `delta` and `kernel` only make sense for pairs of diagrams
+    _AVAILABLE_AMPLITUDE_METRICS[_metric] = \
+        {name: descr for name, descr in _metric_params.items()
+         if name not in ['delta', 'kernel']}
 
 
 def betti_curves(diagrams, sampling):
-    born = sampling >= diagrams[:, :, 0]
-    not_dead = sampling < diagrams[:, :, 1]
-    alive = np.logical_and(born, not_dead)
-    betti = np.sum(alive, axis=2).T
+    """Betti curves of `diagrams` at the sorted filtration values in
+    `sampling`, i.e. the number of pairs [b, d] with b <= t < d at each value
+    t, as integers of the smallest signed dtype holding the number of pairs.
+
+    Each pair is born at the first bin whose value is at least b and dies at
+    the first bin whose value is at least d, so that the curves are cumulative
+    sums of +1 births and -1 deaths over the bins. This takes time linear in
+    the number of bins and pairs per diagram, and diagrams are processed in
+    batches of at most :data:`_BLOCK_SIZE` events.
+
+    """
+    n_samples, n_points = diagrams.shape[:2]
+    sampling = sampling.ravel()
+    n_bins = len(sampling)
+    dtype = np.min_scalar_type(-max(n_points, 1))
+    betti = np.empty((n_samples, n_bins), dtype=dtype)
+
+    n_events = n_bins + 1
+    batch_size = max(1, _BLOCK_SIZE // (n_events + 2 * n_points))
+    for rows in gen_batches(n_samples, batch_size):
+        births = diagrams[rows, :, 0]
+        # Pairs with d <= b are never alive: let them die as they are born
+        deaths = np.maximum(births, diagrams[rows, :, 1])
+        starts = n_events * np.arange(len(births))[:, None]
+        births_idx = (np.searchsorted(sampling, births) + starts).ravel()
+        deaths_idx = (np.searchsorted(sampling, deaths) + starts).ravel()
+        n_batch_events = n_events * len(births)
+        events = np.bincount(births_idx, minlength=n_batch_events) - \
+            np.bincount(deaths_idx, minlength=n_batch_events)
+        np.cumsum(events.reshape(-1, n_events)[:, :-1], axis=1,
+                  out=betti[rows])
+
     return betti
 
 
@@ -85,7 +121,8 @@ def landscapes(diagrams, sampling, n_layers):
 def heats(diagrams, sampling, step_size, sigma):
     # WARNING: modifies `diagrams` in place
     heats_ = \
-        np.zeros((len(diagrams), len(sampling), len(sampling)), dtype=float)
+        np.zeros((len(diagrams), len(sampling), len(sampling)),
+                 dtype=diagrams.dtype)
     # If the step size is zero, we return a trivial image
     if step_size == 0:
         return heats_
@@ -119,7 +156,8 @@ def persistence_images(diagrams, sampling, step_size, sigma, weights):
     # a 2d array
     # WARNING: modifies `diagrams` in place
     persistence_images_ = \
-        np.zeros((len(diagrams), len(sampling), len(sampling)), dtype=float)
+        np.zeros((len(diagrams), len(sampling), len(sampling)),
+                 dtype=diagrams.dtype)
     # If either step size is zero, we return a trivial image
     if (step_size == 0).any():
         return persistence_images_
@@ -173,18 +211,53 @@ def silhouettes(diagrams, sampling, power, **kwargs):
     return fibers_weighted_sum
 
 
-def bottleneck_distances(diagrams_1, diagrams_2, delta=0.01, **kwargs):
-    return np.array([[bottleneck_distance(
-        diagram_1[diagram_1[:, 0] != diagram_1[:, 1]],
-        diagram_2[diagram_2[:, 0] != diagram_2[:, 1]],
-        delta) for diagram_2 in diagrams_2] for diagram_1 in diagrams_1])
+def sliced_projections(diagrams, n_directions):
+    """Projections of the points of `diagrams`, and of their orthogonal
+    projections onto the diagonal, on `n_directions` lines through the origin
+    equally spaced in angle. Both are returned as arrays of shape (n_samples,
+    n_directions, n_points), sorted along the last axis."""
+    thetas = np.linspace(-np.pi / 2, np.pi / 2, n_directions + 1)[:-1]
+    lines = np.stack([np.cos(thetas), np.sin(thetas)])
+    points = diagrams @ lines
+    diagonal = np.mean(diagrams, axis=2, keepdims=True) * np.sum(lines, axis=0)
+    return np.sort(points.transpose(0, 2, 1), axis=2), \
+        np.sort(diagonal.transpose(0, 2, 1), axis=2)
+
+
+def _sliced_projections(X, homology_dimension, n_directions=10, **kwargs):
+    """:func:`sliced_projections` of all subdiagrams of a collection in a
+    given homology dimension, padded to equal size. Pairs [0, 0] project to
+    the same point as their diagonal projections, so padding does not change
+    sliced Wasserstein distances."""
+    return sliced_projections(_padded_subdiagram(X, homology_dimension),
+                              n_directions)
+
+
+def bottleneck_distances(subdiagram_1, subdiagram_2, delta=0.01,
+                         n_threads=1, **kwargs):
+    """Bottleneck distances between the diagrams described by the pairs and
+    offsets in `subdiagram_1` and `subdiagram_2` (see
+    :func:`_subdiagram_pairs`). `subdiagram_2` equal to ``None`` means the
+    same as `subdiagram_1`, in which case only the strict upper triangle of
+    the result is computed and the rest is zero. Pairs of diagrams are
+    processed in parallel by `n_threads` OpenMP threads."""
+    return bottleneck_distance_matrix(
+        *subdiagram_1, *(subdiagram_1 if subdiagram_2 is None
+                         else subdiagram_2),
+        delta=delta, symmetric=subdiagram_2 is None, n_threads=n_threads
+        )
 
 
-def wasserstein_distances(diagrams_1, diagrams_2, p=2, delta=0.01, **kwargs):
-    return np.array([[wasserstein_distance(
-        diagram_1[diagram_1[:, 0] != diagram_1[:, 1]],
-        diagram_2[diagram_2[:, 0] != diagram_2[:, 1]],
-        p, delta,) for diagram_2 in diagrams_2] for diagram_1 in diagrams_1])
+def wasserstein_distances(subdiagram_1, subdiagram_2, p=2, delta=0.01,
+                          n_threads=1, **kwargs):
+    """Wasserstein distances between the diagrams described by the pairs and
+    offsets in `subdiagram_1` and `subdiagram_2`, see
+    :func:`bottleneck_distances`."""
+    return wasserstein_distance_matrix(
+        *subdiagram_1, *(subdiagram_1 if subdiagram_2 is None
+                         else subdiagram_2),
+        q=p, delta=delta, symmetric=subdiagram_2 is None, n_threads=n_threads
+        )
 
 
 def betti_distances(
@@ -291,6 +364,218 @@ def silhouette_distances(
     return distances
 
 
+# Maximum number of entries in the arrays allocated for each block of pairs
+# of diagrams by `sliced_wasserstein_distances` and `heat_kernels`, and for
+# each batch of diagrams by `betti_curves`
+_BLOCK_SIZE = 2 ** 22
+
+
+def _pair_blocks(n_samples_1, n_samples_2, width):
+    """Pairs of slices delimiting blocks which cover an `n_samples_1` by
+    `n_samples_2` matrix, of at most :data:`_BLOCK_SIZE` entries when each
+    pair of samples takes `width` entries."""
+    width = max(width, 1)
+    n_columns = max(1, min(n_samples_2, _BLOCK_SIZE // width))
+    n_rows = max(1, _BLOCK_SIZE // (width * n_columns))
+    for rows in gen_batches(n_samples_1, n_rows):
+        for columns in gen_batches(n_samples_2, n_columns):
+            yield rows, columns
+
+
+def sliced_wasserstein_distances(projections_1, projections_2, **kwargs):
+    """Sliced Wasserstein distances between the diagrams whose
+    :func:`sliced_projections` are `projections_1` and `projections_2`.
+
+    Along each line, the distance between two diagrams is the :math:`L^1`
+    distance between the sorted projections of the points of the first and of
+    the diagonal projections of the points of the second, and those with the
+    roles of the two diagrams exchanged. These are merges of presorted
+    projections, which stable sorting performs in linear time, and are
+    computed for blocks of pairs of diagrams at once. Distances are averaged
+    over all lines.
+
+    """
+    points_1, diagonal_1 = projections_1
+    points_2, diagonal_2 = projections_2
+    n_samples_1, n_directions, n_points_1 = points_1.shape
+    n_samples_2, _, n_points_2 = points_2.shape
+
+    def merged(projections_rows, projections_columns, rows, columns):
+        shape = (rows.stop - rows.start, columns.stop - columns.start,
+                 n_directions)
+        block = np.concatenate([
+            np.broadcast_to(projections_rows[rows, None],
+                            shape + projections_rows.shape[2:]),
+            np.broadcast_to(projections_columns[None, columns],
+                            shape + projections_columns.shape[2:])
+            ], axis=3)
+        block.sort(axis=3, kind='stable')
+        return block
+
+    distances = np.empty((n_samples_1, n_samples_2))
+    width = n_directions * (n_points_1 + n_points_2)
+    for rows, columns in _pair_blocks(n_samples_1, n_samples_2, width):
+        distances[rows, columns] = np.mean(np.sum(np.abs(
+            merged(points_1, diagonal_2, rows, columns)
+            - merged(diagonal_1, points_2, rows, columns)
+            ), axis=3), axis=2)
+    return distances
+
+
+def _heat_kernel_sums(diagrams_1, diagrams_2, sigma):
+    """Closed-form inner products in :math:`L^2(\\mathbb{R}^2)` between the
+    Gaussian-smoothed diagrams, minus their reflections about the diagonal,
+    underlying :func:`heats`, for stacks of diagrams `diagrams_1` and
+    `diagrams_2` broadcast against each other. This is twice the persistence
+    scale-space kernel of Reininghaus et al. at time :math:`\\sigma^2 / 2`.
+
+    The integral of the product of Gaussians of variance :math:`\\sigma^2`
+    centered at :math:`p` and :math:`q` is that of a Gaussian of variance
+    :math:`2\\sigma^2` at :math:`p - q`, so these are sums over pairs of
+    points, one in each diagram. Points on the diagonal are their own
+    reflections and do not contribute.
+
+    """
+    norms = np.sum(diagrams_1 ** 2, axis=-1)[..., :, None] + \
+        np.sum(diagrams_2 ** 2, axis=-1)[..., None, :]
+    products = diagrams_1 @ np.swapaxes(diagrams_2, -1, -2)
+    # Reflections about the diagonal swap births and deaths
+    products_reflected = diagrams_1 @ np.swapaxes(diagrams_2[..., ::-1],
+                                                  -1, -2)
+    terms = np.exp((2 * products - norms) / (4 * sigma ** 2))
+    terms -= np.exp((2 * products_reflected - norms) / (4 * sigma ** 2))
+    return np.sum(terms, axis=(-2, -1)) / (2 * np.pi * sigma ** 2)
+
+
+def heat_kernels(diagrams_1, diagrams_2, sigma):
+    """Persistence scale-space kernel between all diagrams in `diagrams_1`
+    and `diagrams_2`, computed in blocks of pairs of diagrams, see
+    :func:`_heat_kernel_sums`."""
+    n_samples_1, n_points_1 = diagrams_1.shape[:2]
+    n_samples_2, n_points_2 = diagrams_2.shape[:2]
+    kernels = np.empty((n_samples_1, n_samples_2))
+    width = 4 * n_points_1 * n_points_2
+    for rows, columns in _pair_blocks(n_samples_1, n_samples_2, width):
+        kernels[rows, columns] = _heat_kernel_sums(
+            diagrams_1[rows, None], diagrams_2[None, columns], sigma
+            )
+    return kernels
+
+
+def _heat_self_kernels(diagrams, sigma):
+    """Persistence scale-space kernel between each diagram in `diagrams` and
+    itself."""
+    n_samples, n_points = diagrams.shape[:2]
+    kernels = np.empty(n_samples)
+    width = 4 * n_points ** 2
+    for rows in gen_batches(n_samples, max(1, _BLOCK_SIZE // width)):
+        kernels[rows] = _heat_kernel_sums(diagrams[rows], diagrams[rows],
+                                          sigma)
+    return kernels
+
+
+def heat_closed_form_distances(diagrams_1, diagrams_2, sigma=0.1,
+                               kernel=False, **kwargs):
+    kernels = heat_kernels(diagrams_1, diagrams_2, sigma)
+    if kernel:
+        return kernels
+    squared_distances = _heat_self_kernels(diagrams_1, sigma)[:, None] + \
+        _heat_self_kernels(diagrams_2, sigma) - 2 * kernels
+    # Cancellations can leave small negative values
+    return np.sqrt(np.maximum(squared_distances, 0.))
+
+
+def _vectorization(diagrams, metric, sampling, step_size, n_layers=1,
+                   sigma=0.1, weight_function=np.ones_like, power=1.,
+                   **kwargs):
+    """Vector representations of `diagrams` underlying the `metric`s other
+    than ``'bottleneck'``, ``'wasserstein'``, ``'sliced_wasserstein'`` and
+    ``'heat_closed_form'``, one row per diagram."""
+    if metric == 'betti':
+        vectors = betti_curves(diagrams, sampling)
+    elif metric == 'landscape':
+        vectors = landscapes(diagrams, sampling, n_layers)
+    elif metric == 'heat':
+        # WARNING: `heats` modifies `diagrams` in place
+        vectors = heats(diagrams, sampling, step_size, sigma)
+    elif metric == 'persistence_image':
+        # WARNING: `persistence_images` modifies `diagrams` in place
+        vectors = persistence_images(diagrams, sampling, step_size, sigma,
+                                     weight_function(sampling[:, 1]))
+    else:
+        vectors = silhouettes(diagrams, sampling, power)
+    return vectors.reshape(len(diagrams), -1)
+
+
+def _step_size_factor(metric, step_size, p):
+    if metric == 'heat':
+        return step_size ** (2 / p)
+    elif metric == 'persistence_image':
+        return np.product(step_size) ** (1 / p)
+    return step_size ** (1 / p)
+
+
+def _ragged_distances(subdiagram_1, subdiagram_2, metric, sampling,
+                      step_size, p=2., **kwargs):
+    """Distances between the diagrams described by the pairs and offsets in
+    `subdiagram_1` and `subdiagram_2` (see :func:`_subdiagram_pairs`).
+    `subdiagram_2` equal to ``None`` means the same as `subdiagram_1`. Not
+    used for ``'bottleneck'``, ``'wasserstein'``, ``'sliced_wasserstein'``
+    and ``'heat_closed_form'``, which have no vector representations."""
+    vectors_1 = _apply_by_size(_vectorization, *subdiagram_1, metric=metric,
+                               sampling=sampling, step_size=step_size,
+                               **kwargs)
+    if subdiagram_2 is None:
+        distances = squareform(pdist(vectors_1, "minkowski", p=p))
+    else:
+        vectors_2 = _apply_by_size(_vectorization, *subdiagram_2,
+                                   metric=metric, sampling=sampling,
+                                   step_size=step_size, **kwargs)
+        distances = cdist(vectors_1, vectors_2, "minkowski", p=p)
+    distances *= _step_size_factor(metric, step_size, p)
+    return distances
+
+
+def _are_diagrams_equal(X1, X2):
+    """Whether two collections of persistence diagrams, padded or ragged, are
+    identical."""
+    if isinstance(X1, RaggedDiagrams) and isinstance(X2, RaggedDiagrams):
+        return X1.homology_dimensions == X2.homology_dimensions and \
+            np.array_equal(X1.offsets, X2.offsets) and \
+            np.array_equal(X1.pairs, X2.pairs)
+    if isinstance(X1, RaggedDiagrams) or isinstance(X2, RaggedDiagrams):
+        return False
+    return np.array_equal(X1, X2)
+
+
+def _upper_triangle_tiles(n_samples, n_workers):
+    """Pairs of slices delimiting square tiles which cover the upper triangle
+    of an ``n_samples`` by ``n_samples`` matrix, with at least four tiles per
+    worker when possible. Off-diagonal tiles, which are twice as expensive as
+    diagonal ones, come first so that dynamic dispatch balances the load."""
+    n_slices = 1
+    while n_slices < n_samples and \
+            n_slices * (n_slices + 1) // 2 < 4 * n_workers:
+        n_slices += 1
+    slices = list(gen_even_slices(n_samples, n_slices))
+    off_diagonal = [(rows, columns) for i, rows in enumerate(slices)
+                    for columns in slices[i + 1:]]
+    return off_diagonal + [(rows, rows) for rows in slices]
+
+
+def _n_threads_per_task(n_tasks, n_workers):
+    """Number of threads with which each of `n_tasks` tasks can run so that
+    `n_workers` workers are kept busy."""
+    return max(1, n_workers // max(1, n_tasks))
+
+
+def _subdiagram_slice(subdiagram, s):
+    """Pairs and offsets of the diagrams ``s`` in `subdiagram` (see
+    :func:`_subdiagram_pairs`), without copying its pairs."""
+    pairs, offsets = subdiagram
+    return pairs, offsets[s.start:s.stop + 1]
+
+
 implemented_metric_recipes = {
     "bottleneck": bottleneck_distances,
     "wasserstein": wasserstein_distances,
@@ -298,12 +583,15 @@ implemented_metric_recipes = {
     "betti": betti_distances,
     "heat": heat_distances,
     "persistence_image": persistence_image_distances,
-    'silhouette': silhouette_distances
+    'silhouette': silhouette_distances,
+    'sliced_wasserstein': sliced_wasserstein_distances,
+    'heat_closed_form': heat_closed_form_distances
     }
 
 
 def _parallel_pairwise(
-        X1, X2, metric, metric_params, homology_dimensions, n_jobs
+        X1, X2, metric, metric_params, homology_dimensions, n_jobs,
+        prefer=None, projections=None
         ):
     metric_func = implemented_metric_recipes[metric]
     effective_metric_params = metric_params.copy()
@@ -314,19 +602,130 @@ def _parallel_pairwise(
         parallel_kwargs = {"mmap_mode": "c"}
     else:
         parallel_kwargs = {}
+    # Thread-based workers share X1 and X2 with the caller
+    parallel_kwargs["prefer"] = prefer
 
     n_columns = len(X2)
-    distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
-        delayed(metric_func)(
-            _subdiagrams(X1, [dim], remove_dim=True),
-            _subdiagrams(X2[s], [dim], remove_dim=True),
-            sampling=samplings[dim],
-            step_size=step_sizes[dim],
-            **effective_metric_params
+    is_symmetric = _are_diagrams_equal(X1, X2)
+    n_workers = effective_n_jobs(n_jobs)
+    # When the distance matrices are symmetric and there is a single worker,
+    # vectorized metrics compute the representations of the diagrams and each
+    # distance once per homology dimension. Otherwise, columns are split
+    # between workers.
+    n_slices = 1 if is_symmetric and n_workers == 1 else n_workers
+    if metric in ["bottleneck", "wasserstein"]:
+        # Padded and ragged diagrams alike are passed to hera as flat pairs
+        # and offsets, whose diagonal pairs are dropped in C++
+        subdiagrams_1 = {dim: _subdiagram_pairs(X1, dim)
+                         for dim in homology_dimensions}
+        if is_symmetric:
+            # Each distance is computed once, in tiles covering the upper
+            # triangle of the distance matrices which are then mirrored
+            tiles = _upper_triangle_tiles(n_columns, n_workers)
+            # Workers left over when there are fewer tasks than workers run
+            # OpenMP threads within each task
+            n_threads = _n_threads_per_task(
+                len(homology_dimensions) * len(tiles), n_workers
+                )
+            results = iter(Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+                delayed(metric_func)(
+                    _subdiagram_slice(subdiagrams_1[dim], rows),
+                    None if rows == columns
+                    else _subdiagram_slice(subdiagrams_1[dim], columns),
+                    n_threads=n_threads, **effective_metric_params
+                    )
+                for dim in homology_dimensions
+                for rows, columns in tiles
+                ))
+            distance_matrices = np.zeros(
+                (n_columns, n_columns, len(homology_dimensions))
+                )
+            for i in range(len(homology_dimensions)):
+                for rows, columns in tiles:
+                    tile = next(results)
+                    distance_matrices[rows, columns, i] += tile
+                    distance_matrices[columns, rows, i] += tile.T
+            return distance_matrices
+
+        subdiagrams_2 = {dim: _subdiagram_pairs(X2, dim)
+                         for dim in homology_dimensions}
+        n_threads = _n_threads_per_task(
+            len(homology_dimensions) * min(n_slices, n_columns), n_workers
+            )
+        distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(metric_func)(
+                subdiagrams_1[dim],
+                _subdiagram_slice(subdiagrams_2[dim], s),
+                n_threads=n_threads, **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(n_columns, n_slices)
+            )
+    elif metric == "sliced_wasserstein":
+        # Each diagram is projected once. Projections of `X2`, e.g. the
+        # diagrams seen in fit, can be passed as `projections`
+        if projections is None:
+            projections = {dim: _sliced_projections(
+                X2, dim, **effective_metric_params
+                ) for dim in homology_dimensions}
+        if is_symmetric:
+            projections_1 = projections
+        else:
+            projections_1 = {dim: _sliced_projections(
+                X1, dim, **effective_metric_params
+                ) for dim in homology_dimensions}
+        distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(metric_func)(
+                projections_1[dim],
+                tuple(projection[s] for projection in projections[dim])
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(n_columns, n_workers)
+            )
+    elif metric == "heat_closed_form":
+        # Pairs [0, 0] do not contribute to the kernel, so that subdiagrams
+        # can be padded to equal size whatever the input format
+        subdiagrams_1 = {dim: _padded_subdiagram(X1, dim)
+                         for dim in homology_dimensions}
+        distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(metric_func)(
+                subdiagrams_1[dim],
+                _padded_subdiagram(X2[s], dim),
+                **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(n_columns, n_workers)
+            )
+    elif isinstance(X1, RaggedDiagrams) or isinstance(X2, RaggedDiagrams):
+        # Diagrams are only padded in batches of similar sizes, see
+        # `_apply_by_size`
+        subdiagrams_1 = {dim: _subdiagram_pairs(X1, dim)
+                         for dim in homology_dimensions}
+        distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(_ragged_distances)(
+                subdiagrams_1[dim],
+                None if is_symmetric and n_slices == 1
+                else _subdiagram_pairs(X2[s], dim),
+                metric,
+                sampling=samplings[dim],
+                step_size=step_sizes[dim],
+                **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(n_columns, n_slices)
+            )
+    else:
+        distance_matrices = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(metric_func)(
+                _subdiagrams(X1, [dim], remove_dim=True),
+                _subdiagrams(X2[s], [dim], remove_dim=True),
+                sampling=samplings[dim],
+                step_size=step_sizes[dim],
+                **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(n_columns, n_slices)
             )
-        for dim in homology_dimensions
-        for s in gen_even_slices(n_columns, effective_n_jobs(n_jobs))
-        )
 
     distance_matrices = np.concatenate(distance_matrices, axis=1)
     distance_matrices = np.stack(
@@ -403,6 +802,15 @@ def silhouette_amplitudes(
     return amplitudes
 
 
+def sliced_wasserstein_amplitudes(diagrams, n_directions=10, **kwargs):
+    points, diagonal = sliced_projections(diagrams, n_directions)
+    return np.mean(np.sum(np.abs(points - diagonal), axis=2), axis=1)
+
+
+def heat_closed_form_amplitudes(diagrams, sigma=0.1, **kwargs):
+    return np.sqrt(np.maximum(_heat_self_kernels(diagrams, sigma), 0.))
+
+
 implemented_amplitude_recipes = {
     "bottleneck": bottleneck_amplitudes,
     "wasserstein": wasserstein_amplitudes,
@@ -410,7 +818,9 @@ implemented_amplitude_recipes = {
     "betti": betti_amplitudes,
     "heat": heat_amplitudes,
     "persistence_image": persistence_image_amplitudes,
-    'silhouette': silhouette_amplitudes
+    'silhouette': silhouette_amplitudes,
+    'sliced_wasserstein': sliced_wasserstein_amplitudes,
+    'heat_closed_form': heat_closed_form_amplitudes
     }
 
 
@@ -425,16 +835,30 @@ def _parallel_amplitude(X, metric, metric_params, homology_dimensions, n_jobs):
     else:
         parallel_kwargs = {}
 
-    amplitude_arrays = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
-        delayed(amplitude_func)(
-            _subdiagrams(X[s], [dim], remove_dim=True),
-            sampling=samplings[dim],
-            step_size=step_sizes[dim],
-            **effective_metric_params
+    if isinstance(X, RaggedDiagrams):
+        amplitude_arrays = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(_apply_by_size)(
+                amplitude_func,
+                *X[s].subdiagram(dim),
+                sampling=samplings[dim],
+                step_size=step_sizes[dim],
+                **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(len(X), effective_n_jobs(n_jobs))
+            )
+    else:
+        amplitude_arrays = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+            delayed(amplitude_func)(
+                _subdiagrams(X[s], [dim], remove_dim=True),
+                sampling=samplings[dim],
+                step_size=step_sizes[dim],
+                **effective_metric_params
+                )
+            for dim in homology_dimensions
+            for s in gen_even_slices(_num_samples(X),
+                                     effective_n_jobs(n_jobs))
             )
-        for dim in homology_dimensions
-        for s in gen_even_slices(_num_samples(X), effective_n_jobs(n_jobs))
-        )
 
     amplitude_arrays = np.concatenate(amplitude_arrays).\
         reshape(len(homology_dimensions), len(X)).T
@@ -3,6 +3,8 @@
 
 import numpy as np
 
+from ..utils._ragged import RaggedDiagrams, _ranges
+
 
 def _homology_dimensions_to_sorted_ints(homology_dimensions):
     return tuple(
@@ -11,6 +13,14 @@ def _homology_dimensions_to_sorted_ints(homology_dimensions):
         )
 
 
+def _unique_homology_dimensions(X):
+    """Homology dimensions in a collection of persistence diagrams, assuming
+    that they can all be found in its zero-th entry if it is an ndarray."""
+    if isinstance(X, RaggedDiagrams):
+        return np.array(X.homology_dimensions, dtype=float)
+    return np.unique(X[0, :, 2])
+
+
 def _subdiagrams(X, homology_dimensions, remove_dim=False):
     """For each diagram in a collection, extract the subdiagrams in a given
     list of homology dimensions. It is assumed that all diagrams in X contain
@@ -52,6 +62,70 @@ def _subdiagrams(X, homology_dimensions, remove_dim=False):
     return Xs
 
 
+def _subdiagram_pairs(X, homology_dimension):
+    """Birth-death pairs of a collection of persistence diagrams in a single
+    homology dimension, as a flat array together with the offsets at which the
+    pairs of each sample start. Padding triples in 3D ndarrays are kept."""
+    if isinstance(X, RaggedDiagrams):
+        return X.subdiagram(homology_dimension)
+    Xs = _subdiagrams(X, [homology_dimension], remove_dim=True)
+    return Xs.reshape(-1, 2), np.arange(len(Xs) + 1) * Xs.shape[1]
+
+
+def _pad_pairs(pairs, starts, counts):
+    """3D array of the diagrams whose pairs are ``pairs[starts[i]:starts[i] +
+    counts[i]]``, padded with pairs [0, 0] up to the largest of them."""
+    batch = np.zeros((len(counts), max(np.max(counts, initial=0), 1), 2),
+                     dtype=pairs.dtype)
+    starts_in_batch = np.cumsum(counts) - counts
+    positions = np.arange(np.sum(counts)) - np.repeat(starts_in_batch, counts)
+    batch[np.repeat(np.arange(len(counts)), counts), positions] = \
+        pairs[_ranges(starts, counts)]
+    return batch
+
+
+def _padded_subdiagram(X, homology_dimension):
+    """Subdiagrams of a collection of persistence diagrams in a single
+    homology dimension, as a 3D array of birth-death pairs padded with pairs
+    [0, 0] to the size of the largest of them."""
+    pairs, offsets = _subdiagram_pairs(X, homology_dimension)
+    return _pad_pairs(pairs, offsets[:-1], np.diff(offsets))
+
+
+def _apply_by_size(func, pairs, offsets, **kwargs):
+    """Apply `func`, which acts on 3D arrays of birth-death pairs and returns
+    one result per diagram, to the diagrams described by `pairs` and
+    `offsets` (see :func:`_subdiagram_pairs`).
+
+    Diagrams are grouped by the bit length of their number of pairs and each
+    group is padded with pairs [0, 0] up to its largest diagram, so that no
+    batch is more than twice as large as the pairs it holds, however uneven
+    the sizes across the collection. Results are returned in the original
+    order, in a dtype to which the results of all groups can be cast.
+
+    """
+    counts = np.diff(offsets)
+    if not len(counts):
+        return func(np.zeros((0, 1, 2), dtype=pairs.dtype), **kwargs)
+
+    groups = np.frexp(counts)[1]
+    results_by_group = []
+    for group in np.unique(groups):
+        idx = np.flatnonzero(groups == group)
+        results_group = func(_pad_pairs(pairs, offsets[idx], counts[idx]),
+                             **kwargs)
+        results_by_group.append((idx, results_group))
+
+    results = np.empty(
+        (len(counts),) + results_group.shape[1:],
+        dtype=np.result_type(*(r for _, r in results_by_group))
+        )
+    for idx, results_group in results_by_group:
+        results[idx] = results_group
+
+    return results
+
+
 def _sample_image(image, diagram_pixel_coords):
     # WARNING: Modifies `image` in-place
     unique, counts = \
@@ -78,6 +152,9 @@ def _multirange(counts):
 
 
 def _filter(X, filtered_homology_dimensions, cutoff):
+    if isinstance(X, RaggedDiagrams):
+        return _filter_ragged(X, filtered_homology_dimensions, cutoff)
+
     n = len(X)
     homology_dimensions = sorted(np.unique(X[0, :, 2]))
     unfiltered_homology_dimensions = [dim for dim in homology_dimensions if
@@ -98,7 +175,8 @@ def _filter(X, filtered_homology_dimensions, cutoff):
         # dim surviving the cutoff
         indices = np.nonzero(np.logical_and(dim_mask, cutoff_mask))
         if not indices[0].size:
-            Xdim = np.tile([0., 0., dim], (n, 1, 1))
+            Xdim = np.tile(np.array([0., 0., dim], dtype=X.dtype),
+                           (n, 1, 1))
         else:
             # A unique element k is repeated N times *consecutively* in
             # indices[0] iff there are exactly N valid persistence triples
@@ -109,7 +187,10 @@ def _filter(X, filtered_homology_dimensions, cutoff):
             X_indices = X[indices]
             min_value = np.min(X_indices[:, 0])  # For padding
             # Initialise the array of filtered subdiagrams in dimension m
-            Xdim = np.tile([min_value, min_value, dim], (n, max_n_points, 1))
+            Xdim = np.tile(
+                np.array([min_value, min_value, dim], dtype=X.dtype),
+                (n, max_n_points, 1)
+                )
             # Since repeated indices in indices[0] are consecutive and we know
             # the counts per unique index, we can fill the top portion of
             # each 2D array entry of Xdim with the filtered triples from the
@@ -122,20 +203,46 @@ def _filter(X, filtered_homology_dimensions, cutoff):
     return Xf
 
 
+def _filter_ragged(X, filtered_homology_dimensions, cutoff):
+    """Version of :func:`_filter` for :class:`RaggedDiagrams`, in which pairs
+    are removed rather than replaced by padding triples."""
+    n_dimensions = len(X.homology_dimensions)
+    block_ids = X._block_ids()
+    is_filtered_dim = np.isin(X.homology_dimensions,
+                              filtered_homology_dimensions)
+    keep = np.logical_or(~is_filtered_dim[block_ids % n_dimensions],
+                         X.pairs[:, 1] - X.pairs[:, 0] > cutoff)
+    counts = np.bincount(block_ids[keep], minlength=len(X.offsets) - 1)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    return RaggedDiagrams(X.pairs[keep], offsets, X.homology_dimensions)
+
+
 def _bin(X, metric, n_bins=100, homology_dimensions=None, **kw_args):
     if homology_dimensions is None:
-        homology_dimensions = sorted(np.unique(X[0, :, 2]))
+        homology_dimensions = sorted(_unique_homology_dimensions(X))
     # For some vectorizations, we force the values to be the same + widest
-    sub_diags = {dim: _subdiagrams(X, [dim], remove_dim=True)
+    sub_diags = {dim: _subdiagram_pairs(X, dim)
                  for dim in homology_dimensions}
+    for dim, (pairs, offsets) in sub_diags.items():
+        counts = np.diff(offsets)
+        if isinstance(X, RaggedDiagrams) and \
+                (not counts.size or counts.min() < max(counts.max(), 1)):
+            # Take into account the padding triples of the equivalent padded
+            # array, see RaggedDiagrams.to_padded
+            min_birth = np.min(pairs[:, 0], initial=np.inf)
+            min_birth = 0. if min_birth == np.inf else min_birth
+            pairs = np.vstack([pairs, np.array([[min_birth, min_birth]],
+                                               dtype=pairs.dtype)])
+        sub_diags[dim] = pairs
     # For persistence images, move into birth-persistence
     if metric == 'persistence_image':
         for dim in homology_dimensions:
-            sub_diags[dim][:, :, [1]] = sub_diags[dim][:, :, [1]] \
-                - sub_diags[dim][:, :, [0]]
-    min_vals = {dim: np.min(sub_diags[dim], axis=(0, 1))
+            sub_diags[dim][:, [1]] = sub_diags[dim][:, [1]] \
+                - sub_diags[dim][:, [0]]
+    min_vals = {dim: np.min(sub_diags[dim], axis=0)
                 for dim in homology_dimensions}
-    max_vals = {dim: np.max(sub_diags[dim], axis=(0, 1))
+    max_vals = {dim: np.max(sub_diags[dim], axis=0)
                 for dim in homology_dimensions}
 
     if metric in ['landscape', 'betti', 'heat', 'silhouette']:
@@ -154,12 +261,15 @@ def _bin(X, metric, n_bins=100, homology_dimensions=None, **kw_args):
                                else global_max_val[k] for k in range(2)])
                 for dim in homology_dimensions}
 
+    # Samplings are in the same floating point precision as the diagrams
+    dtype = X.pairs.dtype if isinstance(X, RaggedDiagrams) else X.dtype
     samplings = {}
     step_sizes = {}
     for dim in homology_dimensions:
         samplings[dim], step_sizes[dim] = np.linspace(
             min_vals[dim], max_vals[dim], retstep=True, num=n_bins
             )
+        samplings[dim] = samplings[dim].astype(dtype, copy=False)
     if metric in ['landscape', 'betti', 'heat', 'silhouette']:
         for dim in homology_dimensions:
             samplings[dim] = samplings[dim][:, [0], None]
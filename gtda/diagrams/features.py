@@ -5,14 +5,17 @@ from numbers import Real
 
 import numpy as np
 from joblib import Parallel, delayed, effective_n_jobs
+from scipy.special import xlogy
 from scipy.stats import entropy
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils import gen_even_slices
 from sklearn.utils.validation import check_is_fitted
 
 from ._metrics import _AVAILABLE_AMPLITUDE_METRICS, _parallel_amplitude
-from ._utils import _subdiagrams, _bin, _homology_dimensions_to_sorted_ints
+from ._utils import _subdiagrams, _bin, _homology_dimensions_to_sorted_ints, \
+    _unique_homology_dimensions
 from ..utils._docs import adapt_fit_transform_docs
+from ..utils._ragged import RaggedDiagrams
 from ..utils.intervals import Interval
 from ..utils.validation import validate_params, check_diagrams
 
@@ -99,6 +102,29 @@ class PersistenceEntropy(BaseEstimator, TransformerMixin):
         X_entropy = X_entropy[:, None]
         return X_entropy
 
+    @staticmethod
+    def _ragged_persistence_entropy(pairs, offsets, normalize=False,
+                                    nan_fill_value=None):
+        n_samples = len(offsets) - 1
+        sample_ids = np.repeat(np.arange(n_samples), np.diff(offsets))
+        lifespans = pairs[:, 1] - pairs[:, 0]
+        lifespan_sums = np.bincount(sample_ids, weights=lifespans,
+                                    minlength=n_samples)
+        # Same conventions as scipy.stats.entropy: 0 log(0) = 0, and NaN for
+        # diagrams with zero total lifespan
+        probabilities = lifespans / lifespan_sums[sample_ids]
+        X_entropy = -np.bincount(
+            sample_ids, weights=xlogy(probabilities, probabilities),
+            minlength=n_samples
+            ) / np.log(2)
+        X_entropy[lifespan_sums == 0] = np.nan
+        if normalize:
+            X_entropy /= np.log2(lifespan_sums)
+        if nan_fill_value is not None:
+            np.nan_to_num(X_entropy, nan=nan_fill_value, copy=False)
+        X_entropy = X_entropy[:, None]
+        return X_entropy
+
     def fit(self, X, y=None):
         """Store all observed homology dimensions in
         :attr:`homology_dimensions_`. Then, return the estimator.
@@ -108,7 +134,7 @@ class PersistenceEntropy(BaseEstimator, TransformerMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -125,13 +151,11 @@ class PersistenceEntropy(BaseEstimator, TransformerMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters, exclude=['n_jobs'])
 
-        # Find the unique homology dimensions in the 3D array X passed to `fit`
-        # assuming that they can all be found in its zero-th entry
-        homology_dimensions_fit = np.unique(X[0, :, 2])
+        homology_dimensions_fit = _unique_homology_dimensions(X)
         self.homology_dimensions_ = \
             _homology_dimensions_to_sorted_ints(homology_dimensions_fit)
         self._n_dimensions = len(self.homology_dimensions_)
@@ -143,7 +167,7 @@ class PersistenceEntropy(BaseEstimator, TransformerMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -164,18 +188,31 @@ class PersistenceEntropy(BaseEstimator, TransformerMixin):
 
         """
         check_is_fitted(self)
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
 
         with np.errstate(divide='ignore', invalid='ignore'):
-            Xt = Parallel(n_jobs=self.n_jobs)(
-                delayed(self._persistence_entropy)(
-                    _subdiagrams(X[s], [dim]),
-                    normalize=self.normalize,
-                    nan_fill_value=self.nan_fill_value
+            if isinstance(X, RaggedDiagrams):
+                Xt = Parallel(n_jobs=self.n_jobs)(
+                    delayed(self._ragged_persistence_entropy)(
+                        *X[s].subdiagram(dim),
+                        normalize=self.normalize,
+                        nan_fill_value=self.nan_fill_value
+                        )
+                    for dim in self.homology_dimensions_
+                    for s in gen_even_slices(len(X),
+                                             effective_n_jobs(self.n_jobs))
+                    )
+            else:
+                Xt = Parallel(n_jobs=self.n_jobs)(
+                    delayed(self._persistence_entropy)(
+                        _subdiagrams(X[s], [dim]),
+                        normalize=self.normalize,
+                        nan_fill_value=self.nan_fill_value
+                        )
+                    for dim in self.homology_dimensions_
+                    for s in gen_even_slices(len(X),
+                                             effective_n_jobs(self.n_jobs))
                     )
-                for dim in self.homology_dimensions_
-                for s in gen_even_slices(len(X), effective_n_jobs(self.n_jobs))
-                )
         Xt = np.concatenate(Xt).reshape(self._n_dimensions, len(X)).T
         return Xt
 
@@ -207,7 +244,8 @@ class Amplitude(BaseEstimator, TransformerMixin):
     ----------
     metric : ``'bottleneck'`` | ``'wasserstein'`` | ``'betti'`` | \
         ``'landscape'`` | ``'silhouette'`` | ``'heat'`` | \
-        ``'persistence_image'``, optional, default: ``'landscape'``
+        ``'persistence_image'`` | ``'sliced_wasserstein'`` | \
+        ``'heat_closed_form'``, optional, default: ``'landscape'``
         Distance or dissimilarity function used to define the amplitude of a
         subdiagram as its distance from the (trivial) diagonal diagram:
 
@@ -222,6 +260,12 @@ class Amplitude(BaseEstimator, TransformerMixin):
           Gaussian-smoothed diagrams.
         - ``'persistence_image'`` refers to the :math:`L^p` distance between
           Gaussian-smoothed diagrams represented on birth-persistence axes.
+        - ``'sliced_wasserstein'`` refers to the sliced Wasserstein distance,
+          the average over lines through the origin of the 1-Wasserstein
+          distances between the projections of diagrams on those lines.
+        - ``'heat_closed_form'`` refers to the :math:`L^2` distance between
+          the Gaussian-smoothed diagrams of ``'heat'``, computed exactly as
+          sums over pairs of points rather than on a grid.
 
     metric_params : dict or None, optional, default: ``None``
         Additional keyword arguments for the metric function (passing ``None``
@@ -245,6 +289,11 @@ class Amplitude(BaseEstimator, TransformerMixin):
           (float, default: ``2.``), `sigma` (float, default: ``0.1``), `n_bins`
           (int, default: ``100``) and `weight_function` (callable or None,
           default: ``None``).
+        - If ``metric == 'sliced_wasserstein'`` the only argument is
+          `n_directions` (int, default: ``10``), the number of lines, equally
+          spaced in angle.
+        - If ``metric == 'heat_closed_form'`` the only argument is `sigma`
+          (float, default: ``0.1``).
 
     order : float or None, optional, default: ``None``
         If ``None``, :meth:`transform` returns for each diagram a vector of
@@ -305,7 +354,7 @@ class Amplitude(BaseEstimator, TransformerMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -322,7 +371,7 @@ class Amplitude(BaseEstimator, TransformerMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters, exclude=['n_jobs'])
 
@@ -333,9 +382,7 @@ class Amplitude(BaseEstimator, TransformerMixin):
         validate_params(self.effective_metric_params_,
                         _AVAILABLE_AMPLITUDE_METRICS[self.metric])
 
-        # Find the unique homology dimensions in the 3D array X passed to `fit`
-        # assuming that they can all be found in its zero-th entry
-        homology_dimensions_fit = np.unique(X[0, :, 2])
+        homology_dimensions_fit = _unique_homology_dimensions(X)
         self.homology_dimensions_ = \
             _homology_dimensions_to_sorted_ints(homology_dimensions_fit)
 
@@ -358,7 +405,7 @@ class Amplitude(BaseEstimator, TransformerMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -380,7 +427,7 @@ class Amplitude(BaseEstimator, TransformerMixin):
 
         """
         check_is_fitted(self)
-        Xt = check_diagrams(X, copy=True)
+        Xt = check_diagrams(X, copy=True, accept_ragged=True)
 
         Xt = _parallel_amplitude(Xt, self.metric,
                                  self.effective_metric_params_,
@@ -9,10 +9,12 @@ from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 
 from ._metrics import _AVAILABLE_AMPLITUDE_METRICS, _parallel_amplitude
-from ._utils import _filter, _bin, _homology_dimensions_to_sorted_ints
+from ._utils import _filter, _bin, _homology_dimensions_to_sorted_ints, \
+    _unique_homology_dimensions
 from ..base import PlotterMixin
 from ..plotting.persistence_diagrams import plot_diagram
 from ..utils._docs import adapt_fit_transform_docs
+from ..utils._ragged import RaggedDiagrams
 from ..utils.intervals import Interval
 from ..utils.validation import check_diagrams, validate_params
 
@@ -148,7 +150,8 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
     ----------
     metric : ``'bottleneck'`` | ``'wasserstein'`` | ``'betti'`` | \
         ``'landscape'`` |``'silhouette'`` |  ``'heat'`` | \
-        ``'persistence_image'``, optional, default: ``'bottleneck'``
+        ``'persistence_image'`` | ``'sliced_wasserstein'`` | \
+        ``'heat_closed_form'``, optional, default: ``'bottleneck'``
         See the corresponding parameter in :class:`Amplitude`.
 
     metric_params : dict or None, optional, default: ``None``
@@ -211,7 +214,7 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -228,7 +231,7 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters, exclude=['n_jobs'])
 
@@ -239,9 +242,7 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
         validate_params(self.effective_metric_params_,
                         _AVAILABLE_AMPLITUDE_METRICS[self.metric])
 
-        # Find the unique homology dimensions in the 3D array X passed to `fit`
-        # assuming that they can all be found in its zero-th entry
-        homology_dimensions_fit = np.unique(X[0, :, 2])
+        homology_dimensions_fit = _unique_homology_dimensions(X)
         self.homology_dimensions_ = \
             _homology_dimensions_to_sorted_ints(homology_dimensions_fit)
 
@@ -270,7 +271,7 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -284,14 +285,17 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Returns
         -------
-        Xs : ndarray of shape (n_samples, n_features, 3)
+        Xs : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Rescaled diagrams.
 
         """
         check_is_fitted(self)
 
-        Xs = check_diagrams(X, copy=True)
-        Xs[:, :, :2] /= self.scale_
+        Xs = check_diagrams(X, copy=True, accept_ragged=True)
+        if isinstance(Xs, RaggedDiagrams):
+            Xs.pairs /= self.scale_
+        else:
+            Xs[:, :, :2] /= self.scale_
         return Xs
 
     def inverse_transform(self, X):
@@ -300,19 +304,22 @@ class Scaler(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Data to apply the inverse transform to, c.f. :meth:`transform`.
 
         Returns
         -------
-        Xs : ndarray of shape (n_samples, n_features, 3)
+        Xs : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Rescaled diagrams.
 
         """
         check_is_fitted(self)
 
-        Xs = check_diagrams(X, copy=True)
-        Xs[:, :, :2] *= self.scale_
+        Xs = check_diagrams(X, copy=True, accept_ragged=True)
+        if isinstance(Xs, RaggedDiagrams):
+            Xs.pairs *= self.scale_
+        else:
+            Xs[:, :, :2] *= self.scale_
         return Xs
 
     def plot(self, Xt, sample=0, homology_dimensions=None, plotly_params=None):
@@ -416,7 +423,7 @@ class Filtering(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -433,14 +440,12 @@ class Filtering(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters)
 
         if self.homology_dimensions is None:
-            # Find the unique homology dimensions in the 3D array X passed to
-            # `fit` assuming that they can all be found in its zero-th entry
-            homology_dimensions = np.unique(X[0, :, 2])
+            homology_dimensions = _unique_homology_dimensions(X)
         else:
             homology_dimensions = self.homology_dimensions
         self.homology_dimensions_ = \
@@ -453,7 +458,7 @@ class Filtering(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -467,14 +472,15 @@ class Filtering(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Returns
         -------
-        Xt : ndarray of shape (n_samples, n_features_filtered, 3)
+        Xt : ndarray of shape (n_samples, n_features_filtered, 3) or \
+            RaggedDiagrams
             Filtered persistence diagrams. Only the subdiagrams corresponding
             to dimensions in :attr:`homology_dimensions_` are filtered.
             ``n_features_filtered`` is less than or equal to ``n_features`.
 
         """
         check_is_fitted(self)
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
 
         Xt = _filter(X, self.homology_dimensions_, self.epsilon)
         return Xt
@@ -15,10 +15,12 @@ from sklearn.utils.validation import check_is_fitted
 from ._metrics import betti_curves, landscapes, heats, \
     persistence_images, silhouettes
 from ._utils import _subdiagrams, _bin, _make_homology_dimensions_mapping, \
-    _homology_dimensions_to_sorted_ints
+    _homology_dimensions_to_sorted_ints, _unique_homology_dimensions, \
+    _apply_by_size
 from ..base import PlotterMixin
 from ..plotting import plot_heatmap
 from ..utils._docs import adapt_fit_transform_docs
+from ..utils._ragged import RaggedDiagrams
 from ..utils.intervals import Interval
 from ..utils.validation import validate_params, check_diagrams
 
@@ -92,7 +94,7 @@ class BettiCurve(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -109,13 +111,11 @@ class BettiCurve(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters, exclude=["n_jobs"])
 
-        # Find the unique homology dimensions in the 3D array X passed to `fit`
-        # assuming that they can all be found in its zero-th entry
-        homology_dimensions_fit = np.unique(X[0, :, 2])
+        homology_dimensions_fit = _unique_homology_dimensions(X)
         self.homology_dimensions_ = \
             _homology_dimensions_to_sorted_ints(homology_dimensions_fit)
         self._n_dimensions = len(self.homology_dimensions_)
@@ -134,7 +134,7 @@ class BettiCurve(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -152,17 +152,29 @@ class BettiCurve(BaseEstimator, TransformerMixin, PlotterMixin):
             Betti curves: one curve (represented as a one-dimensional array
             of integer values) per sample and per homology dimension seen
             in :meth:`fit`. Index i along axis 1 corresponds to the i-th
-            homology dimension in :attr:`homology_dimensions_`.
+            homology dimension in :attr:`homology_dimensions_`. The dtype is
+            the smallest signed integer type which can hold the number of
+            persistence pairs in each diagram.
 
         """
         check_is_fitted(self)
-        X = check_diagrams(X)
-
-        Xt = Parallel(n_jobs=self.n_jobs)(delayed(betti_curves)(
-                _subdiagrams(X[s], [dim], remove_dim=True),
-                self._samplings[dim])
-            for dim in self.homology_dimensions_
-            for s in gen_even_slices(len(X), effective_n_jobs(self.n_jobs)))
+        X = check_diagrams(X, accept_ragged=True)
+
+        if isinstance(X, RaggedDiagrams):
+            Xt = Parallel(n_jobs=self.n_jobs)(delayed(_apply_by_size)(
+                    betti_curves,
+                    *X[s].subdiagram(dim),
+                    sampling=self._samplings[dim])
+                for dim in self.homology_dimensions_
+                for s in gen_even_slices(len(X),
+                                         effective_n_jobs(self.n_jobs)))
+        else:
+            Xt = Parallel(n_jobs=self.n_jobs)(delayed(betti_curves)(
+                    _subdiagrams(X[s], [dim], remove_dim=True),
+                    self._samplings[dim])
+                for dim in self.homology_dimensions_
+                for s in gen_even_slices(len(X),
+                                         effective_n_jobs(self.n_jobs)))
         Xt = np.concatenate(Xt).\
             reshape(self._n_dimensions, len(X), -1).\
             transpose((1, 0, 2))
@@ -325,7 +337,7 @@ class PersistenceLandscape(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -342,13 +354,11 @@ class PersistenceLandscape(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        X = check_diagrams(X)
+        X = check_diagrams(X, accept_ragged=True)
         validate_params(
             self.get_params(), self._hyperparameters, exclude=["n_jobs"])
 
-        # Find the unique homology dimensions in the 3D array X passed to `fit`
-        # assuming that they can all be found in its zero-th entry
-        homology_dimensions_fit = np.unique(X[0, :, 2])
+        homology_dimensions_fit = _unique_homology_dimensions(X)
         self.homology_dimensions_ = \
             _homology_dimensions_to_sorted_ints(homology_dimensions_fit)
         self._n_dimensions = len(self.homology_dimensions_)
@@ -367,7 +377,7 @@ class PersistenceLandscape(BaseEstimator, TransformerMixin, PlotterMixin):
 
         Parameters
         ----------
-        X : ndarray of shape (n_samples, n_features, 3)
+        X : ndarray of shape (n_samples, n_features, 3) or RaggedDiagrams
             Input data. Array of persistence diagrams, each a collection of
             triples [b, d, q] representing persistent topological features
             through their birth (b), death (d) and homology dimension (q).
@@ -391,14 +401,25 @@ class PersistenceLandscape(BaseEstimator, TransformerMixin, PlotterMixin):
 
         """
         check_is_fitted(self)
-        X = check_diagrams(X)
-
-        Xt = Parallel(n_jobs=self.n_jobs)(delayed(landscapes)(
-                _subdiagrams(X[s], [dim], remove_dim=True),
-                self._samplings[dim],
-                self.n_layers)
-            for dim in self.homology_dimensions_
-            for s in gen_even_slices(len(X), effective_n_jobs(self.n_jobs)))
+        X = check_diagrams(X, accept_ragged=True)
+
+        if isinstance(X, RaggedDiagrams):
+            Xt = Parallel(n_jobs=self.n_jobs)(delayed(_apply_by_size)(
+                    landscapes,
+                    *X[s].subdiagram(dim),
+                    sampling=self._samplings[dim],
+                    n_layers=self.n_layers)
+                for dim in self.homology_dimensions_
+                for s in gen_even_slices(len(X),
+                                         effective_n_jobs(self.n_jobs)))
+        else:
+            Xt = Parallel(n_jobs=self.n_jobs)(delayed(landscapes)(
+                    _subdiagrams(X[s], [dim], remove_dim=True),
+                    self._samplings[dim],
+                    self.n_layers)
+                for dim in self.homology_dimensions_
+                for s in gen_even_slices(len(X),
+                                         effective_n_jobs(self.n_jobs)))
         Xt = np.concatenate(Xt).\
             reshape(self._n_dimensions, len(X), self.n_layers, self.n_bins).\
             transpose((1, 0, 2, 3))
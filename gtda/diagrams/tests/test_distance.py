@@ -6,7 +6,7 @@ from sklearn.exceptions import NotFittedError
 
 from numpy.testing import assert_almost_equal
 
-from gtda.diagrams import PairwiseDistance, Amplitude
+from gtda.diagrams import PairwiseDistance, Amplitude, RaggedDiagrams
 
 X1 = np.array([
     [[0., 0.36905774, 0],
@@ -249,7 +249,10 @@ parameters_distance = [
     ('persistence_image',
      {'p': 2.1, 'sigma': 0.5, 'n_bins': 10}),
     ('persistence_image',
-     {'p': 2.1, 'sigma': 0.5, 'n_bins': 10, 'weight_function': lambda x: x})
+     {'p': 2.1, 'sigma': 0.5, 'n_bins': 10, 'weight_function': lambda x: x}),
+    ('sliced_wasserstein', {'n_directions': 5}),
+    ('heat_closed_form', {'sigma': 0.5}),
+    ('heat_closed_form', {'sigma': 0.5, 'kernel': True})
     ]
 
 
@@ -281,6 +284,57 @@ def test_dd_transform(metric, metric_params, order, n_jobs):
         assert X_res.shape[2] == n_homology_dimensions
 
 
+@pytest.mark.parametrize(('metric', 'metric_params'), parameters_distance)
+def test_dd_transform_threads(metric, metric_params):
+    dd = PairwiseDistance(metric=metric, metric_params=metric_params,
+                          order=None, n_jobs=2)
+    X_res = dd.fit(X1).transform(X2)
+    dd.set_params(prefer='threads')
+    assert_almost_equal(dd.fit(X1).transform(X2), X_res)
+
+
+@pytest.mark.parametrize('metric', ['bottleneck', 'wasserstein'])
+@pytest.mark.parametrize('fit_transform', [False, True])
+def test_dd_transform_hera_threads(metric, fit_transform):
+    """Test that hera distances are the same when there are more jobs than
+    tiles of the distance matrices, so that each tile is computed by several
+    OpenMP threads, as when each tile is computed by a single thread."""
+    def transform(dd):
+        return dd.fit_transform(X1) if fit_transform \
+            else dd.fit(X1).transform(X2)
+
+    X_res = transform(PairwiseDistance(metric=metric, order=None, n_jobs=1))
+    dd = PairwiseDistance(metric=metric, order=None, n_jobs=32,
+                          prefer='threads')
+    assert_almost_equal(transform(dd), X_res)
+
+
+@pytest.mark.parametrize(('metric', 'metric_params'), parameters_distance)
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_dd_transform_ragged(metric, metric_params, n_jobs):
+    X1_ragged = RaggedDiagrams.from_padded(X1)
+    X2_ragged = RaggedDiagrams.from_padded(X2)
+    dd = PairwiseDistance(metric=metric, metric_params=metric_params,
+                          order=None, n_jobs=n_jobs)
+    X_res = dd.fit(np.asarray(X1_ragged)).transform(np.asarray(X2_ragged))
+    assert_almost_equal(dd.fit(X1_ragged).transform(X2_ragged), X_res)
+
+
+@pytest.mark.parametrize(('metric', 'metric_params'), parameters_distance)
+@pytest.mark.parametrize('ragged', [False, True])
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_dd_transform_symmetric(metric, metric_params, ragged, n_jobs):
+    """Test that distances between the diagrams seen in fit, which are
+    computed only once per pair, are the same as when computed in full."""
+    X = RaggedDiagrams.from_padded(X1) if ragged else X1
+    dd = PairwiseDistance(metric=metric, metric_params=metric_params,
+                          order=None, n_jobs=n_jobs)
+    X_res = dd.fit_transform(X)
+    X_exp = dd.fit(X[::-1]).transform(X)[:, ::-1]
+    assert_almost_equal(X_res, X_exp)
+    assert_almost_equal(X_res, np.transpose(X_res, (1, 0, 2)))
+
+
 parameters_amplitude = [
     ('bottleneck', None),
     ('wasserstein', {'p': 2}),
@@ -291,7 +345,9 @@ parameters_amplitude = [
     ('persistence_image',
      {'p': 2.1, 'sigma': 0.5, 'n_bins': 10}),
     ('persistence_image',
-     {'p': 2.1, 'sigma': 0.5, 'n_bins': 10, 'weight_function': lambda x: x})
+     {'p': 2.1, 'sigma': 0.5, 'n_bins': 10, 'weight_function': lambda x: x}),
+    ('sliced_wasserstein', {'n_directions': 5}),
+    ('heat_closed_form', {'sigma': 0.5})
     ]
 
 
@@ -313,6 +369,16 @@ def test_da_transform(metric, metric_params, order, n_jobs):
     assert X_res.shape == (X2.shape[0], n_expected_columns)
 
 
+@pytest.mark.parametrize(('metric', 'metric_params'), parameters_amplitude)
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_da_transform_ragged(metric, metric_params, n_jobs):
+    X1_ragged = RaggedDiagrams.from_padded(X1)
+    X2_ragged = RaggedDiagrams.from_padded(X2)
+    da = Amplitude(metric=metric, metric_params=metric_params, n_jobs=n_jobs)
+    X_res = da.fit(np.asarray(X1_ragged)).transform(np.asarray(X2_ragged))
+    assert_almost_equal(da.fit(X1_ragged).transform(X2_ragged), X_res)
+
+
 @pytest.mark.parametrize(('metric', 'metric_params', 'order'),
                          [('bottleneck', None, None)])
 @pytest.mark.parametrize('n_jobs', [1, 2, -1])
@@ -323,6 +389,93 @@ def test_da_transform_bottleneck(metric, metric_params, order, n_jobs):
     assert_almost_equal(X_bottleneck_res, X_bottleneck_res_exp)
 
 
+def test_sliced_wasserstein_definition():
+    """Test that sliced Wasserstein distances and amplitudes agree with a
+    direct implementation of the definition, one pair of diagrams at a
+    time."""
+    n_directions = 7
+    thetas = np.linspace(-np.pi / 2, np.pi / 2, n_directions + 1)[:-1]
+    lines = np.stack([np.cos(thetas), np.sin(thetas)])
+
+    def sliced_wasserstein(diagram_1, diagram_2):
+        diagonal_1, diagonal_2 = [
+            np.repeat(np.mean(diagram, axis=1, keepdims=True), 2, axis=1)
+            for diagram in [diagram_1, diagram_2]
+            ]
+        projections_1 = np.sort(np.concatenate([diagram_1, diagonal_2]) @
+                                lines, axis=0)
+        projections_2 = np.sort(np.concatenate([diagram_2, diagonal_1]) @
+                                lines, axis=0)
+        return np.mean(np.sum(np.abs(projections_1 - projections_2), axis=0))
+
+    metric_params = {'n_directions': n_directions}
+    homology_dimensions = np.unique(X1[0, :, 2])
+    subdiagrams_1, subdiagrams_2 = [
+        [[diagram[diagram[:, 2] == dim, :2] for dim in homology_dimensions]
+         for diagram in X] for X in [X1, X2]
+        ]
+
+    X_res = PairwiseDistance(metric='sliced_wasserstein',
+                             metric_params=metric_params,
+                             order=None).fit(X1).transform(X2)
+    X_exp = np.array([[[sliced_wasserstein(subdiagram_2, subdiagram_1)
+                        for subdiagram_2, subdiagram_1 in zip(diagram_2,
+                                                              diagram_1)]
+                       for diagram_1 in subdiagrams_1]
+                      for diagram_2 in subdiagrams_2])
+    assert_almost_equal(X_res, X_exp)
+
+    X_res = Amplitude(metric='sliced_wasserstein',
+                      metric_params=metric_params).fit_transform(X1)
+    X_exp = np.array([[sliced_wasserstein(subdiagram, np.zeros((0, 2)))
+                       for subdiagram in diagram]
+                      for diagram in subdiagrams_1])
+    assert_almost_equal(X_res, X_exp)
+
+
+def test_heat_closed_form_consistent():
+    """Test that distances, kernel values and amplitudes for the
+    'heat_closed_form' metric agree with one another, and with distances and
+    amplitudes for the 'heat' metric on a fine grid."""
+    metric_params = {'sigma': 0.5}
+    kernels = PairwiseDistance(
+        metric='heat_closed_form', metric_params={**metric_params,
+                                                  'kernel': True},
+        order=None).fit(X1).transform(X2)
+    distances = PairwiseDistance(
+        metric='heat_closed_form', metric_params=metric_params, order=None
+        ).fit(X1).transform(X2)
+    amplitudes_1, amplitudes_2 = [
+        Amplitude(metric='heat_closed_form',
+                  metric_params=metric_params).fit_transform(X)
+        for X in [X1, X2]
+        ]
+    assert_almost_equal(distances ** 2,
+                        amplitudes_2[:, None] ** 2 + amplitudes_1 ** 2 -
+                        2 * kernels)
+
+    # The grid must extend well beyond the points for 'heat' to be accurate,
+    # hence the trivial points at 0 and 8
+    X = np.array([[[2., 3., 0], [3.5, 5., 0], [0., 0., 0], [8., 8., 0]],
+                  [[2.5, 3., 0], [4., 6., 0], [0., 0., 0], [0., 0., 0]],
+                  [[3., 5.5, 0], [5., 5., 0], [0., 0., 0], [0., 0., 0]]])
+    distances = PairwiseDistance(
+        metric='heat_closed_form', metric_params=metric_params
+        ).fit_transform(X)
+    amplitudes = Amplitude(
+        metric='heat_closed_form', metric_params=metric_params
+        ).fit_transform(X)
+    metric_params_grid = {**metric_params, 'n_bins': 401, 'p': 2.}
+    distances_grid = PairwiseDistance(
+        metric='heat', metric_params=metric_params_grid
+        ).fit_transform(X)
+    amplitudes_grid = Amplitude(
+        metric='heat', metric_params=metric_params_grid
+        ).fit_transform(X)
+    assert np.allclose(distances_grid, distances, rtol=0.02)
+    assert np.allclose(amplitudes_grid, amplitudes, rtol=0.02)
+
+
 @pytest.mark.parametrize('order', [None, 2.])
 @pytest.mark.parametrize('transformer_cls', [PairwiseDistance, Amplitude])
 @pytest.mark.parametrize('Xnew', [X1, X2])
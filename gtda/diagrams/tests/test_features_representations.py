@@ -11,7 +11,8 @@ from numpy.testing import assert_almost_equal
 from sklearn.exceptions import NotFittedError
 
 from gtda.diagrams import PersistenceEntropy, BettiCurve, \
-    PersistenceLandscape, HeatKernel, PersistenceImage, Silhouette
+    PersistenceLandscape, HeatKernel, PersistenceImage, Silhouette, \
+    RaggedDiagrams
 
 pio.renderers.default = 'plotly_mimetype'
 
@@ -82,6 +83,41 @@ def test_pe_transform(n_jobs):
     assert_almost_equal(pe_normalize.fit_transform(X), diagram_res)
 
 
+X_uneven = np.array([
+    [[0., 1., 0.], [2., 3., 0.], [4., 6., 1.], [2., 6., 1.], [1., 5., 1.]],
+    [[0., 2., 0.], [0., 0., 0.], [3., 4., 1.], [3., 3., 1.], [3., 3., 1.]],
+    [[1., 1., 0.], [1., 1., 0.], [2., 2., 1.], [2., 2., 1.], [2., 2., 1.]]
+    ])
+
+
+@pytest.mark.parametrize('transformer',
+                         [PersistenceEntropy(),
+                          PersistenceEntropy(normalize=True),
+                          BettiCurve(n_bins=20),
+                          PersistenceLandscape(n_layers=2, n_bins=20)])
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_transform_ragged(transformer, n_jobs):
+    transformer.set_params(n_jobs=n_jobs)
+    X_ragged = RaggedDiagrams.from_padded(X_uneven)
+    X_res = transformer.fit_transform(np.asarray(X_ragged))
+    assert_almost_equal(transformer.fit_transform(X_ragged), X_res)
+
+
+@pytest.mark.parametrize('transformer',
+                         [PersistenceLandscape(n_layers=2, n_bins=20),
+                          HeatKernel(sigma=1, n_bins=20),
+                          PersistenceImage(sigma=1, n_bins=20),
+                          Silhouette(n_bins=20)])
+@pytest.mark.parametrize('ragged', [False, True])
+def test_transform_float32(transformer, ragged):
+    X_32 = X_uneven.astype(np.float32)
+    X_res = transformer.fit_transform(X_32 if not ragged
+                                      else RaggedDiagrams.from_padded(X_32))
+    assert X_res.dtype == np.float32
+    assert_almost_equal(X_res, transformer.fit_transform(X_uneven),
+                        decimal=4)
+
+
 @pytest.mark.parametrize('n_bins', list(range(10, 51, 10)))
 @pytest.mark.parametrize('n_jobs', [1, 2, -1])
 def test_bc_transform_shape(n_bins, n_jobs):
@@ -90,6 +126,24 @@ def test_bc_transform_shape(n_bins, n_jobs):
     assert X_res.shape == (1, bc._n_dimensions, n_bins)
 
 
+@pytest.mark.parametrize('ragged', [False, True])
+def test_bc_transform_definition(ragged):
+    """Check that Betti curves count the pairs [b, d] with b <= t < d at each
+    sampled filtration value t, in a compact integer dtype."""
+    bc = BettiCurve(n_bins=15).fit(X_uneven)
+    X_res = bc.transform(X_uneven if not ragged
+                         else RaggedDiagrams.from_padded(X_uneven))
+    assert X_res.dtype == np.int8
+
+    for i, dim in enumerate(bc.homology_dimensions_):
+        sampling = bc.samplings_[dim]
+        for diagram, curve in zip(X_uneven, X_res[:, i]):
+            diagram = diagram[diagram[:, 2] == dim]
+            alive = (sampling[:, None] >= diagram[:, 0]) & \
+                (sampling[:, None] < diagram[:, 1])
+            assert np.array_equal(curve, np.sum(alive, axis=1))
+
+
 @pytest.mark.parametrize('n_bins', list(range(10, 51, 10)))
 @pytest.mark.parametrize('n_layers', list(range(1, 10)))
 @pytest.mark.parametrize('n_jobs', [1, 2, -1])
@@ -7,7 +7,7 @@ import pytest
 from numpy.testing import assert_almost_equal
 from sklearn.exceptions import NotFittedError
 
-from gtda.diagrams import ForgetDimension, Scaler, Filtering
+from gtda.diagrams import ForgetDimension, Scaler, Filtering, RaggedDiagrams
 
 pio.renderers.default = 'plotly_mimetype'
 plotly_params = {"trace": {"marker_size": 20},
@@ -320,3 +320,29 @@ def test_filt_transform(epsilon):
 
     lifetimes_res_1 = X_res_1[:, :, 1] - X_res_1[:, :, 0]
     assert not ((lifetimes_res_1 > 0.) & (lifetimes_res_1 <= epsilon)).any()
+
+
+def test_filt_transform_ragged():
+    filt = Filtering(epsilon=0.1, homology_dimensions=(1, 2))
+    X_ragged = RaggedDiagrams.from_padded(X_1)
+    X_res = filt.fit_transform(X_ragged)
+    assert isinstance(X_res, RaggedDiagrams)
+
+    X_res_padded = filt.fit_transform(X_1)
+    for diagram, diagram_padded in zip(np.asarray(X_res), X_res_padded):
+        diagram, diagram_padded = [
+            np.unique(dgm[dgm[:, 0] != dgm[:, 1]], axis=0)
+            for dgm in [diagram, diagram_padded]
+            ]
+        assert_almost_equal(diagram, diagram_padded)
+
+
+@pytest.mark.parametrize(('metric', 'metric_params'), parameters_sc)
+def test_sc_transform_ragged(metric, metric_params):
+    X_ragged = RaggedDiagrams.from_padded(X_1)
+    X_padded = np.asarray(X_ragged)
+    sc = Scaler(metric=metric, metric_params=metric_params)
+    X_res = sc.fit_transform(X_ragged)
+    assert isinstance(X_res, RaggedDiagrams)
+    assert_almost_equal(np.asarray(X_res), sc.fit_transform(X_padded))
+    assert_almost_equal(sc.inverse_transform(X_res).pairs, X_ragged.pairs)
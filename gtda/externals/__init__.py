@@ -1,17 +1,23 @@
 """"Python bindings for external dependencies."""
 # License: GNU AGPLv3
 
-from .modules.gtda_bottleneck import bottleneck_distance
-from .modules.gtda_wasserstein import wasserstein_distance
+from .modules.gtda_bottleneck import bottleneck_distance, \
+    bottleneck_distance_matrix
+from .modules.gtda_wasserstein import wasserstein_distance, \
+    wasserstein_distance_matrix
 from .modules.gtda_collapser import flag_complex_collapse_edges_dense, \
     flag_complex_collapse_edges_sparse, flag_complex_collapse_edges_coo
-from .python import ripser, SparseRipsComplex, CechComplex, CubicalComplex, \
-    PeriodicCubicalComplex, SimplexTree, WitnessComplex, StrongWitnessComplex
+from .python import ripser, ripser_batch, SparseRipsComplex, CechComplex, \
+    CubicalComplex, PeriodicCubicalComplex, SimplexTree, WitnessComplex, \
+    StrongWitnessComplex
 
 __all__ = [
     'bottleneck_distance',
     'wasserstein_distance',
+    'bottleneck_distance_matrix',
+    'wasserstein_distance_matrix',
     'ripser',
+    'ripser_batch',
     'SparseRipsComplex',
     'CechComplex',
     'CubicalComplex',
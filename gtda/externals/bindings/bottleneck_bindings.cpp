@@ -19,6 +19,8 @@ typedef SSIZE_T ssize_t;
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include "distance_matrix.h"
+
 double bottleneck_distance(std::vector<std::pair<double, double>>& dgm1,
                            std::vector<std::pair<double, double>>& dgm2,
                            double delta) {
@@ -35,5 +37,22 @@ PYBIND11_MODULE(gtda_bottleneck, m) {
   using namespace pybind11::literals;
   m.def("bottleneck_distance", &bottleneck_distance, "dgm1"_a, "dgm2"_a,
         py::arg("delta") = 0.01,
-        "compute bottleneck distance between two persistence diagrams");
+        "compute bottleneck distance between two persistence diagrams",
+        py::call_guard<py::gil_scoped_release>());
+  m.def("bottleneck_distance_matrix",
+        [](const Pairs& pairs_1, const Offsets& offsets_1,
+           const Pairs& pairs_2, const Offsets& offsets_2, double delta,
+           bool symmetric, int n_threads) {
+          return distance_matrix(
+              pairs_1, offsets_1, pairs_2, offsets_2, symmetric, n_threads,
+              [delta](Diagram& dgm1, Diagram& dgm2) {
+                return bottleneck_distance(dgm1, dgm2, delta);
+              });
+        },
+        "pairs_1"_a, "offsets_1"_a, "pairs_2"_a, "offsets_2"_a,
+        py::arg("delta") = 0.01, py::arg("symmetric") = false,
+        py::arg("n_threads") = 1,
+        "compute bottleneck distances between all persistence diagrams of "
+        "two collections, the pairs of diagram i being the rows of pairs "
+        "from offsets[i] to offsets[i + 1]");
 }
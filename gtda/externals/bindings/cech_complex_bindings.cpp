@@ -61,6 +61,7 @@ PYBIND11_MODULE(gtda_cech_complex, m) {
                     Simplex_tree::Filtration_value>(),
            "points"_a, "max_radius"_a)
       .def("create_simplex_tree",
-           &Gudhi::cech_complex::Cech_complex_interface::create_simplex_tree);
+           &Gudhi::cech_complex::Cech_complex_interface::create_simplex_tree,
+           py::call_guard<py::gil_scoped_release>());
   m.doc() = "GUDHI Cech complex functions interfacing";
 }
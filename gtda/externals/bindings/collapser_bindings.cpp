@@ -6,8 +6,10 @@
 #include <gudhi/Flag_complex_edge_collapser.h>
 
 #include <pybind11/eigen.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
-#include <pybind11/stl.h>
+
+#include <stdexcept>
 
 namespace py = pybind11;
 
@@ -22,26 +24,37 @@ using Filtered_edge_list = std::vector<Filtered_edge>;
 using Sparse_matrix = Eigen::SparseMatrix<Filtration_value>;
 using triplet_vec = Eigen::Triplet<Filtration_value>;
 
-/* COO data input types */
-using Row_idx = std::vector<Vertex_handle>;
-using Col_idx = std::vector<Vertex_handle>;
-using Filtration_values = std::vector<Filtration_value>;
-using COO_data = std::tuple<Row_idx, Col_idx, Filtration_values>;
-
-/* Dense matrix input types */
-using Distance_matrix = std::vector<std::vector<Filtration_value>>;
+/* COO and dense input buffers are read in place: C-contiguous arrays of the
+ * right dtype are not copied, anything else is converted once by pybind11.
+ * They are taken by reference so that no Python reference count is touched
+ * while the GIL is released */
+using Indices =
+    py::array_t<Vertex_handle, py::array::c_style | py::array::forcecast>;
+using Filtration_values =
+    py::array_t<Filtration_value, py::array::c_style | py::array::forcecast>;
 
 /* constants */
 const Filtration_value filtration_max =
     std::numeric_limits<Filtration_value>::infinity();
 
-/* Generates COO sparse matrix data from a filtered edge list
- * This function is called after computing edge collapse
+/* Wraps a vector in a NumPy array which takes ownership of its buffer */
+template <typename T>
+static py::array_t<T> to_array(std::vector<T>&& vec) {
+  auto* owned = new std::vector<T>(std::move(vec));
+  py::capsule owner(owned, [](void* ptr) {
+    delete static_cast<std::vector<T>*>(ptr);
+  });
+  return py::array_t<T>(owned->size(), owned->data(), owner);
+}
+
+/* Generates COO sparse matrix data, as a tuple of NumPy arrays, from a
+ * filtered edge list. This function is called after computing edge collapse,
+ * with the GIL held
  */
-static COO_data gen_coo_matrix(Filtered_edge_list& collapsed_edges) {
-  Row_idx row;
-  Col_idx col;
-  Filtration_values data;
+static py::tuple gen_coo_matrix(Filtered_edge_list&& collapsed_edges) {
+  std::vector<Vertex_handle> row;
+  std::vector<Vertex_handle> col;
+  std::vector<Filtration_value> data;
 
   /* allocate memory beforehand */
   row.reserve(collapsed_edges.size());
@@ -53,8 +66,10 @@ static COO_data gen_coo_matrix(Filtered_edge_list& collapsed_edges) {
     col.push_back(std::get<1>(t));
     data.push_back(std::get<2>(t));
   }
+  collapsed_edges = Filtered_edge_list();
 
-  return COO_data(row, col, data);
+  return py::make_tuple(to_array(std::move(row)), to_array(std::move(col)),
+                        to_array(std::move(data)));
 }
 
 PYBIND11_MODULE(gtda_collapser, m) {
@@ -63,66 +78,96 @@ PYBIND11_MODULE(gtda_collapser, m) {
   m.doc() = "Collapser bindings for GUDHI implementation";
   m.def("flag_complex_collapse_edges_sparse",
         [](Sparse_matrix& sm, Filtration_value thresh = filtration_max) {
-          Filtered_edge_list graph;
-
-          /* Convert from sparse format to Filtered_edge_list */
-          /* Applying threshold to the input data */
-          int size = sm.outerSize();
-          for (size_t k = 0; k < size; ++k)
-            for (Eigen::SparseMatrix<Filtration_value>::InnerIterator it(sm, k);
-                 it; ++it) {
-              if (it.value() <= thresh)
-                graph.push_back(Filtered_edge(it.row(), it.col(), it.value()));
-            }
-
-          /* Start collapser */
-          auto vec_triples =
-              Gudhi::collapse::flag_complex_collapse_edges(graph);
-
-          return gen_coo_matrix(vec_triples);
+          Filtered_edge_list collapsed_edges;
+          {
+            py::gil_scoped_release release;
+            Filtered_edge_list graph;
+
+            /* Convert from sparse format to Filtered_edge_list */
+            /* Applying threshold to the input data */
+            int size = sm.outerSize();
+            for (size_t k = 0; k < size; ++k)
+              for (Eigen::SparseMatrix<Filtration_value>::InnerIterator it(sm,
+                                                                           k);
+                   it; ++it) {
+                if (it.value() <= thresh)
+                  graph.push_back(
+                      Filtered_edge(it.row(), it.col(), it.value()));
+              }
+
+            /* Start collapser */
+            collapsed_edges =
+                Gudhi::collapse::flag_complex_collapse_edges(graph);
+          }
+
+          return gen_coo_matrix(std::move(collapsed_edges));
         },
         "sm"_a, "thresh"_a = filtration_max,
         "Implicitly constructs a flag complex from edges, "
         "collapses edges while preserving the persistent homology");
 
   m.def("flag_complex_collapse_edges_coo",
-        [](Row_idx& row, Col_idx& col, Filtration_values& data,
+        [](const Indices& row, const Indices& col,
+           const Filtration_values& data,
            Filtration_value thresh = filtration_max) {
-          Filtered_edge_list graph;
-
-          /* Convert from COO input format to Filtered_edge_list */
-          /* Applying threshold to the input data */
-          int size = data.size();
-          for (size_t k = 0; k < size; ++k)
-            if (data[k] <= thresh)
-              graph.push_back(Filtered_edge(row[k], col[k], data[k]));
-
-          /* Start collapser */
-          auto vec_triples =
-              Gudhi::collapse::flag_complex_collapse_edges(graph);
-
-          return gen_coo_matrix(vec_triples);
+          const auto size = static_cast<size_t>(data.size());
+          if (static_cast<size_t>(row.size()) != size ||
+              static_cast<size_t>(col.size()) != size)
+            throw std::invalid_argument(
+                "row, column and data must have the same length");
+          const Vertex_handle* row_ptr = row.data();
+          const Vertex_handle* col_ptr = col.data();
+          const Filtration_value* data_ptr = data.data();
+
+          Filtered_edge_list collapsed_edges;
+          {
+            py::gil_scoped_release release;
+            Filtered_edge_list graph;
+
+            /* Convert from COO input format to Filtered_edge_list */
+            /* Applying threshold to the input data */
+            for (size_t k = 0; k < size; ++k)
+              if (data_ptr[k] <= thresh)
+                graph.push_back(
+                    Filtered_edge(row_ptr[k], col_ptr[k], data_ptr[k]));
+
+            /* Start collapser */
+            collapsed_edges =
+                Gudhi::collapse::flag_complex_collapse_edges(graph);
+          }
+
+          return gen_coo_matrix(std::move(collapsed_edges));
         },
         "row"_a, "column"_a, "data"_a, "thresh"_a = filtration_max,
         "Implicitly constructs a flag complex from edges, "
         "collapses edges while preserving the persistent homology");
 
   m.def("flag_complex_collapse_edges_dense",
-        [](Distance_matrix& dm, Filtration_value thresh = filtration_max) {
-          Filtered_edge_list graph;
-
-          /* Convert from dense format to Filtered edge list */
-          /* Applying threshold to the input data */
-          for (size_t i = 0; i < dm.size(); i++)
-            for (size_t j = 0; j < dm[i].size(); j++)
-              if (j > i && (dm[i][j] <= thresh))
-                graph.push_back(Filtered_edge(i, j, dm[i][j]));
-
-          /* Start collapser */
-          auto vec_triples =
-              Gudhi::collapse::flag_complex_collapse_edges(graph);
-
-          return gen_coo_matrix(vec_triples);
+        [](const Filtration_values& dm,
+           Filtration_value thresh = filtration_max) {
+          if (dm.ndim() != 2 || dm.shape(0) != dm.shape(1))
+            throw std::invalid_argument("dm must be a square 2D array");
+          const auto n = static_cast<size_t>(dm.shape(0));
+          const Filtration_value* dm_ptr = dm.data();
+
+          Filtered_edge_list collapsed_edges;
+          {
+            py::gil_scoped_release release;
+            Filtered_edge_list graph;
+
+            /* Convert from dense format to Filtered edge list */
+            /* Applying threshold to the upper triangle of the input data */
+            for (size_t i = 0; i < n; i++)
+              for (size_t j = i + 1; j < n; j++)
+                if (dm_ptr[i * n + j] <= thresh)
+                  graph.push_back(Filtered_edge(i, j, dm_ptr[i * n + j]));
+
+            /* Start collapser */
+            collapsed_edges =
+                Gudhi::collapse::flag_complex_collapse_edges(graph);
+          }
+
+          return gen_coo_matrix(std::move(collapsed_edges));
         },
         "dm"_a, "thresh"_a = filtration_max,
         "Implicitly constructs a flag complex from edges, "
@@ -0,0 +1,96 @@
+/******************************************************************************
+ * Description:      Distance matrices between two collections of persistence
+ *                   diagrams, shared by the hera bindings
+ * License:          Apache 2.0
+ *****************************************************************************/
+
+#pragma once
+
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <stdexcept>
+#include <utility>
+#include <vector>
+
+namespace py = pybind11;
+
+/* A collection of diagrams is a flat (n_pairs, 2) array of birth-death pairs
+ * together with offsets: the pairs of diagram i are the rows of the flat
+ * array from offsets[i] to offsets[i + 1]. Offsets need not start at zero, so
+ * that consecutive diagrams of a larger collection are passed as a slice of
+ * its offsets without copying its pairs */
+using Pairs = py::array_t<double, py::array::c_style | py::array::forcecast>;
+using Offsets =
+    py::array_t<int64_t, py::array::c_style | py::array::forcecast>;
+using Diagram = std::vector<std::pair<double, double>>;
+
+static void check_collection(const Pairs& pairs, const Offsets& offsets) {
+  if (pairs.ndim() != 2 || pairs.shape(1) != 2)
+    throw std::invalid_argument("pairs must be of shape (n_pairs, 2)");
+  if (offsets.ndim() != 1 || offsets.shape(0) < 1)
+    throw std::invalid_argument("offsets must be a non-empty 1D array");
+  const int64_t* starts = offsets.data();
+  const int64_t n_diagrams = offsets.shape(0) - 1;
+  for (int64_t i = 0; i < n_diagrams; ++i)
+    if (starts[i] < 0 || starts[i] > starts[i + 1])
+      throw std::invalid_argument(
+          "offsets must be non-negative and non-decreasing");
+  if (starts[n_diagrams] > pairs.shape(0))
+    throw std::invalid_argument(
+        "offsets must not exceed the number of pairs");
+}
+
+/* Off-diagonal pairs of each diagram in a collection. Pairs with equal birth
+ * and death, e.g. padding, do not change hera's distances and are dropped */
+static std::vector<Diagram> to_diagrams(const Pairs& pairs,
+                                        const Offsets& offsets) {
+  const double* data = pairs.data();
+  const int64_t* starts = offsets.data();
+  std::vector<Diagram> diagrams(offsets.shape(0) - 1);
+  for (std::size_t i = 0; i < diagrams.size(); ++i) {
+    diagrams[i].reserve(starts[i + 1] - starts[i]);
+    for (int64_t k = starts[i]; k < starts[i + 1]; ++k)
+      if (data[2 * k] != data[2 * k + 1])
+        diagrams[i].emplace_back(data[2 * k], data[2 * k + 1]);
+  }
+  return diagrams;
+}
+
+/* (n_diagrams_1, n_diagrams_2) array of `distance` between all diagrams of
+ * the first and of the second collection, computed with the GIL released and
+ * one pair of diagrams per OpenMP iteration. If `symmetric`, the second
+ * collection is taken to be the first one and only the strict upper triangle
+ * is computed, the rest of the array being zero */
+template <typename Distance>
+py::array_t<double> distance_matrix(const Pairs& pairs_1,
+                                    const Offsets& offsets_1,
+                                    const Pairs& pairs_2,
+                                    const Offsets& offsets_2, bool symmetric,
+                                    int n_threads, Distance distance) {
+  check_collection(pairs_1, offsets_1);
+  if (!symmetric) check_collection(pairs_2, offsets_2);
+  const int64_t n_rows = offsets_1.shape(0) - 1;
+  const int64_t n_columns = symmetric ? n_rows : offsets_2.shape(0) - 1;
+  py::array_t<double> matrix({n_rows, n_columns});
+  double* out = matrix.mutable_data();
+  {
+    py::gil_scoped_release release;
+    auto diagrams_1 = to_diagrams(pairs_1, offsets_1);
+    auto diagrams_2 =
+        symmetric ? std::vector<Diagram>() : to_diagrams(pairs_2, offsets_2);
+    auto& columns = symmetric ? diagrams_1 : diagrams_2;
+    std::fill(out, out + n_rows * n_columns, 0.);
+#ifdef _OPENMP
+#pragma omp parallel for schedule(dynamic) collapse(2) num_threads(n_threads)
+#endif
+    for (int64_t i = 0; i < n_rows; ++i)
+      for (int64_t j = 0; j < n_columns; ++j)
+        if (!symmetric || j > i)
+          out[i * n_columns + j] = distance(diagrams_1[i], columns[j]);
+  }
+  return matrix;
+}
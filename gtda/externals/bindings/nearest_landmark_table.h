@@ -0,0 +1,55 @@
+/******************************************************************************
+ * Description:      NumPy input of gudhi's witness complex interfaces
+ * License:          Apache 2.0
+ *****************************************************************************/
+
+#pragma once
+
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+
+#include <cstddef>
+#include <stdexcept>
+#include <utility>
+#include <vector>
+
+namespace py = pybind11;
+
+/* The nearest landmark table can also be passed as two 2D arrays of shape
+ * (n_witnesses, n_neighbors), holding the indices of the nearest landmarks to
+ * each witness and the corresponding (squared) distances, sorted by distance.
+ * They are read in place and converted with the GIL released, instead of
+ * going through Python lists of pairs */
+using Landmark_indices =
+    py::array_t<std::size_t, py::array::c_style | py::array::forcecast>;
+using Landmark_distances =
+    py::array_t<double, py::array::c_style | py::array::forcecast>;
+using Nearest_landmark_table =
+    std::vector<std::vector<std::pair<std::size_t, double>>>;
+
+inline Nearest_landmark_table to_nearest_landmark_table(
+    const Landmark_indices& indices, const Landmark_distances& distances) {
+  if (indices.ndim() != 2 || distances.ndim() != 2 ||
+      indices.shape(0) != distances.shape(0) ||
+      indices.shape(1) != distances.shape(1))
+    throw std::invalid_argument(
+        "Landmark indices and distances must be 2D arrays of the same "
+        "shape");
+
+  const auto n_witnesses = indices.shape(0);
+  const auto n_neighbors = indices.shape(1);
+  const std::size_t* idx = indices.data();
+  const double* dist = distances.data();
+  Nearest_landmark_table table(n_witnesses);
+  {
+    py::gil_scoped_release release;
+    for (decltype(n_witnesses) w = 0; w < n_witnesses; ++w) {
+      auto& row = table[w];
+      row.reserve(n_neighbors);
+      for (decltype(n_neighbors) k = 0; k < n_neighbors; ++k)
+        row.emplace_back(idx[w * n_neighbors + k],
+                         dist[w * n_neighbors + k]);
+    }
+  }
+  return table;
+}
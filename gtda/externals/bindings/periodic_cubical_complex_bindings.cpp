@@ -16,6 +16,8 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include "persistence_array.h"
+
 namespace py = pybind11;
 
 PYBIND11_MODULE(gtda_periodic_cubical_complex, m) {
@@ -49,9 +51,12 @@ PYBIND11_MODULE(gtda_periodic_cubical_complex, m) {
                        double>>*,
            bool>())
       .def("compute_persistence",
-           &Persistent_cohomology_interface_inst::compute_persistence)
+           &Persistent_cohomology_interface_inst::compute_persistence,
+           py::call_guard<py::gil_scoped_release>())
       .def("get_persistence",
            &Persistent_cohomology_interface_inst::get_persistence)
+      .def("get_persistence_array",
+           &persistence_array<Persistent_cohomology_interface_inst>)
       .def("betti_numbers",
            &Persistent_cohomology_interface_inst::betti_numbers)
       .def("persistent_betti_numbers",
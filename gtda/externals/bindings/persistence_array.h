@@ -0,0 +1,39 @@
+/******************************************************************************
+ * Description:      NumPy output of gudhi's persistent cohomology interfaces
+ * License:          Apache 2.0
+ *****************************************************************************/
+
+#pragma once
+
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+
+#include <cstddef>
+#include <vector>
+
+namespace py = pybind11;
+
+/* Persistence of an interface on which `compute_persistence` was called, as a
+ * C-contiguous (n_pairs, 3) array of triples [dimension, birth, death], in the
+ * order of `get_persistence`. The triples are written with the GIL released,
+ * into a buffer owned by the returned array, so that no Python object is
+ * created per pair */
+template <typename Persistent_cohomology_interface>
+py::array_t<double> persistence_array(Persistent_cohomology_interface& pcoh) {
+  auto* triples = new std::vector<double>();
+  {
+    py::gil_scoped_release release;
+    const auto persistence = pcoh.get_persistence();
+    triples->reserve(3 * persistence.size());
+    for (const auto& pair : persistence) {
+      triples->push_back(pair.first);
+      triples->push_back(pair.second.first);
+      triples->push_back(pair.second.second);
+    }
+  }
+  py::capsule owner(triples, [](void* ptr) {
+    delete static_cast<std::vector<double>*>(ptr);
+  });
+  const std::vector<std::size_t> shape{triples->size() / 3, 3};
+  return py::array_t<double>(shape, triples->data(), owner);
+}
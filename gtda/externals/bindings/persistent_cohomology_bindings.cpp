@@ -7,6 +7,8 @@
 #include <Persistent_cohomology_interface.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+
+#include "persistence_array.h"
 #include "cubical_complex_bindings.cpp"
 
 namespace py = pybind11;
@@ -21,9 +23,12 @@ PYBIND11_MODULE(gtda_persistent_cohomology, m) {
       .def(py::init<Gudhi::cubical_complex::Cubical_complex_interface<>*,
                     bool>())
       .def("compute_persistence",
-           &Persistent_cohomology_interface_inst::compute_persistence)
+           &Persistent_cohomology_interface_inst::compute_persistence,
+           py::call_guard<py::gil_scoped_release>())
       .def("get_persistence",
            &Persistent_cohomology_interface_inst::get_persistence)
+      .def("get_persistence_array",
+           &persistence_array<Persistent_cohomology_interface_inst>)
       .def("betti_numbers",
            &Persistent_cohomology_interface_inst::betti_numbers)
       .def("persistent_betti_numbers",
@@ -15,14 +15,19 @@ PYBIND11_MODULE(gtda_sparse_rips_complex, m) {
       m, "Rips_complex_interface")
       .def(py::init<>())
       .def("init_points",
-           &Gudhi::rips_complex::Rips_complex_interface::init_points)
+           &Gudhi::rips_complex::Rips_complex_interface::init_points,
+           py::call_guard<py::gil_scoped_release>())
       .def("init_matrix",
-           &Gudhi::rips_complex::Rips_complex_interface::init_matrix)
+           &Gudhi::rips_complex::Rips_complex_interface::init_matrix,
+           py::call_guard<py::gil_scoped_release>())
       .def("init_points_sparse",
-           &Gudhi::rips_complex::Rips_complex_interface::init_points_sparse)
+           &Gudhi::rips_complex::Rips_complex_interface::init_points_sparse,
+           py::call_guard<py::gil_scoped_release>())
       .def("init_matrix_sparse",
-           &Gudhi::rips_complex::Rips_complex_interface::init_matrix_sparse)
+           &Gudhi::rips_complex::Rips_complex_interface::init_matrix_sparse,
+           py::call_guard<py::gil_scoped_release>())
       .def("create_simplex_tree",
-           &Gudhi::rips_complex::Rips_complex_interface::create_simplex_tree);
+           &Gudhi::rips_complex::Rips_complex_interface::create_simplex_tree,
+           py::call_guard<py::gil_scoped_release>());
   m.doc() = "GUDHI Sparse Rips Complex functions interfacing";
 }
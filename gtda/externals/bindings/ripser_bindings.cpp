@@ -7,11 +7,76 @@
 #include <ripser.cpp>
 
 // PYBIND11
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <limits>
+#include <stdexcept>
+#include <vector>
+
 namespace py = pybind11;
 
+/* Input buffers are read in place (ripser does not write to them):
+ * C-contiguous arrays of the right dtype are not copied, anything else is
+ * converted once by pybind11. They are taken by reference so that no Python
+ * reference count is touched while the GIL is released */
+using Distances = py::array_t<float, py::array::c_style | py::array::forcecast>;
+using Indices = py::array_t<int, py::array::c_style | py::array::forcecast>;
+using Points =
+    py::array_t<double, py::array::c_style | py::array::forcecast>;
+using Offsets =
+    py::array_t<int64_t, py::array::c_style | py::array::forcecast>;
+
+/* Wraps a vector in a NumPy array which takes ownership of its buffer */
+template <typename T>
+static py::array_t<T> to_array(std::vector<T>&& vec) {
+  auto* owned = new std::vector<T>(std::move(vec));
+  py::capsule owner(owned, [](void* ptr) {
+    delete static_cast<std::vector<T>*>(ptr);
+  });
+  return py::array_t<T>(owned->size(), owned->data(), owner);
+}
+
+/* Strict upper triangle, in row-major order, of the Euclidean distance matrix
+ * of `n_points` points with `n_dims` coordinates each, stored contiguously
+ * from `points`. This is the layout written by `_condensed_distances` */
+static std::vector<float> condensed_euclidean(const double* points,
+                                              int64_t n_points,
+                                              int64_t n_dims) {
+  std::vector<float> distances;
+  distances.reserve(n_points * (n_points - 1) / 2);
+  for (int64_t i = 0; i < n_points; ++i) {
+    const double* x = points + i * n_dims;
+    for (int64_t j = i + 1; j < n_points; ++j) {
+      const double* y = points + j * n_dims;
+      double sq_distance = 0.;
+      for (int64_t k = 0; k < n_dims; ++k)
+        sq_distance += (x[k] - y[k]) * (x[k] - y[k]);
+      distances.push_back(static_cast<float>(std::sqrt(sq_distance)));
+    }
+  }
+  return distances;
+}
+
+/* Minimum over points of the maximum distance to any other point, above which
+ * the Vietoris-Rips complex is a cone, as in `_enclosing_radius` */
+static float enclosing_radius(const std::vector<float>& distances,
+                              int64_t n_points) {
+  std::vector<float> radii(n_points, 0.f);
+  auto d = distances.begin();
+  for (int64_t i = 0; i < n_points; ++i)
+    for (int64_t j = i + 1; j < n_points; ++j, ++d) {
+      radii[i] = std::max(radii[i], *d);
+      radii[j] = std::max(radii[j], *d);
+    }
+  return n_points ? *std::min_element(radii.begin(), radii.end())
+                  : std::numeric_limits<float>::infinity();
+}
+
 #if defined USE_COEFFICIENTS
 PYBIND11_MODULE(gtda_ripser_coeff, m) {
 #else
@@ -32,23 +97,90 @@ PYBIND11_MODULE(gtda_ripser, m) {
       .def_readwrite("num_edges", &ripserResults::num_edges);
 
   m.def("rips_dm",
-        [](std::vector<float> D, int N, int modulus, int dim_max,
-           float threshold, int do_cocycles) {
+        [](const Distances& D, int N, int modulus, int dim_max, float threshold,
+           int do_cocycles) {
           ripserResults ret =
-              rips_dm(&D[0], N, modulus, dim_max, threshold, do_cocycles);
+              rips_dm(const_cast<float*>(D.data()), N, modulus, dim_max,
+                      threshold, do_cocycles);
           return ret;
         },
         "D"_a, "N"_a, "modulus"_a, "dim_max"_a, "threshold"_a, "do_cocycles"_a,
-        "ripser distance matrix");
+        "ripser distance matrix", py::call_guard<py::gil_scoped_release>());
   m.def("rips_dm_sparse",
-        [](std::vector<int> I, std::vector<int> J, std::vector<float> V,
-           int NEdges, int N, int modulus, int dim_max, float threshold,
-           int do_cocycles) {
+        [](const Indices& I, const Indices& J, const Distances& V, int NEdges,
+           int N, int modulus, int dim_max, float threshold, int do_cocycles) {
           ripserResults ret =
-              rips_dm_sparse(&I[0], &J[0], &V[0], NEdges, N, modulus, dim_max,
-                             threshold, do_cocycles);
+              rips_dm_sparse(const_cast<int*>(I.data()),
+                             const_cast<int*>(J.data()),
+                             const_cast<float*>(V.data()), NEdges, N, modulus,
+                             dim_max, threshold, do_cocycles);
           return ret;
         },
         "I"_a, "J"_a, "V"_a, "NEdges"_a, "N"_a, "modulus"_a, "dim_max"_a,
-        "threshold"_a, "do_cocycles"_a, "ripser sparse distance matrix");
+        "threshold"_a, "do_cocycles"_a, "ripser sparse distance matrix",
+        py::call_guard<py::gil_scoped_release>());
+  m.def("rips_points_batch",
+        [](const Points& X, const Offsets& point_offsets, int modulus,
+           int dim_max, float threshold, int n_threads) {
+          if (X.ndim() != 2 || point_offsets.ndim() != 1 ||
+              point_offsets.shape(0) < 1)
+            throw std::invalid_argument(
+                "X must be a 2D array and point_offsets a non-empty 1D "
+                "array");
+          const int64_t n_samples = point_offsets.shape(0) - 1;
+          const int64_t n_dims = X.shape(1);
+          const int64_t* starts = point_offsets.data();
+          for (int64_t s = 0; s < n_samples; ++s)
+            if (starts[s] < 0 || starts[s] > starts[s + 1])
+              throw std::invalid_argument(
+                  "point_offsets must be non-negative and non-decreasing");
+          if (starts[n_samples] > X.shape(0))
+            throw std::invalid_argument(
+                "point_offsets must not exceed the number of rows of X");
+
+          const double* points = X.data();
+          std::vector<ripserResults> results(n_samples);
+          {
+            py::gil_scoped_release release;
+            /* Each cloud is small, so they are processed one per thread
+             * rather than each being split across threads */
+#ifdef _OPENMP
+#pragma omp parallel for schedule(dynamic) num_threads(n_threads)
+#endif
+            for (int64_t s = 0; s < n_samples; ++s) {
+              const int64_t n_points = starts[s + 1] - starts[s];
+              if (!n_points) continue;  // Empty diagrams in all dimensions
+              auto distances = condensed_euclidean(
+                  points + starts[s] * n_dims, n_points, n_dims);
+              const float thresh =
+                  std::isinf(threshold) ? enclosing_radius(distances, n_points)
+                                        : threshold;
+              results[s] =
+                  rips_dm(distances.data(), static_cast<int>(distances.size()),
+                          modulus, dim_max, thresh, 0);
+            }
+          }
+
+          /* Flatten all diagrams, sample by sample and then by dimension */
+          std::vector<float> pairs;
+          std::vector<int64_t> offsets;
+          offsets.reserve(n_samples * (dim_max + 1) + 1);
+          offsets.push_back(0);
+          for (auto& result : results) {
+            auto& by_dim = result.births_and_deaths_by_dim;
+            for (int dim = 0; dim <= dim_max; ++dim) {
+              if (dim < static_cast<int>(by_dim.size()))
+                pairs.insert(pairs.end(), by_dim[dim].begin(),
+                             by_dim[dim].end());
+              offsets.push_back(pairs.size() / 2);
+            }
+            result = ripserResults();
+          }
+          return py::make_tuple(to_array(std::move(pairs)),
+                                to_array(std::move(offsets)));
+        },
+        "X"_a, "point_offsets"_a, "modulus"_a, "dim_max"_a, "threshold"_a,
+        "n_threads"_a,
+        "ripser on a batch of Euclidean point clouds, whose points are the "
+        "rows of X from point_offsets[i] to point_offsets[i + 1]");
 }
@@ -11,6 +11,8 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include "persistence_array.h"
+
 namespace py = pybind11;
 
 PYBIND11_MODULE(gtda_simplex_tree, m) {
@@ -63,7 +65,8 @@ PYBIND11_MODULE(gtda_simplex_tree, m) {
            })
       .def("get_star", &simplex_tree_interface_inst::get_star)
       .def("get_cofaces", &simplex_tree_interface_inst::get_cofaces)
-      .def("expansion", &simplex_tree_interface_inst::expansion)
+      .def("expansion", &simplex_tree_interface_inst::expansion,
+           py::call_guard<py::gil_scoped_release>())
       .def("remove_maximal_simplex",
            &simplex_tree_interface_inst::remove_maximal_simplex)
       .def("prune_above_filtration",
@@ -78,9 +81,12 @@ PYBIND11_MODULE(gtda_simplex_tree, m) {
       m, "Simplex_tree_persistence_interface")
       .def(py::init<simplex_tree_interface_inst*, bool>())
       .def("compute_persistence",
-           &Persistent_cohomology_interface_inst::compute_persistence)
+           &Persistent_cohomology_interface_inst::compute_persistence,
+           py::call_guard<py::gil_scoped_release>())
       .def("get_persistence",
            &Persistent_cohomology_interface_inst::get_persistence)
+      .def("get_persistence_array",
+           &persistence_array<Persistent_cohomology_interface_inst>)
       .def("betti_numbers",
            &Persistent_cohomology_interface_inst::betti_numbers)
       .def("persistent_betti_numbers",
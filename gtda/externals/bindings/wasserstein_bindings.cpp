@@ -9,6 +9,8 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include "distance_matrix.h"
+
 double wasserstein_distance(const std::vector<std::pair<double, double>>& dgm1,
                             const std::vector<std::pair<double, double>>& dgm2,
                             double q, double delta, double internal_p,
@@ -36,7 +38,31 @@ PYBIND11_MODULE(gtda_wasserstein, m) {
         py::arg("internal_p") = hera::get_infinity<double>(),
         py::arg("initial_eps") = 0., py::arg("eps_factor") = 0.,
         py::arg("max_bids_per_round") = 1,
-        "compute Wasserstein distance between two persistence diagrams");
+        "compute Wasserstein distance between two persistence diagrams",
+        py::call_guard<py::gil_scoped_release>());
+  m.def("wasserstein_distance_matrix",
+        [](const Pairs& pairs_1, const Offsets& offsets_1,
+           const Pairs& pairs_2, const Offsets& offsets_2, double q,
+           double delta, double internal_p, double initial_eps,
+           double eps_factor, int max_bids_per_round, bool symmetric,
+           int n_threads) {
+          return distance_matrix(
+              pairs_1, offsets_1, pairs_2, offsets_2, symmetric, n_threads,
+              [=](Diagram& dgm1, Diagram& dgm2) {
+                return wasserstein_distance(dgm1, dgm2, q, delta, internal_p,
+                                            initial_eps, eps_factor,
+                                            max_bids_per_round);
+              });
+        },
+        "pairs_1"_a, "offsets_1"_a, "pairs_2"_a, "offsets_2"_a,
+        py::arg("q") = 2.0, py::arg("delta") = .01,
+        py::arg("internal_p") = hera::get_infinity<double>(),
+        py::arg("initial_eps") = 0., py::arg("eps_factor") = 0.,
+        py::arg("max_bids_per_round") = 1, py::arg("symmetric") = false,
+        py::arg("n_threads") = 1,
+        "compute Wasserstein distances between all persistence diagrams of "
+        "two collections, the pairs of diagram i being the rows of pairs "
+        "from offsets[i] to offsets[i + 1]");
   m.def("hera_get_infinity", hera::get_infinity<double>,
         "hera infinity is not equal float('inf'), but -1, be careful");
 }
@@ -6,9 +6,12 @@
 #include <Simplex_tree_interface.h>
 #include <Witness_complex_interface.h>
 
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include "nearest_landmark_table.h"
+
 namespace py = pybind11;
 
 PYBIND11_MODULE(gtda_witness_complex, m) {
@@ -16,13 +19,20 @@ PYBIND11_MODULE(gtda_witness_complex, m) {
   using witness_interface_inst =
       Gudhi::witness_complex::Witness_complex_interface;
   py::class_<witness_interface_inst>(m, "Witness_complex_interface")
-      .def(py::init<
-           const std::vector<std::vector<std::pair<std::size_t, double>>>&>())
+      .def(py::init<const Nearest_landmark_table&>())
+      .def(py::init([](const Landmark_indices& indices,
+                       const Landmark_distances& distances) {
+        auto table = to_nearest_landmark_table(indices, distances);
+        py::gil_scoped_release release;
+        return new witness_interface_inst(table);
+      }))
       .def("create_simplex_tree",
            py::overload_cast<simplex_tree_interface_inst*, double>(
-               &witness_interface_inst::create_simplex_tree))
+               &witness_interface_inst::create_simplex_tree),
+           py::call_guard<py::gil_scoped_release>())
       .def("create_simplex_tree",
            py::overload_cast<simplex_tree_interface_inst*, double, std::size_t>(
-               &witness_interface_inst::create_simplex_tree));
+               &witness_interface_inst::create_simplex_tree),
+           py::call_guard<py::gil_scoped_release>());
   m.doc() = "GUDHI Witness Complex functions interfacing";
 }
@@ -1,4 +1,4 @@
-from .ripser_interface import ripser
+from .ripser_interface import ripser, ripser_batch
 from .cubical_complex_interface import CubicalComplex
 from .simplex_tree_interface import SimplexTree
 from .periodic_cubical_complex_interface import PeriodicCubicalComplex
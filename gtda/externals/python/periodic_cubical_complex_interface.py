@@ -79,7 +79,8 @@ class PeriodicCubicalComplex:
         """
         return self.thisptr.dimension()
 
-    def persistence(self, homology_coeff_field=11, min_persistence=0):
+    def persistence(self, homology_coeff_field=11, min_persistence=0,
+                    as_array=False):
         """This function returns the persistence of the complex.
         :param homology_coeff_field: The homology coefficient field. Must be a
             prime number
@@ -89,8 +90,12 @@ class PeriodicCubicalComplex:
             0.0.
             Sets min_persistence to -1.0 to see all values.
         :type min_persistence: float.
-        :returns: list of pairs(dimension, pair(birth, death)) -- the
-            persistence of the complex.
+        :param as_array: If true, the persistence is returned as an ndarray of
+            shape (n_pairs, 3) of triples [dimension, birth, death], written
+            directly by the C++ backend. Default is false.
+        :type as_array: bool
+        :returns: list of pairs(dimension, pair(birth, death)) or ndarray
+            -- the persistence of the complex.
         """
         if self.pcohptr is not None:
             del self.pcohptr
@@ -98,10 +103,12 @@ class PeriodicCubicalComplex:
             self.pcohptr = \
                 Periodic_cubical_complex_persistence_interface(self.thisptr,
                                                                True)
-        persistence_result = []
+        persistence_result = np.empty((0, 3)) if as_array else []
         if self.pcohptr is not None:
             self.pcohptr.compute_persistence(homology_coeff_field,
                                              min_persistence)
+            if as_array:
+                return self.pcohptr.get_persistence_array()
             persistence_result = self.pcohptr.get_persistence()
         return persistence_result
 
@@ -1,8 +1,13 @@
+import os
+from tempfile import mkstemp
 from warnings import warn
 
 import numpy as np
+from joblib import effective_n_jobs
 from scipy import sparse
-from sklearn.metrics.pairwise import pairwise_distances
+from sklearn.metrics.pairwise import pairwise_distances, \
+    pairwise_distances_chunked
+from sklearn.neighbors import NearestNeighbors
 
 from ..modules import gtda_ripser, gtda_ripser_coeff, gtda_collapser
 
@@ -14,7 +19,110 @@ def _lexsort_coo_data(row, col, data):
     return row, col, data
 
 
+def _radius_neighbors_coo(X, thresh, metric="euclidean", n_jobs=None):
+    """Return the strict upper triangle of the sparse matrix of distances
+    between points in the point cloud `X` which are no further than `thresh`
+    apart, in COO format, using a radius neighbours query. Zero distances
+    between distinct points are stored explicitly."""
+    graph = NearestNeighbors(radius=thresh, metric=metric, n_jobs=n_jobs).\
+        fit(X).radius_neighbors_graph(mode="distance").tocoo()
+    mask = graph.row < graph.col
+    return sparse.coo_matrix(
+        (graph.data[mask], (graph.row[mask], graph.col[mask])),
+        shape=graph.shape
+        )
+
+
+def _enclosing_radius(dm):
+    """Return the minimum over points of the maximum distance to any other
+    point, using only the strict upper triangle of the dense distance matrix
+    `dm`. For any threshold at least equal to this value, the Vietoris–Rips
+    complex is a cone."""
+    upper = np.triu(dm, k=1)
+    return np.min(np.maximum(upper.max(axis=1), upper.max(axis=0)))
+
+
+def _condensed_distances(X, metric="euclidean", working_memory=None,
+                         out=None, return_enclosing_radius=False,
+                         n_jobs=None):
+    """Write the strict upper triangle of the distance matrix of `X`, in
+    row-major order, into a float32 array without materializing the square
+    matrix or any index arrays. Optionally, compute the enclosing radius (see
+    :func:`_enclosing_radius`) on the fly.
+
+    Parameters
+    ----------
+    X : ndarray (n_samples, n_features) or ndarray (n_samples, n_samples)
+        Point cloud, or dense distance matrix if `metric` is
+        ``'precomputed'``.
+
+    metric : string or callable, optional, default: ``'euclidean'``
+        The metric to use when calculating distance between instances in a
+        feature array.
+
+    working_memory : int or None, optional, default: ``None``
+        Maximum size in MiB of each block of rows of the distance matrix held
+        in memory at once. ``None`` means using the value of
+        :func:`sklearn.get_config`.
+
+    out : ndarray (n_samples * (n_samples - 1) / 2,) or None, optional, \
+        default: ``None``
+        Float32 array (possibly a :class:`numpy.memmap`) in which to store
+        the result. ``None`` means a new array is allocated.
+
+    return_enclosing_radius : bool, optional, default: ``False``
+        Whether to also return the enclosing radius.
+
+    n_jobs : int or None, optional, default: ``None``
+        The number of jobs to use to compute each block of rows of the
+        distance matrix. ``None`` means 1 unless in a
+        :obj:`joblib.parallel_backend` context. ``-1`` means using all
+        processors.
+
+    Returns
+    -------
+    out : ndarray (n_samples * (n_samples - 1) / 2,)
+        Condensed distance matrix, as expected by :func:`DRFDM`.
+
+    enclosing_radius : float
+        Enclosing radius computed from the float32 entries of `out`. Only
+        returned if `return_enclosing_radius` is ``True``.
+
+    """
+    n_points = X.shape[0]
+    if out is None:
+        out = np.empty(n_points * (n_points - 1) // 2, dtype=np.float32)
+    if return_enclosing_radius:
+        # Running maximum distance from each point to any other point
+        radii = np.zeros(n_points, dtype=np.float32)
+
+    if metric == 'precomputed':
+        blocks = (X,)
+    else:
+        blocks = pairwise_distances_chunked(X, metric=metric, n_jobs=n_jobs,
+                                            working_memory=working_memory)
+
+    i = 0
+    start = 0
+    for block in blocks:
+        for row in block:
+            end = start + n_points - i - 1
+            out[start:end] = row[i + 1:]
+            if return_enclosing_radius and end > start:
+                upper = out[start:end]
+                radii[i] = max(radii[i], upper.max())
+                np.maximum(radii[i + 1:], upper, out=radii[i + 1:])
+            start = end
+            i += 1
+
+    if return_enclosing_radius:
+        return out, np.min(radii, initial=np.inf)
+    return out
+
+
 def DRFDM(DParam, maxHomDim, thresh=-1, coeff=2, do_cocycles=0):
+    # The bindings read the buffer in place, so only convert when needed
+    DParam = np.ascontiguousarray(DParam, dtype=np.float32)
     if coeff == 2:
         ret = gtda_ripser.rips_dm(DParam, DParam.shape[0], coeff, maxHomDim,
                                   thresh, do_cocycles)
@@ -28,6 +136,10 @@ def DRFDM(DParam, maxHomDim, thresh=-1, coeff=2, do_cocycles=0):
 
 
 def DRFDMSparse(I, J, V, N, maxHomDim, thresh=-1, coeff=2, do_cocycles=0):
+    # The bindings read the buffers in place, so only convert when needed
+    I = np.ascontiguousarray(I, dtype=np.int32)
+    J = np.ascontiguousarray(J, dtype=np.int32)
+    V = np.ascontiguousarray(V, dtype=np.float32)
     if coeff == 2:
         ret = gtda_ripser.rips_dm_sparse(I, J, V, I.size, N, coeff, maxHomDim,
                                          thresh, do_cocycles)
@@ -57,7 +169,11 @@ def dpoint2pointcloud(X, i, metric):
         feature array
 
     """
-    ds = pairwise_distances(X, X[i, :][None, :], metric=metric).flatten()
+    if metric == "euclidean" and not sparse.issparse(X):
+        diff = X - X[i]
+        ds = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+    else:
+        ds = pairwise_distances(X, X[[i]], metric=metric).ravel()
     ds[i] = 0
     return ds
 
@@ -86,35 +202,41 @@ def get_greedy_perm(X, n_perm=None, metric="euclidean"):
         Covering radii at different points
 
     dperm2all: ndarray(n_perm, n_samples)
-        Distances from points in the greedy permutation to points
-        in the original point set
+        Distances, in single precision, from points in the greedy
+        permutation to points in the original point set
 
     """
+    n_points = X.shape[0]
     if not n_perm:
-        n_perm = X.shape[0]
+        n_perm = n_points
     # By default, takes the first point in the list to be the
     # first point in the permutation, but could be random
     idx_perm = np.zeros(n_perm, dtype=np.int64)
     lambdas = np.zeros(n_perm)
+    # Rows are written in place as landmarks are selected, while `ds` holds the
+    # running minimum distance from each point to the landmarks so far
+    dperm2all = np.empty((n_perm, n_points), dtype=np.float32)
     if metric == 'precomputed':
-        dpoint2all = lambda i: X[i, :]
+        def dpoint2all(i):
+            return X[i, :]
     else:
-        dpoint2all = lambda i: dpoint2pointcloud(X, i, metric)
-    ds = dpoint2all(0)
-    dperm2all = [ds]
+        def dpoint2all(i):
+            return dpoint2pointcloud(X, i, metric)
+    dperm2all[0] = dpoint2all(0)
+    ds = dperm2all[0].copy()
     for i in range(1, n_perm):
         idx = np.argmax(ds)
         idx_perm[i] = idx
         lambdas[i - 1] = ds[idx]
-        dperm2all.append(dpoint2all(idx))
-        ds = np.minimum(ds, dperm2all[-1])
+        dperm2all[i] = dpoint2all(idx)
+        np.minimum(ds, dperm2all[i], out=ds)
     lambdas[-1] = np.max(ds)
-    dperm2all = np.array(dperm2all)
     return idx_perm, lambdas, dperm2all
 
 
 def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
-           n_perm=None, collapse_edges=False):
+           n_perm=None, collapse_edges=False, working_memory=None,
+           temp_folder=None, n_jobs=None):
     """Compute persistence diagrams for X data array using Ripser [1]_.
 
     If X is not a distance matrix, it will be converted to a distance matrix
@@ -132,7 +254,14 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
 
     thresh : float, optional, default: ``numpy.inf``
         Maximum distances considered when constructing filtration. If
-        ``numpy.inf``, compute the entire filtration.
+        ``numpy.inf``, compute the entire filtration. In this case, when
+        `X` is dense, the enclosing radius (the minimum over points of the
+        maximum distance to any other point) is used as the effective
+        threshold: above it, the filtration is a cone and edges only
+        contribute to the infinite bar in dimension 0, so the resulting
+        diagrams are unchanged. If finite and `X` is a point cloud, only
+        distances up to `thresh` are computed, using a radius neighbours
+        query, and the resulting sparse matrix is passed to Ripser.
 
     coeff : int prime, optional, default: ``2``
         Compute homology with coefficients in the prime field Z/pZ for p=coeff.
@@ -161,6 +290,27 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         Whether to use the edge collapse algorithm as described in [2]_ prior
         to calling ``ripser``.
 
+    working_memory : int or None, optional, default: ``None``
+        When `X` is a dense point cloud or distance matrix which does not need
+        to be passed to the edge collapser, its condensed distance matrix is
+        written directly in float32 format, in blocks of rows each occupying
+        at most this many MiB. ``None`` means using the value of
+        :func:`sklearn.get_config`.
+
+    temp_folder : str or None, optional, default: ``None``
+        If not ``None``, the condensed distance matrix described in
+        `working_memory` is stored in a temporary memory-mapped file in this
+        folder instead of in RAM. The file is removed before returning.
+
+    n_jobs : int or None, optional, default: ``None``
+        The number of jobs to use to compute distances between the points in
+        `X`, when `metric` is not ``'precomputed'``. Useful when persistence
+        is computed for only a few large point clouds. ``None`` means 1 unless
+        in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
+        processors. The edge collapse and the persistence computation are
+        always sequential, since the Ripser reduction and GUDHI's edge
+        collapser are sequential algorithms.
+
     Returns
     -------
     A dictionary holding all of the results of the computation
@@ -173,10 +323,11 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         'num_edges': int
             The number of edges added during the computation
         'dperm2all': ndarray(n_samples, n_samples) or ndarray (n_perm, \
-            n_samples) if n_perm
+            n_samples) if n_perm, or None
             The distance matrix used in the computation if n_perm is none.
             Otherwise, the distance from all points in the permutation to
-            all points in the dataset
+            all points in the dataset. None if the square distance matrix
+            was never built because the condensed one was written directly
         'idx_perm': ndarray(n_perm) if n_perm > 0
             Index into the original point cloud of the points used
             as a subsample in the greedy permutation
@@ -209,7 +360,7 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         <https://doi.org/10.4230/LIPIcs.SoCG.2020.19>`_.
 
     """
-    if n_perm and sparse.issparse(X):
+    if n_perm and sparse.issparse(X) and metric == 'precomputed':
         raise Exception(
             "Greedy permutation is not supported for sparse distance matrices"
         )
@@ -232,16 +383,26 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         )
         r_cover = lambdas[-1]
         dm = dperm2all[:, idx_perm]
+    elif metric == 'precomputed':
+        dm = X
+        dperm2all = dm
+    elif 0 <= thresh < np.inf:
+        # Only distances up to the threshold are needed: memory scales with
+        # the number of such pairs
+        dm = _radius_neighbors_coo(X, thresh, metric=metric, n_jobs=n_jobs)
+        dperm2all = dm
+    elif not (collapse_edges or sparse.issparse(X)) and \
+            isinstance(metric, str):
+        # The condensed matrix will be built block by block from X directly
+        dm = None
+        dperm2all = None
     else:
-        if metric == 'precomputed':
-            dm = X
-        else:
-            dm = pairwise_distances(X, metric=metric)
+        dm = pairwise_distances(X, metric=metric, n_jobs=n_jobs)
         dperm2all = dm
 
-    n_points = max(dm.shape)
+    n_points = X.shape[0] if dm is None else max(dm.shape)
     sort_coo = True
-    if (dm.diagonal() != 0).any():
+    if dm is not None and (dm.diagonal() != 0).any():
         if collapse_edges:
             warn("Edge collapses are not supported when any of the diagonal "
                  "entries are non-zero. Computing persistent homology without "
@@ -258,6 +419,8 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         if collapse_edges:
             sort_coo = True
             if not sparse.issparse(dm):
+                if thresh == np.inf and n_points > 1:
+                    thresh = _enclosing_radius(dm)
                 row, col, data = \
                     gtda_collapser.flag_complex_collapse_edges_dense(dm,
                                                                      thresh)
@@ -279,25 +442,43 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
                 row, col, data = coo.row, coo.col, coo.data
                 sort_coo = False
 
+        # Cast once, so that sorting happens on the final data types and the
+        # sorted arrays can be read in place by the bindings
+        row = np.asarray(row, dtype=np.int32)
+        col = np.asarray(col, dtype=np.int32)
+        data = np.asarray(data, dtype=np.float32)
         if sort_coo:
-            row, col, data = _lexsort_coo_data(np.asarray(row),
-                                               np.asarray(col),
-                                               np.asarray(data))
-
-        res = DRFDMSparse(
-            row.astype(dtype=np.int32, order="C"),
-            col.astype(dtype=np.int32, order="C"),
-            np.array(data, dtype=np.float32, order="C"),
-            n_points,
-            maxdim,
-            thresh,
-            coeff
-            )
+            row, col, data = _lexsort_coo_data(row, col, data)
+
+        res = DRFDMSparse(row, col, data, n_points, maxdim, thresh, coeff)
     else:
         # Only consider strict upper diagonal
-        idx = np.triu_indices(n_points, 1)
-        DParam = dm[idx].astype(np.float32)
-        res = DRFDM(DParam, maxdim, thresh, coeff)
+        X_dense = X if dm is None else dm
+        dm_metric = metric if dm is None else 'precomputed'
+        scratch_file = None
+        if temp_folder is not None and n_points > 1:
+            fd, scratch_file = mkstemp(suffix='.mmap', dir=temp_folder)
+            os.close(fd)
+            DParam = np.memmap(scratch_file, dtype=np.float32, mode='w+',
+                               shape=(n_points * (n_points - 1) // 2,))
+        else:
+            DParam = None
+        try:
+            if thresh == np.inf:
+                DParam, thresh = _condensed_distances(
+                    X_dense, metric=dm_metric, working_memory=working_memory,
+                    out=DParam, return_enclosing_radius=True, n_jobs=n_jobs
+                    )
+            else:
+                DParam = _condensed_distances(
+                    X_dense, metric=dm_metric, working_memory=working_memory,
+                    out=DParam, n_jobs=n_jobs
+                    )
+            res = DRFDM(DParam, maxdim, thresh, coeff)
+        finally:
+            if scratch_file is not None:
+                del DParam
+                os.remove(scratch_file)
 
     # Unwrap persistence diagrams
     dgms = res["births_and_deaths_by_dim"]
@@ -313,3 +494,72 @@ def ripser(X, maxdim=1, thresh=np.inf, coeff=2, metric="euclidean",
         "r_cover": r_cover,
     }
     return ret
+
+
+def ripser_batch(X, maxdim=1, thresh=np.inf, coeff=2, point_offsets=None,
+                 n_jobs=None):
+    """Compute persistence diagrams of many Euclidean point clouds in a
+    single call to Ripser [1]_.
+
+    All point clouds are processed in C++, in parallel over OpenMP threads
+    when available, and the diagrams are returned in a single flat array.
+    This avoids the per-sample overhead of :func:`ripser`, which dominates
+    when the point clouds are small.
+
+    Parameters
+    ----------
+    X : ndarray of shape (n_samples, n_points, n_dimensions) or \
+        (n_points_total, n_dimensions)
+        Stack of point clouds of equal size or, if `point_offsets` is not
+        ``None``, concatenation of the points of all point clouds.
+
+    maxdim : int, optional, default: ``1``
+        Maximum homology dimension computed.
+
+    thresh : float, optional, default: ``numpy.inf``
+        Maximum distances considered when constructing filtrations. If
+        ``numpy.inf``, the enclosing radius of each point cloud is used, as
+        in :func:`ripser`.
+
+    coeff : int prime, optional, default: ``2``
+        Compute homology with coefficients in the prime field Z/pZ for p=coeff.
+
+    point_offsets : ndarray of shape (n_samples + 1,) or None, optional, \
+        default: ``None``
+        The points of sample i are ``X[point_offsets[i]:point_offsets[i +
+        1]]``. Must be ``None`` if `X` is 3D.
+
+    n_jobs : int or None, optional, default: ``None``
+        The number of threads to use. ``None`` means 1 unless in a
+        :obj:`joblib.parallel_backend` context. ``-1`` means using all
+        processors.
+
+    Returns
+    -------
+    pairs : ndarray of shape (n_pairs, 2)
+        Birth-death pairs of all diagrams, in single precision, sorted by
+        sample and then by homology dimension. In each sample, the infinite
+        pair in dimension 0 comes last among the pairs in that dimension.
+
+    offsets : ndarray of shape (n_samples * (maxdim + 1) + 1,)
+        The pairs in homology dimension q of sample i are
+        ``pairs[offsets[i * (maxdim + 1) + q]:offsets[i * (maxdim + 1) + q +
+        1]]``.
+
+    References
+    ----------
+    [1] U. Bauer, "Ripser: efficient computation of Vietoris–Rips persistence \
+        barcodes", 2019; `arXiv:1908.02518 \
+        <https://arxiv.org/abs/1908.02518>`_.
+
+    """
+    X = np.asarray(X)
+    if point_offsets is None:
+        n_samples, n_points = X.shape[:2]
+        point_offsets = np.arange(n_samples + 1, dtype=np.int64) * n_points
+        X = X.reshape(n_samples * n_points, -1)
+    module = gtda_ripser if coeff == 2 else gtda_ripser_coeff
+    pairs, offsets = module.rips_points_batch(
+        X, point_offsets, coeff, maxdim, thresh, effective_n_jobs(n_jobs)
+        )
+    return pairs.reshape(-1, 2), offsets
@@ -289,7 +289,7 @@ class SimplexTree:
         return self.thisptr.make_filtration_non_decreasing()
 
     def persistence(self, homology_coeff_field=11, min_persistence=0,
-                    persistence_dim_max=False):
+                    persistence_dim_max=False, as_array=False):
         """Return the persistence of the simplicial complex.
         :param homology_coeff_field: The homology coefficient field. Must be a
             prime number. Default value is 11.
@@ -303,17 +303,23 @@ class SimplexTree:
             maximal dimension in the complex is computed. If false, it is
             ignored. Default is false.
         :type persistence_dim_max: bool
+        :param as_array: If true, the persistence is returned as an ndarray of
+            shape (n_pairs, 3) of triples [dimension, birth, death], written
+            directly by the C++ backend. Default is false.
+        :type as_array: bool
         :returns: The persistence of the simplicial complex.
-        :rtype:  list of pairs(dimension, pair(birth, death))
+        :rtype:  list of pairs(dimension, pair(birth, death)) or ndarray
         """
         if self.pcohptr is not None:
             del self.pcohptr
         self.pcohptr = Simplex_tree_persistence_interface(self.thisptr,
                                                           persistence_dim_max)
-        persistence_result = []
+        persistence_result = np.empty((0, 3)) if as_array else []
         if self.pcohptr is not None:
             self.pcohptr.compute_persistence(homology_coeff_field,
                                              min_persistence)
+            if as_array:
+                return self.pcohptr.get_persistence_array()
             persistence_result = self.pcohptr.get_persistence()
         return persistence_result
 
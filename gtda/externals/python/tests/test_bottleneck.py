@@ -1,4 +1,8 @@
-from ...modules.gtda_bottleneck import bottleneck_distance
+import numpy as np
+from numpy.testing import assert_almost_equal
+
+from ...modules.gtda_bottleneck import bottleneck_distance, \
+    bottleneck_distance_matrix
 
 
 def test_trivial_empty_diagram():
@@ -143,3 +147,47 @@ def test_inf_4():
 
     assert (correct_answer) == (bottleneck_distance(diagram_a, diagram_b, 0))
     assert (correct_answer) == (bottleneck_distance(diagram_b, diagram_a, 0))
+
+
+def _random_collection(n_diagrams, seed):
+    """Flat pairs and offsets of diagrams of random sizes, some of whose pairs
+    lie on the diagonal."""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 6, size=n_diagrams)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    births = rng.random(offsets[-1])
+    deaths = births + rng.random(offsets[-1]) * rng.integers(0, 2, offsets[-1])
+    return np.stack([births, deaths], axis=1), offsets
+
+
+def test_distance_matrix_consistent():
+    """Distance matrices agree with distances between each pair of diagrams
+    stripped of their diagonal pairs, and only the strict upper triangle is
+    computed in the symmetric case."""
+    delta = 0.01
+    pairs_1, offsets_1 = _random_collection(5, 0)
+    pairs_2, offsets_2 = _random_collection(4, 1)
+    diagrams_1, diagrams_2 = [
+        [diagram[diagram[:, 0] != diagram[:, 1]]
+         for diagram in np.split(pairs, offsets[1:-1])]
+        for pairs, offsets in [(pairs_1, offsets_1), (pairs_2, offsets_2)]
+        ]
+
+    expected = np.array([[bottleneck_distance(diagram_1, diagram_2, delta)
+                          for diagram_2 in diagrams_2]
+                         for diagram_1 in diagrams_1])
+    distances = bottleneck_distance_matrix(pairs_1, offsets_1, pairs_2,
+                                           offsets_2, delta, n_threads=2)
+    assert_almost_equal(distances, expected)
+
+    # Offsets need not start at zero
+    distances = bottleneck_distance_matrix(pairs_1, offsets_1[2:], pairs_2,
+                                           offsets_2[:2], delta)
+    assert_almost_equal(distances, expected[2:, :1])
+
+    expected = np.triu([[bottleneck_distance(diagram_1, diagram_2, delta)
+                         for diagram_2 in diagrams_1]
+                        for diagram_1 in diagrams_1], k=1)
+    distances = bottleneck_distance_matrix(pairs_1, offsets_1, pairs_1,
+                                           offsets_1, delta, symmetric=True)
+    assert_almost_equal(distances, expected)
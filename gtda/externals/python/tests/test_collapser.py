@@ -48,3 +48,14 @@ def test_simple_dense_example():
     coo_ = flag_complex_collapse_edges_dense(data)
     coo = coo_matrix((coo_[2], (coo_[0], coo_[1])))
     assert check_collapse(coo, [[1, 3, 2]])
+
+
+def test_outputs_are_arrays():
+    data = csr_matrix((tX[2], (tX[0], tX[1]))).toarray()
+    for row, col, values in [flag_complex_collapse_edges_dense(data),
+                             flag_complex_collapse_edges_coo(tX[0], tX[1],
+                                                             tX[2])]:
+        assert isinstance(row, np.ndarray) and row.dtype == np.uint32
+        assert isinstance(col, np.ndarray) and col.dtype == np.uint32
+        assert isinstance(values, np.ndarray) and values.dtype == np.float32
+        assert len(row) == len(col) == len(values) == 5
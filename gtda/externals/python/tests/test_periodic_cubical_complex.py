@@ -37,3 +37,16 @@ def test_perseus_file_persistence():
     assert pcub._PeriodicCubicalComplex__is_defined() is True
     assert pcub._PeriodicCubicalComplex__is_persistence_defined() is True
     assert diag == [(2, (0.0, 100.0)), (0, (0.0, float('inf')))]
+
+
+def test_perseus_file_persistence_as_array():
+    top_dimensional_cells = \
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 100, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+         0, 0, 0, 0]
+    pcub = PeriodicCubicalComplex(dimensions=[3, 3, 3],
+                                  top_dimensional_cells=top_dimensional_cells,
+                                  periodic_dimensions=[False, False, False])
+    diag = pcub.persistence(homology_coeff_field=3, min_persistence=0,
+                            as_array=True)
+    assert diag.shape == (2, 3)
+    assert (diag == [[2, 0., 100.], [0, 0., float('inf')]]).all()
@@ -5,8 +5,9 @@ from hypothesis.extra.numpy import arrays
 from hypothesis.strategies import floats, integers, composite
 from numpy.testing import assert_almost_equal
 from scipy.sparse import coo_matrix
+from scipy.spatial.distance import pdist, squareform
 
-from gtda.externals import ripser
+from gtda.externals import ripser, ripser_batch
 
 
 @composite
@@ -103,3 +104,114 @@ def test_coo_results_independent_of_order():
     for i in range(2):
         assert np.array_equal(diagrams[i], expected[i])
         assert np.array_equal(diagrams_csr[i], expected[i])
+
+
+@pytest.mark.parametrize('working_memory', [None, 0.001])
+@pytest.mark.parametrize('use_temp_folder', [False, True])
+def test_condensed_point_cloud_consistent_with_precomputed(
+        working_memory, use_temp_folder, tmp_path):
+    """Check that streaming the condensed distance matrix of a point cloud,
+    possibly in several blocks and through a memory-mapped file, gives the
+    same diagrams as passing the full distance matrix."""
+    X = np.random.RandomState(0).random_sample((40, 3))
+    temp_folder = str(tmp_path) if use_temp_folder else None
+    dgms = ripser(X, maxdim=2, working_memory=working_memory,
+                  temp_folder=temp_folder)['dgms']
+    dgms_precomputed = ripser(squareform(pdist(X)), maxdim=2,
+                              metric='precomputed')['dgms']
+    for dgm, dgm_precomputed in zip(dgms, dgms_precomputed):
+        assert_almost_equal(dgm, dgm_precomputed, decimal=5)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'precomputed'])
+@pytest.mark.parametrize('collapse_edges', [False, True])
+def test_enclosing_radius_does_not_change_diagrams(metric, collapse_edges):
+    """Check that using the enclosing radius as the effective threshold when
+    `thresh` is ``numpy.inf`` leaves the diagrams unchanged."""
+    X = np.random.RandomState(0).random_sample((30, 2))
+    if metric == 'precomputed':
+        X = squareform(pdist(X))
+    large_thresh = 2 * np.sqrt(2)
+    res_inf = ripser(X, maxdim=2, metric=metric,
+                     collapse_edges=collapse_edges)
+    res_large = ripser(X, maxdim=2, thresh=large_thresh, metric=metric,
+                       collapse_edges=collapse_edges)
+    for dgm_inf, dgm_large in zip(res_inf['dgms'], res_large['dgms']):
+        assert_almost_equal(np.sort(dgm_inf, axis=0),
+                            np.sort(dgm_large, axis=0))
+    if not collapse_edges:
+        assert res_inf['num_edges'] <= res_large['num_edges']
+
+
+@pytest.mark.parametrize('collapse_edges', [False, True])
+def test_radius_neighbors_consistent_with_precomputed(collapse_edges):
+    """Check that point clouds with a finite threshold, for which only
+    distances below the threshold are computed, give the same diagrams as
+    the corresponding dense distance matrices."""
+    X = np.random.RandomState(0).random_sample((40, 2))
+    X = np.concatenate([X, X[:5]])  # Duplicate points
+    thresh = 0.3
+    dgms = ripser(X, maxdim=2, thresh=thresh,
+                  collapse_edges=collapse_edges)['dgms']
+    dgms_precomputed = ripser(squareform(pdist(X)), maxdim=2, thresh=thresh,
+                              metric='precomputed',
+                              collapse_edges=collapse_edges)['dgms']
+    for dgm, dgm_precomputed in zip(dgms, dgms_precomputed):
+        assert_almost_equal(np.sort(dgm, axis=0),
+                            np.sort(dgm_precomputed, axis=0))
+
+
+@pytest.mark.parametrize('thresh', [np.inf, 0.3])
+@pytest.mark.parametrize('collapse_edges', [False, True])
+def test_n_jobs_does_not_change_diagrams(thresh, collapse_edges):
+    """Check that computing the distances within a point cloud in parallel
+    gives the same diagrams as computing them sequentially."""
+    X = np.random.RandomState(0).random_sample((40, 2))
+    dgms = ripser(X, maxdim=2, thresh=thresh,
+                  collapse_edges=collapse_edges)['dgms']
+    dgms_parallel = ripser(X, maxdim=2, thresh=thresh,
+                           collapse_edges=collapse_edges, n_jobs=2)['dgms']
+    for dgm, dgm_parallel in zip(dgms, dgms_parallel):
+        assert_almost_equal(np.sort(dgm, axis=0),
+                            np.sort(dgm_parallel, axis=0))
+
+
+@pytest.mark.parametrize('thresh', [np.inf, 0.3])
+@pytest.mark.parametrize('coeff', [2, 3])
+@pytest.mark.parametrize('n_jobs', [None, 2])
+def test_batch_consistent_with_ripser(thresh, coeff, n_jobs):
+    """Check that the batched entry point gives, for each point cloud in a
+    stack or in a concatenation with offsets, the diagrams given by
+    ripser."""
+    X = np.random.RandomState(0).random_sample((5, 20, 2))
+    maxdim = 2
+    pairs, offsets = ripser_batch(X, maxdim=maxdim, thresh=thresh,
+                                  coeff=coeff, n_jobs=n_jobs)
+    assert offsets.shape == (len(X) * (maxdim + 1) + 1,)
+    assert offsets[-1] == len(pairs)
+    for i, x in enumerate(X):
+        dgms = ripser(x, maxdim=maxdim, thresh=thresh, coeff=coeff)['dgms']
+        for dim, dgm in enumerate(dgms):
+            block = i * (maxdim + 1) + dim
+            assert_almost_equal(
+                np.sort(pairs[offsets[block]:offsets[block + 1]], axis=0),
+                np.sort(dgm, axis=0), decimal=5
+                )
+
+    point_offsets = np.array([0, 3, 20, 20, 45], dtype=np.int64)
+    X_concat = X.reshape(-1, 2)[:45]
+    pairs, offsets = ripser_batch(X_concat, maxdim=maxdim, thresh=thresh,
+                                  coeff=coeff, point_offsets=point_offsets,
+                                  n_jobs=n_jobs)
+    for i in range(len(point_offsets) - 1):
+        x = X_concat[point_offsets[i]:point_offsets[i + 1]]
+        block = i * (maxdim + 1)
+        if not len(x):
+            assert offsets[block] == offsets[block + maxdim + 1]
+            continue
+        dgms = ripser(x, maxdim=maxdim, thresh=thresh, coeff=coeff)['dgms']
+        assert_almost_equal(
+            np.sort(pairs[offsets[block]:offsets[block + 1]], axis=0),
+            np.sort(dgms[0], axis=0), decimal=5
+            )
@@ -1,7 +1,11 @@
 import math
+
+import numpy as np
 import pytest
+from numpy.testing import assert_almost_equal
 
-from ...modules.gtda_wasserstein import wasserstein_distance, hera_get_infinity
+from ...modules.gtda_wasserstein import wasserstein_distance, \
+    wasserstein_distance_matrix, hera_get_infinity
 
 
 def test_trivial_empty_diagram():
@@ -190,3 +194,31 @@ def test_inf_3():
 
     assert d1 == d2
     assert d1 == pytest.approx(corr_answer)
+
+
+def test_distance_matrix_consistent():
+    """Distance matrices agree with distances between each pair of diagrams
+    stripped of their diagonal pairs, and only the strict upper triangle is
+    computed in the symmetric case."""
+    q = 2.0
+    delta = 0.01
+    pairs = np.array([[0., 1.], [1., 1.], [0.5, 2.], [0.2, 0.2], [1., 3.],
+                      [0., 0.5], [2., 2.]])
+    offsets = np.array([0, 2, 2, 5, 7])
+    diagrams = [diagram[diagram[:, 0] != diagram[:, 1]]
+                for diagram in np.split(pairs, offsets[1:-1])]
+
+    expected = np.array([[wasserstein_distance(diagram_1, diagram_2, q=q,
+                                               delta=delta)
+                          for diagram_2 in diagrams[1:]]
+                         for diagram_1 in diagrams])
+    distances = wasserstein_distance_matrix(pairs, offsets, pairs,
+                                            offsets[1:], q=q, delta=delta,
+                                            n_threads=2)
+    assert_almost_equal(distances, expected)
+
+    distances = wasserstein_distance_matrix(pairs, offsets, pairs, offsets,
+                                            q=q, delta=delta, symmetric=True)
+    assert_almost_equal(distances, np.triu(
+        [[0.] + list(row) for row in expected], k=1
+        ))
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from .. import WitnessComplex, StrongWitnessComplex
 
 """ Test comes from
@@ -53,3 +56,32 @@ def test_strong_witness_complex():
     )
     assert simplex_tree.num_vertices() == 5
     assert simplex_tree.num_simplices() == 25
+
+
+@pytest.mark.parametrize('complex_cls', [WitnessComplex, StrongWitnessComplex])
+def test_witness_complex_array_constructor(complex_cls):
+    """Check that passing the nearest landmark table as arrays gives the same
+    filtered complex as passing it as lists of pairs."""
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 2 * np.pi, 100)
+    witnesses = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    landmarks = witnesses[:10]
+    sq_distances = np.sum(
+        (witnesses[:, None, :] - landmarks[None, :, :]) ** 2, axis=2
+        )
+    indices = np.argsort(sq_distances, axis=1)[:, :4]
+    sq_distances = np.take_along_axis(sq_distances, indices, axis=1)
+    nearest_landmark_table = [
+        [[int(i), float(d)] for i, d in zip(row_indices, row_distances)]
+        for row_indices, row_distances in zip(indices, sq_distances)
+        ]
+
+    simplex_tree_lists = complex_cls(
+        nearest_landmark_table=nearest_landmark_table
+        ).create_simplex_tree(max_alpha_square=1., limit_dimension=2)
+    simplex_tree_arrays = complex_cls(
+        landmark_indices=indices, landmark_distances=sq_distances
+        ).create_simplex_tree(max_alpha_square=1., limit_dimension=2)
+    assert simplex_tree_arrays.num_simplices() > 10
+    assert sorted(simplex_tree_arrays.get_filtration()) == \
+        sorted(simplex_tree_lists.get_filtration())
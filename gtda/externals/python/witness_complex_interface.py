@@ -9,18 +9,29 @@ class WitnessComplex:
     with respect to witnesses.
     """
 
-    def __init__(self, nearest_landmark_table=None):
+    def __init__(self, nearest_landmark_table=None,
+                 landmark_indices=None, landmark_distances=None):
         """WitnessComplex constructor.
         :param nearest_landmark_table: A list of lists of nearest landmarks and
         their distances.  `nearest_landmark_table[w][k]==(l,d)` means that l is
         the k-th nearest landmark to witness w, and d is the (squared) distance
         between l and w.
         :type nearest_landmark_table: list of list of pair of int and float
+        :param landmark_indices: Alternative to `nearest_landmark_table`, read
+        without conversion to Python objects. `landmark_indices[w, k]` is the
+        k-th nearest landmark to witness w.
+        :type landmark_indices: ndarray of shape (n_witnesses, n_neighbors)
+        :param landmark_distances: (Squared) distances corresponding to
+        `landmark_indices`, sorted in ascending order along each row.
+        :type landmark_distances: ndarray of shape (n_witnesses, n_neighbors)
         """
 
         self.thisptr = None
 
-        if nearest_landmark_table is not None:
+        if landmark_indices is not None:
+            self.thisptr = Witness_complex_interface(landmark_indices,
+                                                     landmark_distances)
+        elif nearest_landmark_table is not None:
             self.thisptr = Witness_complex_interface(nearest_landmark_table)
 
     def __del__(self):
@@ -4,14 +4,18 @@ to generate persistence diagrams.
 # License: GNU AGPLv3
 
 from .simplicial import VietorisRipsPersistence, SparseRipsPersistence, \
-    WeakAlphaPersistence, EuclideanCechPersistence, FlagserPersistence
+    WeakAlphaPersistence, EuclideanCechPersistence, WitnessPersistence, \
+    FlagserPersistence
 from .cubical import CubicalPersistence
+from ._cache import DiagramCache
 
 __all__ = [
     'VietorisRipsPersistence',
     'SparseRipsPersistence',
     'WeakAlphaPersistence',
     'EuclideanCechPersistence',
+    'WitnessPersistence',
     'FlagserPersistence',
     'CubicalPersistence',
+    'DiagramCache',
     ]
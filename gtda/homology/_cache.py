@@ -0,0 +1,207 @@
+"""Persistent cache of per-sample persistence computations."""
+# License: GNU AGPLv3
+
+import os
+import pickle
+from collections import OrderedDict
+from hashlib import blake2b
+from tempfile import mkstemp
+
+import numpy as np
+from joblib import hash as joblib_hash
+from scipy import sparse
+
+# Parameters which only affect how diagrams are computed or post-processed,
+# and not the raw output of the per-sample computations stored in the cache
+_PARAMS_NOT_IN_KEY = ['infinity_values', 'reduced_homology', 'ragged',
+                      'max_features_per_dimension', 'dtype', 'n_jobs',
+                      'prefer', 'cache']
+
+_SUFFIX = '.pkl'
+
+
+class DiagramCache:
+    """On-disk cache of persistence diagrams, addressed by the content of each
+    input sample.
+
+    Transformers in :mod:`gtda.homology` accepting a `cache` parameter store
+    there the result of the persistence computation for each sample they
+    process, under a key obtained by hashing the bytes of the sample together
+    with the transformer's class and hyperparameters. In later calls to
+    :meth:`transform`, by the same or by another process, only samples whose
+    key is not found in the cache are recomputed. When the total size of the
+    stored results exceeds `max_bytes`, the least recently used results are
+    evicted.
+
+    Parameters
+    ----------
+    location : str
+        Path to the folder in which results are stored, one file per key. It is
+        created if it does not exist. Several instances, possibly in different
+        processes, can share the same folder.
+
+    max_bytes : int or None, optional, default: ``2 ** 30``
+        Maximum total size in bytes of the results stored by this instance in
+        `location`. ``None`` means no limit.
+
+    Attributes
+    ----------
+    hits : int
+        Number of distinct samples whose result was found in the cache.
+
+    misses : int
+        Number of distinct samples whose result had to be computed.
+
+    evictions : int
+        Number of results evicted from the cache to keep its size below
+        `max_bytes`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from gtda.homology import VietorisRipsPersistence, DiagramCache
+    >>> cache = DiagramCache('diagram_cache')
+    >>> X = np.random.random((10, 20, 2))
+    >>> VR = VietorisRipsPersistence(cache=cache).fit(X)
+    >>> Xt = VR.transform(X)
+    >>> Xt = VR.transform(np.concatenate([X, X[:1] + 1]))
+    >>> cache.hits, cache.misses
+    (10, 11)
+
+    """
+
+    def __init__(self, location, max_bytes=2 ** 30):
+        self.location = location
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(location, exist_ok=True)
+        entries = []
+        for entry in os.scandir(location):
+            if entry.name.endswith(_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(_SUFFIX)],
+                                stat.st_size))
+        # Keys in order of last use, with the sizes of their results
+        self._sizes = OrderedDict(
+            (key, size) for _, key, size in sorted(entries)
+            )
+        self._n_bytes = sum(self._sizes.values())
+
+    def __repr__(self):
+        return (f"DiagramCache(location={self.location!r}, "
+                f"max_bytes={self.max_bytes})")
+
+    @property
+    def n_bytes(self):
+        """Total size in bytes of the results known to this instance."""
+        return self._n_bytes
+
+    def _path(self, key):
+        return os.path.join(self.location, key + _SUFFIX)
+
+    def keys(self, X, params):
+        """Keys of the samples in `X` for a computation with hyperparameters
+        `params`, see :func:`_cache_params`."""
+        params_digest = joblib_hash(params).encode()
+        return [_hash_sample(x, params_digest) for x in X]
+
+    def get(self, key):
+        """Return the result stored under `key`, or ``None``."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self._forget(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            os.utime(self._path(key))
+            if key not in self._sizes:
+                # Written by another instance
+                self._sizes[key] = os.path.getsize(self._path(key))
+                self._n_bytes += self._sizes[key]
+        except OSError:
+            # Evicted by another instance since it was read
+            self._forget(key)
+            return result
+        self._sizes.move_to_end(key)
+        return result
+
+    def set(self, key, result):
+        """Store `result` under `key`, then evict the least recently used
+        results until the total size is no larger than `max_bytes`."""
+        fd, temp_path = mkstemp(suffix='.tmp', dir=self.location)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic, so that concurrent readers never see partial files
+        os.replace(temp_path, self._path(key))
+
+        self._forget(key)
+        try:
+            self._sizes[key] = os.path.getsize(self._path(key))
+        except OSError:
+            # Evicted by another instance since it was written
+            pass
+        else:
+            self._n_bytes += self._sizes[key]
+
+        if self.max_bytes is not None:
+            while self._n_bytes > self.max_bytes and len(self._sizes) > 1:
+                lru_key = next(iter(self._sizes))
+                self._forget(lru_key)
+                try:
+                    os.remove(self._path(lru_key))
+                except FileNotFoundError:
+                    pass
+                self.evictions += 1
+
+    def _forget(self, key):
+        self._n_bytes -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        """Remove all results stored in `location` and reset the
+        statistics."""
+        for key in list(self._sizes):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._sizes.clear()
+        self._n_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+
+def _hash_sample(x, params_digest=b''):
+    """Fast content hash of a dense or sparse array, optionally salted with
+    the digest of the hyperparameters of the computation."""
+    h = blake2b(params_digest, digest_size=16)
+    if sparse.issparse(x):
+        h.update(f"{x.format}{x.shape}{x.dtype}".encode())
+        for attr in ['data', 'indices', 'indptr', 'row', 'col']:
+            if hasattr(x, attr):
+                h.update(np.ascontiguousarray(getattr(x, attr)).data)
+    else:
+        x = np.ascontiguousarray(x)
+        h.update(f"{x.shape}{x.dtype}".encode())
+        h.update(x.data)
+    return h.hexdigest()
+
+
+def _cache_params(estimator):
+    """Class and hyperparameters of `estimator` which determine the result of
+    its per-sample persistence computations."""
+    params = estimator.get_params()
+    for name in _PARAMS_NOT_IN_KEY:
+        params.pop(name, None)
+    return type(estimator).__name__, sorted(params.items())
+
+
+def _check_cache(cache):
+    if isinstance(cache, str):
+        return DiagramCache(cache)
+    return cache
@@ -0,0 +1,160 @@
+"""Minimum spanning tree engines for persistent homology in dimension 0."""
+# License: GNU AGPLv3
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import minimum_spanning_tree, connected_components
+from sklearn.neighbors import NearestNeighbors
+
+# scipy's MST routines treat zero entries as missing edges. Zero-length edges
+# are temporarily given this weight, which is smaller than any other positive
+# distance, so that they still connect their vertices.
+_TINY = np.finfo(np.float64).tiny
+
+# Maximum number of entries in each (n_queries, n_neighbors) block of
+# neighbour distances and indices held in memory at once
+_KNEIGHBORS_BLOCK_SIZE = 2 ** 22
+
+
+def _mst_weights_from_graph(graph):
+    """Return the weights of a minimum spanning forest of a sparse weighted
+    graph whose zero-length edges have weight `_TINY`, and the number of
+    connected components of the graph."""
+    mst = minimum_spanning_tree(graph)
+    weights = mst.data
+    weights[weights == _TINY] = 0.
+    n_components = graph.shape[0] - mst.nnz
+
+    return weights, n_components
+
+
+def _boruvka_mst_weights(X, metric, thresh, n_neighbors=16, n_jobs=None):
+    """Return the weights of a minimum spanning forest of the complete graph
+    on the point cloud `X`, with edges longer than `thresh` removed, and the
+    number of its connected components.
+
+    Borůvka's algorithm is used. In each round, the nearest neighbour of each
+    point outside its own component is found by k-nearest neighbour queries
+    with geometrically increasing k. Points whose k nearest neighbours all lie
+    in their component and are already further away than the best outgoing
+    edge found for that component are discarded, so that in practice only
+    points near component boundaries are queried more than once. Each round at
+    least halves the number of components which can still be merged, and
+    memory stays linear in the number of points.
+
+    """
+    n_points = X.shape[0]
+    nn = NearestNeighbors(metric=metric, n_jobs=n_jobs).fit(X)
+    labels = np.arange(n_points)
+    n_components = n_points
+    weights = []
+
+    while n_components > 1:
+        best_dist = np.full(n_points, np.inf)
+        best_nbr = np.zeros(n_points, dtype=np.int64)
+        # Only edges no longer than `thresh` are relevant
+        bound = np.full(n_components, thresh, dtype=float)
+        unresolved = np.arange(n_points)
+        k = min(n_neighbors, n_points)
+        while unresolved.size:
+            still_unresolved = []
+            block_size = max(1, _KNEIGHBORS_BLOCK_SIZE // k)
+            for start in range(0, unresolved.size, block_size):
+                queries = unresolved[start:start + block_size]
+                dist, ind = nn.kneighbors(X[queries], n_neighbors=k)
+                is_outside = labels[ind] != labels[queries][:, None]
+                found = is_outside.any(axis=1)
+                first = is_outside[found].argmax(axis=1)
+                found_pts = queries[found]
+                best_dist[found_pts] = dist[found, first]
+                best_nbr[found_pts] = ind[found, first]
+                np.minimum.at(bound, labels[found_pts], best_dist[found_pts])
+                # The k-th neighbour distance is a lower bound for the
+                # distance to the nearest point outside the component. Ties
+                # are kept, since edges of length `thresh` are in the
+                # filtration.
+                not_found = ~found
+                still_unresolved.append(queries[not_found][
+                    dist[not_found, -1] <= bound[labels[queries[not_found]]]
+                    ])
+            unresolved = np.concatenate(still_unresolved)
+            if k == n_points:
+                break
+            k = min(2 * k, n_points)
+
+        # Minimum outgoing edge of each component, if any
+        candidates = np.flatnonzero(best_dist <= thresh)
+        if not candidates.size:
+            break
+        candidates = candidates[np.lexsort((best_dist[candidates],
+                                            labels[candidates]))]
+        _, first = np.unique(labels[candidates], return_index=True)
+        candidates = candidates[first]
+
+        # Two components can select the same edge between them, with the same
+        # weight. Keep one copy of each, since sparse matrices sum duplicates.
+        src = labels[candidates]
+        dst = labels[best_nbr[candidates]]
+        row, col = np.minimum(src, dst), np.maximum(src, dst)
+        _, unique_idx = np.unique(row * n_components + col, return_index=True)
+        dist = best_dist[candidates][unique_idx]
+        dist[dist == 0] = _TINY
+
+        # Minimum spanning forest of the graph of components given by the
+        # candidate edges, which takes care of cycles created by ties
+        graph = sparse.coo_matrix(
+            (dist, (row[unique_idx], col[unique_idx])),
+            shape=(n_components, n_components)
+            )
+        round_weights, _ = _mst_weights_from_graph(graph)
+        weights.append(round_weights)
+        n_components, component_labels = connected_components(
+            graph, directed=False
+            )
+        labels = component_labels[labels]
+
+    weights = np.concatenate(weights) if weights else np.empty(0)
+
+    return weights, n_components
+
+
+def _mst_diagram(X, metric='euclidean', thresh=np.inf, n_jobs=None):
+    """Compute the persistence diagram in homology dimension 0 of the
+    Vietoris–Rips filtration of a point cloud, or of a dense or sparse distance
+    matrix with zero diagonal, from a minimum spanning tree.
+
+    The output has the same format as ``ripser(X, maxdim=0, ...)['dgms']``:
+    finite pairs are sorted by death and are followed by one pair with
+    infinite death per connected component. Deaths are rounded to single
+    precision, like in :func:`gtda.externals.ripser`. `n_jobs` is the number
+    of jobs used in nearest neighbour queries on point clouds.
+
+    """
+    if metric == 'precomputed':
+        if sparse.issparse(X):
+            X = X.tocoo()
+            row, col, data = X.row, X.col, X.data
+            mask = row != col
+        else:
+            # Only the upper triangle of dense distance matrices is considered
+            row, col = np.triu_indices(X.shape[0], k=1)
+            data = X[row, col]
+            mask = slice(None)
+        row, col, data = row[mask], col[mask], data[mask].astype(float)
+        mask = np.isfinite(data) & (data <= thresh)
+        row, col, data = row[mask], col[mask], data[mask]
+        data[data == 0] = _TINY
+        graph = sparse.coo_matrix((data, (row, col)), shape=X.shape)
+        weights, n_components = _mst_weights_from_graph(graph)
+    else:
+        if sparse.issparse(X):
+            X = X.tocsr()
+        weights, n_components = _boruvka_mst_weights(X, metric, thresh,
+                                                     n_jobs=n_jobs)
+
+    deaths = np.sort(weights[weights > 0]).astype(np.float32)
+    dgm = np.zeros((len(deaths) + n_components, 2))
+    dgm[:len(deaths), 1] = deaths
+    dgm[len(deaths):, 1] = np.inf
+
+    return [dgm]
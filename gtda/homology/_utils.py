@@ -1,65 +1,367 @@
 """Utility functions for persistent homology."""
 # License: GNU AGPLv3
 
+from warnings import warn
+
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import sparse
+
+from ._cache import _hash_sample
+from ..externals import flag_complex_collapse_edges_coo
+from ..externals.python.ripser_interface import get_greedy_perm
+from ..utils._ragged import RaggedDiagrams
+
+# Number of chunks of roughly equal estimated cost created per worker when
+# dispatching samples. Samples more expensive than one chunk are dispatched
+# on their own.
+_N_CHUNKS_PER_WORKER = 4
+
+
+def _dtype_type(dtype):
+    """Scalar type described by `dtype`, e.g. ``numpy.float32`` for
+    ``'float32'`` or ``numpy.dtype('float32')``. Anything which does not
+    describe a NumPy data type is returned unchanged, to be rejected by
+    :func:`~gtda.utils.validation.validate_params`."""
+    if dtype is None:
+        return dtype
+    try:
+        return np.dtype(dtype).type
+    except TypeError:
+        return dtype
+
+
+def _simplicial_costs(X, max_dimension, precomputed=False,
+                      max_vertices=None):
+    """Estimate the relative cost of computing persistence up to homology
+    dimension `max_dimension` for each point cloud or distance/adjacency
+    matrix in `X`.
+
+    The estimate is the number of edges times the average vertex degree to the
+    power `max_dimension`, which is proportional to the number of simplices of
+    dimension ``max_dimension + 1`` in a flag complex with uniform degrees.
+    Point clouds and dense matrices are treated as complete graphs, and
+    sparse matrices contribute their off-diagonal stored entries. If
+    `max_vertices` is not ``None``, complexes are assumed to be built on at
+    most this many vertices, as for landmark-based filtrations.
+
+    """
+    costs = np.empty(len(X), dtype=float)
+    for i, x in enumerate(X):
+        n_vertices = x.shape[0]
+        if max_vertices is not None:
+            n_vertices = min(n_vertices, max_vertices)
+        if precomputed and sparse.issparse(x):
+            n_edges = x.nnz - np.count_nonzero(x.diagonal())
+        else:
+            n_edges = n_vertices * (n_vertices - 1) / 2
+        degree = 2 * n_edges / n_vertices if n_vertices else 0.
+        costs[i] = max(n_edges, 1.) * max(degree, 1.) ** max_dimension
+
+    return costs
+
+
+def _grid_costs(X):
+    """Estimate the relative cost of computing cubical persistence for each
+    image in `X`, as its number of pixels."""
+    return np.array([max(np.size(x), 1) for x in X], dtype=float)
+
+
+def _apply_to_chunk(func, chunk):
+    return [func(x) for x in chunk]
+
+
+def _chunks_by_cost(costs, n_workers):
+    """Partition sample indices into chunks, in order of decreasing cost of
+    their most expensive sample. Samples are visited from the most to the
+    least expensive and are grouped until a chunk reaches the target cost
+    ``sum(costs) / (_N_CHUNKS_PER_WORKER * n_workers)``."""
+    order = np.argsort(-costs, kind="stable")
+    target = costs.sum() / (_N_CHUNKS_PER_WORKER * n_workers)
+    chunks, chunk, chunk_cost = [], [], 0.
+    for i in order:
+        chunk.append(i)
+        chunk_cost += costs[i]
+        if chunk_cost >= target:
+            chunks.append(chunk)
+            chunk, chunk_cost = [], 0.
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def _dispatch_by_cost(func, X, costs, n_jobs, **parallel_kwargs):
+    """Return ``[func(x) for x in X]``, computed in parallel with joblib.
+
+    Samples are dispatched to workers in order of decreasing estimated cost
+    (longest-processing-time-first), so that a few expensive samples at the
+    end of `X` cannot leave all other workers idle. Cheap samples are batched
+    into chunks to amortise the overhead of dispatching each of them
+    separately. Results are returned in the original order of `X`.
+
+    """
+    chunks = _chunks_by_cost(np.asarray(costs, dtype=float),
+                             effective_n_jobs(n_jobs))
+    results = Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+        delayed(_apply_to_chunk)(func, [X[i] for i in chunk])
+        for chunk in chunks
+        )
+
+    Xt = [None] * len(X)
+    for chunk, chunk_results in zip(chunks, results):
+        for i, result in zip(chunk, chunk_results):
+            Xt[i] = result
+
+    return Xt
+
+
+def _collapse_graph_edges(X, thresh=np.inf):
+    """Collapse the edges of the weighted undirected graph with adjacency
+    matrix `X` (see :class:`~gtda.homology.FlagserPersistence`) without
+    changing the persistent homology of its flag filtration, and return the
+    result as an upper-triangular sparse matrix in COO format.
+
+    Only the upper triangle of dense matrices is considered, and the smallest
+    weight of each edge is kept for sparse matrices. Graphs with non-zero
+    vertex weights are returned unchanged, with a warning.
+
+    """
+    n_vertices = X.shape[0]
+    if sparse.issparse(X):
+        X_coo = X.tocoo()
+        is_diagonal = X_coo.row == X_coo.col
+        vertex_weights = X_coo.data[is_diagonal]
+        row, col = X_coo.row[~is_diagonal], X_coo.col[~is_diagonal]
+        row, col = np.minimum(row, col), np.maximum(row, col)
+        data = X_coo.data[~is_diagonal]
+    else:
+        vertex_weights = np.diagonal(X)
+        row, col = np.triu_indices(n_vertices, k=1)
+        data = X[row, col]
+    if vertex_weights.any():
+        warn("Edge collapses are not supported when any of the vertex weights "
+             "are non-zero. Computing persistent homology without using edge "
+             "collapse.")
+        return X
+
+    is_edge = np.isfinite(data) & (data <= thresh)
+    row, col, data = row[is_edge], col[is_edge], data[is_edge]
+    # Keep one copy of each edge, with its smallest weight
+    order = np.argsort(data, kind="stable")
+    row, col, data = row[order], col[order], data[order]
+    _, first = np.unique(row.astype(np.int64) * n_vertices + col,
+                         return_index=True)
+    row, col, data = row[first], col[first], data[first]
+
+    row, col, data = flag_complex_collapse_edges_coo(row, col, data, thresh)
+    return sparse.coo_matrix((data, (row, col)),
+                             shape=(n_vertices, n_vertices))
+
+
+def _split_n_jobs(n_samples, n_jobs):
+    """Split `n_jobs` between parallelism across samples and within each
+    sample.
+
+    When there are at least as many samples as workers, samples are processed
+    in parallel and each of them sequentially, and ``(n_jobs, None)`` is
+    returned. Otherwise, only `n_samples` workers would be busy, so the
+    remaining ones are shared between samples and each sample is given
+    ``effective_n_jobs(n_jobs) // n_samples`` jobs of its own.
+
+    """
+    n_workers = effective_n_jobs(n_jobs)
+    if not n_samples or n_samples >= n_workers:
+        return n_jobs, None
+    return n_samples, n_workers // n_samples
+
+
+def _covering_radius(X, n_perm, metric):
+    if sparse.issparse(X) and metric == 'precomputed':
+        raise ValueError("Greedy permutation is not supported for sparse "
+                         "distance matrices.")
+    _, lambdas, _ = get_greedy_perm(X, n_perm=min(n_perm, X.shape[0]),
+                                    metric=metric)
+    return lambdas[-1]
+
+
+def _covering_radii(X, n_perm, metric, n_jobs=None, **parallel_kwargs):
+    """Return the covering radii of the landmark subsets of at most `n_perm`
+    points selected from each entry of `X` by farthest point sampling, i.e.
+    the maximum distances from any point to the nearest landmark."""
+    return np.array(Parallel(n_jobs=n_jobs, **parallel_kwargs)(
+        delayed(_covering_radius)(x, n_perm, metric) for x in X
+        ))
+
+
+def _parallel_diagrams(func, X, costs, n_jobs, cache=None, cache_params=None,
+                       **parallel_kwargs):
+    """Return ``[func(x) for x in X]``, computed in parallel with joblib as in
+    :func:`_dispatch_by_cost`.
+
+    `func` is only called once per distinct sample, as identified by a hash
+    of its content, and all copies of a sample share the same result object
+    in the output (see :func:`_postprocess_diagrams`).
+
+    If `cache` is a :class:`~gtda.homology.DiagramCache`, results are first
+    looked up there under keys depending on `cache_params`, and only the
+    missing ones are computed and then stored.
+
+    """
+    if cache is not None:
+        keys = cache.keys(X, cache_params)
+    else:
+        keys = [_hash_sample(x) for x in X]
+    # Index of each sample among distinct samples, in order of first
+    # occurrence
+    first_occurrences = {}
+    inverse = [first_occurrences.setdefault(key, i)
+               for i, key in enumerate(keys)]
+    unique_idx = list(first_occurrences.values())
+
+    if cache is not None:
+        results = {i: cache.get(keys[i]) for i in unique_idx}
+        misses = [i for i in unique_idx if results[i] is None]
+    else:
+        results = {}
+        misses = unique_idx
+    computed = _dispatch_by_cost(func, [X[i] for i in misses],
+                                 np.asarray(costs)[misses], n_jobs,
+                                 **parallel_kwargs)
+    for i, result in zip(misses, computed):
+        results[i] = result
+        if cache is not None:
+            cache.set(keys[i], result)
+
+    return [results[i] for i in inverse]
+
+
+def _gudhi_triples(diagram):
+    """Persistence returned by the GUDHI interfaces, as an (n_pairs, 3)
+    array of triples [dim, birth, death]."""
+    if isinstance(diagram, np.ndarray):
+        return diagram.reshape(-1, 3)
+    return np.array([(dim, birth, death) for dim, (birth, death) in diagram],
+                    dtype=float).reshape(-1, 3)
 
 
 def _postprocess_diagrams(
-        Xt, format, homology_dimensions, infinity_values, reduced
+        Xt, format, homology_dimensions, infinity_values, reduced,
+        ragged=False, max_features=None, dtype=np.float64
         ):
     # NOTE: `homology_dimensions` must be sorted in ascending order
-    def replace_infinity_values(subdiagram):
-        np.nan_to_num(subdiagram, posinf=infinity_values, copy=False)
-        return subdiagram[subdiagram[:, 0] < subdiagram[:, 1]]
-
-    # Replace np.inf with infinity_values and turn into list of dictionaries
-    # whose keys are the dimensions
-    if format in ["ripser", "flagser"]:  # Input is list of list of subdiagrams
-        # In H0, remove one infinite bar placed at the end by ripser or flagser
-        # only if `reduce` is True
-        slices = {dim: slice(None) if (dim or not reduced) else slice(None, -1)
-                  for dim in homology_dimensions}
-        Xt = [{dim: replace_infinity_values(diagram[dim][slices[dim]])
-               for dim in homology_dimensions} for diagram in Xt]
-    elif format == "gudhi":  # Input is list of list of [dim, (birth, death)]
-        # In H0, remove one infinite bar placed at the beginning by GUDHI only
-        # if `reduce` is True
-        slices = {dim: slice(None) if (dim or not reduced) else slice(1, None)
-                  for dim in homology_dimensions}
-        Xt = [{dim: replace_infinity_values(
-            np.array([pers_info[1] for pers_info in diagram
-                      if pers_info[0] == dim]).reshape(-1, 2)[slices[dim]]
+    # Copies of a sample share the same diagram object (see
+    # `_parallel_diagrams`): post-process it once and copy the result at the
+    # end, in a single gather
+    inverse = None
+    if format != "flat":
+        _, unique_idx, inverse = np.unique(
+            [id(diagram) for diagram in Xt], return_index=True,
+            return_inverse=True
             )
-            for dim in homology_dimensions} for diagram in Xt]
+        if len(unique_idx) < len(Xt):
+            Xt = [Xt[i] for i in unique_idx]
+        else:
+            inverse = None
+
+    # All persistence pairs are first gathered in a single (n_pairs, 2) array,
+    # along with the sample and the homology dimension they belong to
+    n_samples = len(Xt)
+    if format == "flat":
+        # Input is a tuple (pairs, offsets, max_dim) as returned by
+        # `ripser_batch`, with subdiagrams in all homology dimensions from 0
+        # to max_dim, sample by sample
+        pairs, offsets, max_dim = Xt
+        n_computed_dims = max_dim + 1
+        n_samples = (len(offsets) - 1) // n_computed_dims
+        lengths = np.diff(offsets)
+        block_ids = np.repeat(np.arange(len(lengths)), lengths)
+        sample_ids = block_ids // n_computed_dims
+        dims = block_ids % n_computed_dims
+        pairs = np.array(pairs, dtype=dtype)
+        keep = np.isin(dims, homology_dimensions)
+        if reduced:
+            # In H0, remove one infinite bar placed at the end by ripser only
+            # if `reduced` is True
+            ends_h0 = offsets[1::n_computed_dims]
+            keep[ends_h0[lengths[::n_computed_dims] > 0] - 1] = False
+    elif format in ["ripser", "flagser"]:
+        # Input is list of list of subdiagrams
+        pairs, sample_ids, dims, keep = [], [], [], []
+        for dim in homology_dimensions:
+            subdiagrams = [diagram[dim] for diagram in Xt]
+            lengths = np.array([len(subdiagram) for subdiagram in subdiagrams],
+                               dtype=int)
+            n_pairs = lengths.sum()
+            pairs.append(np.concatenate(
+                [np.reshape(subdiagram, (-1, 2)) for subdiagram in subdiagrams]
+                + [np.empty((0, 2))]
+                ))
+            sample_ids.append(np.repeat(np.arange(n_samples), lengths))
+            dims.append(np.full(n_pairs, dim))
+            keep_dim = np.ones(n_pairs, dtype=bool)
+            if reduced and not dim:
+                # In H0, remove one infinite bar placed at the end by ripser or
+                # flagser only if `reduced` is True
+                keep_dim[np.cumsum(lengths)[lengths > 0] - 1] = False
+            keep.append(keep_dim)
+        pairs = np.concatenate(pairs).astype(dtype)
+        sample_ids = np.concatenate(sample_ids)
+        dims = np.concatenate(dims)
+        keep = np.concatenate(keep)
+    elif format == "gudhi":
+        # Input is list of (n_pairs, 3) arrays of triples [dim, birth, death],
+        # or of lists of [dim, (birth, death)]
+        Xt = [_gudhi_triples(diagram) for diagram in Xt]
+        lengths = np.array([len(diagram) for diagram in Xt], dtype=int)
+        triples = np.concatenate(Xt + [np.empty((0, 3))])
+        dims = triples[:, 0].astype(int)
+        pairs = triples[:, 1:].astype(dtype)
+        sample_ids = np.repeat(np.arange(n_samples), lengths)
+        keep = np.isin(dims, homology_dimensions)
+        if reduced:
+            # In H0, remove one infinite bar placed at the beginning by GUDHI
+            # only if `reduce` is True
+            idx_h0 = np.flatnonzero(dims == 0)
+            _, first_idx = np.unique(sample_ids[idx_h0], return_index=True)
+            keep[idx_h0[first_idx]] = False
     else:
         raise ValueError(
             f"Unknown input format {format} for collection of diagrams."
             )
 
+    # Replace np.inf with infinity_values and remove trivial pairs
+    np.nan_to_num(pairs, posinf=infinity_values, copy=False)
+    keep &= pairs[:, 0] < pairs[:, 1]
+    pairs, sample_ids, dims = pairs[keep], sample_ids[keep], dims[keep]
+
+    # Sort pairs by sample and then by homology dimension, keeping the
+    # original order within each subdiagram
+    n_dims = len(homology_dimensions)
+    blocks = sample_ids * n_dims + np.searchsorted(homology_dimensions, dims)
+    order = np.argsort(blocks, kind="stable")
+    pairs = pairs[order]
+    counts = np.bincount(blocks, minlength=n_samples * n_dims)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    if max_features is not None:
+        # Keep only the `max_features` most persistent pairs in each
+        # subdiagram, in their original order. Pairs are ranked within their
+        # subdiagram by decreasing lifetime, ties broken by position.
+        block_ids = np.repeat(np.arange(len(counts)), counts)
+        order = np.lexsort((pairs[:, 0] - pairs[:, 1], block_ids))
+        keep = np.empty(len(pairs), dtype=bool)
+        keep[order] = np.arange(len(pairs)) - \
+            np.repeat(offsets[:-1], counts) < max_features
+        pairs = pairs[keep]
+        counts = np.minimum(counts, max_features)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    Xt = RaggedDiagrams(pairs, offsets, homology_dimensions)
+    if inverse is not None:
+        Xt = Xt[inverse]
+    if ragged:
+        return Xt
+
     # Conversion to array of triples with padding triples
-    start_idx_per_dim = np.cumsum(
-            [0] + [np.max([len(diagram[dim]) for diagram in Xt] + [1])
-                   for dim in homology_dimensions]
-            )
-    min_values = [min([np.min(diagram[dim][:, 0]) if diagram[dim].size
-                       else np.inf for diagram in Xt])
-                  for dim in homology_dimensions]
-    min_values = [min_value if min_value != np.inf else 0
-                  for min_value in min_values]
-    n_features = start_idx_per_dim[-1]
-    Xt_padded = np.empty((len(Xt), n_features, 3), dtype=float)
-
-    for i, dim in enumerate(homology_dimensions):
-        start_idx, end_idx = start_idx_per_dim[i:i + 2]
-        padding_value = min_values[i]
-        # Add dimension as the third elements of each (b, d) tuple globally
-        Xt_padded[:, start_idx:end_idx, 2] = dim
-        for j, diagram in enumerate(Xt):
-            subdiagram = diagram[dim]
-            end_idx_nontrivial = start_idx + len(subdiagram)
-            # Populate nontrivial part of the subdiagram
-            Xt_padded[j, start_idx:end_idx_nontrivial, :2] = subdiagram
-            # Insert padding triples
-            Xt_padded[j, end_idx_nontrivial:end_idx, :2] = [padding_value] * 2
-
-    return Xt_padded
+    return Xt.to_padded()
@@ -4,11 +4,12 @@
 from numbers import Real
 
 import numpy as np
-from joblib import Parallel, delayed
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 
-from ._utils import _postprocess_diagrams
+from ._cache import DiagramCache, _cache_params, _check_cache
+from ._utils import _postprocess_diagrams, _parallel_diagrams, _grid_costs, \
+    _dtype_type
 from ..base import PlotterMixin
 from ..externals.python import CubicalComplex, PeriodicCubicalComplex
 from ..plotting import plot_diagram
@@ -61,11 +62,53 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        infinite death is discarded from each diagram computed in
        :meth:`transform`.
 
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
+    cache : :class:`DiagramCache`, str or None, optional, default: ``None``
+        Cache in which :meth:`transform` stores and looks up the persistence
+        computation for each sample, so that only samples not seen before
+        with the same hyperparameters (other than `infinity_values`,
+        `reduced_homology`, `ragged`, `max_features_per_dimension`, `dtype`,
+        `n_jobs` and `prefer`) are processed. If a string, a
+        :class:`DiagramCache` with default parameters in this folder is used.
+        ``None`` means no caching.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
         processors.
 
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
+
     Attributes
     ----------
     periodic_dimensions_ : boolean ndarray of shape (n_dimensions,)
@@ -76,6 +119,9 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        Effective death value to assign to features which have infinite
        persistence. Set in :meth:`fit`.
 
+    cache_ : :class:`DiagramCache` or None
+        Effective cache, holding hit and miss statistics. Set in :meth:`fit`.
+
     See also
     --------
     images.HeightFiltration, images.RadialFiltration, \
@@ -105,18 +151,34 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         'periodic_dimensions': {'type': (np.ndarray, type(None)),
                                 'of': {'type': np.bool_}},
         'infinity_values': {'type': (Real, type(None))},
-        'reduced_homology': {'type': bool}
+        'reduced_homology': {'type': bool},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'cache': {'type': (DiagramCache, str, type(None))},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
         }
 
     def __init__(self, homology_dimensions=(0, 1), coeff=2,
                  periodic_dimensions=None, infinity_values=None,
-                 reduced_homology=True, n_jobs=None):
+                 reduced_homology=True, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64,
+                 cache=None, n_jobs=None, prefer=None):
         self.homology_dimensions = homology_dimensions
         self.coeff = coeff
         self.periodic_dimensions = periodic_dimensions
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
+        self.cache = cache
         self.n_jobs = n_jobs
+        self.prefer = prefer
 
     def _gudhi_diagram(self, X):
         cubical_complex = self._filtration(
@@ -125,7 +187,7 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             **self._filtration_kwargs
             )
         Xdgm = cubical_complex.persistence(homology_coeff_field=self.coeff,
-                                           min_persistence=0)
+                                           min_persistence=0, as_array=True)
 
         return Xdgm
 
@@ -150,8 +212,9 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
 
         """
         X = check_collection(X, force_all_finite=False)
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs'])
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters, exclude=['n_jobs'])
 
         self._filtration_kwargs = {}
         if self.periodic_dimensions is None or \
@@ -170,6 +233,7 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         else:
             self.infinity_values_ = self.infinity_values
 
+        self.cache_ = _check_cache(self.cache)
         self._homology_dimensions = sorted(self.homology_dimensions)
         self._max_homology_dimension = self._homology_dimensions[-1]
 
@@ -203,18 +267,23 @@ class CubicalPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             distance matrices in `X`. ``n_features`` equals
             :math:`\\sum_q n_q`, where :math:`n_q` is the maximum number of
             topological features in dimension :math:`q` across all samples in
-            `X`.
+            `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         Xt = check_collection(X, force_all_finite=False)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(delayed(self._gudhi_diagram)(x)
-                                          for x in Xt)
+        Xt = _parallel_diagrams(self._gudhi_diagram, Xt, _grid_costs(Xt),
+                                self.n_jobs, cache=self.cache_,
+                                cache_params=_cache_params(self),
+                                prefer=self.prefer)
 
         Xt = _postprocess_diagrams(
             Xt, "gudhi", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
             )
 
         return Xt
@@ -1,26 +1,46 @@
 """Persistent homology on point clouds or finite metric spaces."""
 # License: GNU AGPLv3
 
+from functools import partial
 from numbers import Real
 from types import FunctionType
 
 import numpy as np
-from joblib import Parallel, delayed
+from joblib import effective_n_jobs
 from pyflagser import flagser_weighted
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, issparse
 from scipy.spatial import Delaunay
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.metrics.pairwise import pairwise_distances
+from sklearn.neighbors import NearestNeighbors
+from sklearn.utils import check_random_state
 from sklearn.utils.validation import check_is_fitted
 
-from ._utils import _postprocess_diagrams
+from ._cache import DiagramCache, _cache_params, _check_cache
+from ._mst import _mst_diagram
+from ._utils import _postprocess_diagrams, _parallel_diagrams, \
+    _simplicial_costs, _split_n_jobs, _collapse_graph_edges, \
+    _covering_radii, _dtype_type
 from ..base import PlotterMixin
-from ..externals.python import ripser, SparseRipsComplex, CechComplex
+from ..externals.python import ripser, ripser_batch, SparseRipsComplex, \
+    CechComplex, WitnessComplex, StrongWitnessComplex
+from ..externals.python.ripser_interface import get_greedy_perm
 from ..plotting import plot_diagram
 from ..utils._docs import adapt_fit_transform_docs
 from ..utils.intervals import Interval
 from ..utils.validation import validate_params, check_point_clouds
 
+# Metrics for which GUDHI builds sparse Rips complexes from the point clouds,
+# without distance matrices
+_NATIVE_SPARSE_RIPS_METRICS = ['euclidean', 'l2', 'minkowski']
+
+# Metrics for which distances are computed by `ripser_batch`
+_BATCHED_METRICS = ['euclidean', 'l2', 'minkowski']
+
+# Maximum number of points in the point clouds passed to `ripser_batch`, which
+# holds a dense distance matrix for each point cloud being processed
+_BATCH_MAX_N_POINTS = 1000
+
 
 @adapt_fit_transform_docs
 class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
@@ -77,7 +97,10 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         Maximum value of the Vietoris–Rips filtration parameter. Points whose
         distance is greater than this value will never be connected by an edge,
         and topological features at scales larger than this value will not be
-        detected.
+        detected. If finite and `metric` is not ``'precomputed'``, only
+        distances no greater than this value are computed, via radius
+        neighbour queries, so that memory scales with the number of edges in
+        the filtration.
 
     infinity_values : float or None, default: ``None``
         Which death value to assign to features which are still alive at
@@ -89,10 +112,64 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        infinite death is discarded from each diagram computed in
        :meth:`transform`.
 
+    n_perm : int or None, optional, default: ``None``
+        If not ``None``, persistence is computed on subsets of at most this
+        many landmark points selected from each entry of `X` by farthest point
+        sampling (a "greedy permutation"), instead of on the full point clouds
+        or distance matrices. This trades accuracy for speed: the bottleneck
+        distance between each diagram and the exact one is at most twice the
+        corresponding covering radius (see :attr:`r_cover_`). Not supported
+        for sparse input when `metric` is ``'precomputed'``.
+
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
+    cache : :class:`DiagramCache`, str or None, optional, default: ``None``
+        Cache in which :meth:`transform` stores and looks up the persistence
+        computation for each sample, so that only samples not seen before
+        with the same hyperparameters (other than `infinity_values`,
+        `reduced_homology`, `ragged`, `max_features_per_dimension`, `dtype`,
+        `n_jobs` and `prefer`) are processed. If a string, a
+        :class:`DiagramCache` with default parameters in this folder is used.
+        ``None`` means no caching.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
-        processors.
+        processors. When there are fewer samples than jobs, the remaining jobs
+        are used to compute the distances between points within each sample.
+        When `X` is processed in a single batch (see Notes), this is the
+        number of threads used by the C++ backend.
+
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
 
     Attributes
     ----------
@@ -100,6 +177,15 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         Effective death value to assign to features which are still alive at
         filtration value `max_edge_length`.
 
+    r_cover_ : ndarray of shape (n_samples,)
+        Covering radii of the landmark subsets of the entries of the
+        collection passed to :meth:`fit` or :meth:`fit_transform`, i.e.
+        maximum distances from any point to the nearest landmark. Only set if
+        `n_perm` is not ``None``.
+
+    cache_ : :class:`DiagramCache` or None
+        Effective cache, holding hit and miss statistics. Set in :meth:`fit`.
+
     See also
     --------
     FlagserPersistence, SparseRipsPersistence, WeakAlphaPersistence, \
@@ -115,6 +201,23 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
     `GUDHI <https://github.com/GUDHI/gudhi-devel>`_ is used as a C++ backend
     for the edge collapse algorithm described in [2]_.
 
+    When `homology_dimensions` is ``(0,)``, persistence diagrams are obtained
+    from minimum spanning trees, without building full distance matrices. For
+    point clouds, Borůvka's algorithm is run using nearest neighbour queries
+    from :class:`sklearn.neighbors.NearestNeighbors`. For distance matrices
+    with zero diagonal, :func:`scipy.sparse.csgraph.minimum_spanning_tree` is
+    used.
+
+    Otherwise, when `X` is a 3D ndarray of point clouds with at most 1000
+    points each, `metric` is ``'euclidean'``, `n_perm`, `collapse_edges` and
+    `cache` take their default values, and there are at least as many samples
+    as jobs, all point clouds are passed to Ripser at once, as one contiguous
+    array. Distances and persistence are then computed in C++, in parallel
+    over the point clouds, and all diagrams are returned in a single flat
+    array. This removes the per-sample overhead which dominates for large
+    collections of small point clouds. In this case, `prefer` is not used and
+    identical samples are not deduplicated.
+
     References
     ----------
     [1] U. Bauer, "Ripser: efficient computation of Vietoris–Rips persistence \
@@ -140,12 +243,25 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         'coeff': {'type': int, 'in': Interval(2, np.inf, closed='left')},
         'max_edge_length': {'type': Real},
         'infinity_values': {'type': (Real, type(None))},
-        'reduced_homology': {'type': bool}
+        'reduced_homology': {'type': bool},
+        'n_perm': {'type': (int, type(None)),
+                   'in': Interval(1, np.inf, closed='left')},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'cache': {'type': (DiagramCache, str, type(None))},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
         }
 
     def __init__(self, metric='euclidean', homology_dimensions=(0, 1),
                  collapse_edges=False, coeff=2, max_edge_length=np.inf,
-                 infinity_values=None, reduced_homology=True, n_jobs=None):
+                 infinity_values=None, reduced_homology=True, n_perm=None,
+                 ragged=False, max_features_per_dimension=None,
+                 dtype=np.float64, cache=None, n_jobs=None, prefer=None):
         self.metric = metric
         self.homology_dimensions = homology_dimensions
         self.collapse_edges = collapse_edges
@@ -153,19 +269,97 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         self.max_edge_length = max_edge_length
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
+        self.n_perm = n_perm
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
+        self.cache = cache
         self.n_jobs = n_jobs
-
-    def _ripser_diagram(self, X):
-        Xdgms = ripser(
+        self.prefer = prefer
+
+    def _ripser_diagram(self, X, n_jobs=None):
+        if self._homology_dimensions == [0] and self.n_perm is None and \
+                not (self._is_precomputed and X.diagonal().any()):
+            # Persistence in dimension 0 is given by a minimum spanning tree
+            return _mst_diagram(X, metric=self.metric,
+                                thresh=self.max_edge_length,
+                                n_jobs=n_jobs), 0.
+
+        n_perm = None if self.n_perm is None else min(self.n_perm, X.shape[0])
+        res = ripser(
             X, maxdim=self._max_homology_dimension,
             thresh=self.max_edge_length, coeff=self.coeff,
-            metric=self.metric, collapse_edges=self.collapse_edges
-            )['dgms']
+            metric=self.metric, n_perm=n_perm,
+            collapse_edges=self.collapse_edges, n_jobs=n_jobs
+            )
 
-        return Xdgms
+        return res['dgms'], res['r_cover']
+
+    def _fit(self, X):
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters, exclude=['n_jobs'])
+        self._is_precomputed = self.metric == 'precomputed'
+        X = check_point_clouds(X, accept_sparse=True,
+                               distance_matrices=self._is_precomputed)
+
+        if self.infinity_values is None:
+            self.infinity_values_ = self.max_edge_length
+        else:
+            self.infinity_values_ = self.infinity_values
+
+        self.cache_ = _check_cache(self.cache)
+        self._homology_dimensions = sorted(self.homology_dimensions)
+        self._max_homology_dimension = self._homology_dimensions[-1]
+        # Stacks of Euclidean point clouds can go through `ripser_batch`
+        self._batched = self.metric in _BATCHED_METRICS and \
+            self.n_perm is None and not self.collapse_edges and \
+            self.cache_ is None
+
+        return X
+
+    def _is_batch(self, X):
+        # Dense distance matrices are only affordable for small point clouds,
+        # and there must be enough of them to keep all threads busy. In
+        # dimension 0, minimum spanning trees are cheaper.
+        return self._batched and isinstance(X, np.ndarray) and \
+            self._homology_dimensions != [0] and \
+            X.shape[1] <= _BATCH_MAX_N_POINTS and \
+            len(X) >= effective_n_jobs(self.n_jobs)
+
+    def _transform(self, X):
+        if self._is_batch(X):
+            # All point clouds are processed in a single call to Ripser, with
+            # no per-sample overhead
+            pairs, offsets = ripser_batch(
+                X, maxdim=self._max_homology_dimension,
+                thresh=self.max_edge_length, coeff=self.coeff,
+                n_jobs=self.n_jobs
+                )
+            Xt = (pairs, offsets, self._max_homology_dimension)
+            r_cover = None
+            format = "flat"
+        else:
+            costs = _simplicial_costs(X, self._max_homology_dimension,
+                                      precomputed=self._is_precomputed)
+            n_jobs, n_jobs_per_sample = _split_n_jobs(len(X), self.n_jobs)
+            Xt, r_cover = zip(*_parallel_diagrams(
+                partial(self._ripser_diagram, n_jobs=n_jobs_per_sample), X,
+                costs, n_jobs, cache=self.cache_,
+                cache_params=_cache_params(self), prefer=self.prefer
+                ))
+            format = "ripser"
+
+        Xt = _postprocess_diagrams(
+            Xt, format, self._homology_dimensions, self.infinity_values_,
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
+            )
+        return Xt, r_cover
 
     def fit(self, X, y=None):
-        """Calculate :attr:`infinity_values_`. Then, return the estimator.
+        """Calculate :attr:`infinity_values_` and, if `n_perm` is not
+        ``None``, :attr:`r_cover_`. Then, return the estimator.
 
         This method is here to implement the usual scikit-learn API and hence
         work in pipelines.
@@ -201,19 +395,11 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs'])
-        self._is_precomputed = self.metric == 'precomputed'
-        check_point_clouds(X, accept_sparse=True,
-                           distance_matrices=self._is_precomputed)
-
-        if self.infinity_values is None:
-            self.infinity_values_ = self.max_edge_length
-        else:
-            self.infinity_values_ = self.infinity_values
-
-        self._homology_dimensions = sorted(self.homology_dimensions)
-        self._max_homology_dimension = self._homology_dimensions[-1]
+        X = self._fit(X)
+        if self.n_perm is not None:
+            self.r_cover_ = _covering_radii(X, self.n_perm, self.metric,
+                                            n_jobs=self.n_jobs,
+                                            prefer=self.prefer)
 
         return self
 
@@ -262,20 +448,27 @@ class VietorisRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             distance matrices in `X`. ``n_features`` equals
             :math:`\\sum_q n_q`, where :math:`n_q` is the maximum number of
             topological features in dimension :math:`q` across all samples in
-            `X`.
+            `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         X = check_point_clouds(X, accept_sparse=True,
                                distance_matrices=self._is_precomputed)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(
-            delayed(self._ripser_diagram)(x) for x in X)
+        Xt, _ = self._transform(X)
+        return Xt
+
+    def fit_transform(self, X, y=None):
+        """Fit to data, then transform it. The covering radii in
+        :attr:`r_cover_` are obtained from the same landmark subsets as the
+        diagrams, instead of being computed twice."""
+        X = self._fit(X)
+        Xt, r_cover = self._transform(X)
+        if self.n_perm is not None:
+            self.r_cover_ = np.array(r_cover)
 
-        Xt = _postprocess_diagrams(
-            Xt, "ripser", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
-            )
         return Xt
 
     @staticmethod
@@ -365,6 +558,15 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         filtration. If set to `0.`, :class:`SparseRipsPersistence` leads to the
         same results as :class:`VietorisRipsPersistence` but is slower.
 
+    collapse_edges : bool, optional, default: ``False``
+        Whether to run the edge collapse algorithm in [2]_ on the graph of
+        edges of the sparse filtration prior to the persistent homology
+        computation. Since the sparse filtration is a flag filtration, the
+        diagrams are unchanged, but the computation is then performed by
+        Ripser [3]_ on the collapsed graph instead of by GUDHI. Can reduce the
+        runtime dramatically when the data or the maximum homology dimension
+        are large.
+
     max_edge_length : float, optional, default: ``numpy.inf``
         Maximum value of the Sparse Rips filtration parameter. Points whose
         distance is greater than this value will never be connected by an edge,
@@ -381,17 +583,62 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        infinite death is discarded from each diagram computed in
        :meth:`transform`.
 
+    n_perm : int or None, optional, default: ``None``
+        If not ``None``, persistence is computed on subsets of at most this
+        many landmark points selected from each entry of `X` by farthest point
+        sampling (a "greedy permutation"), instead of on the full point clouds
+        or distance matrices. See :attr:`r_cover_`.
+
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
         processors.
 
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
+
     Attributes
     ----------
     infinity_values_ : float
         Effective death value to assign to features which are still alive at
         filtration value `max_edge_length`. Set in :meth:`fit`.
 
+    r_cover_ : ndarray of shape (n_samples,)
+        Covering radii of the landmark subsets of the entries of the
+        collection passed to :meth:`fit` or :meth:`fit_transform`, i.e.
+        maximum distances from any point to the nearest landmark. Only set if
+        `n_perm` is not ``None``.
+
     See also
     --------
     VietorisRipsPersistence, FlagserPersistence, WeakAlphaPersistence, \
@@ -401,7 +648,17 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
     -----
     `GUDHI <https://github.com/GUDHI/gudhi-devel>`_ is used as a C++ backend
     for computing sparse Vietoris–Rips persistent homology. Python bindings
-    were modified for performance.
+    were modified for performance. When `collapse_edges` is ``True``, GUDHI's
+    edge collapser and a C++ implementation of Ripser [3]_ are used instead
+    once the graph of edges of the sparse filtration has been built.
+
+    When `metric` is ``'euclidean'`` (or equivalently ``'l2'`` or
+    ``'minkowski'``), `n_perm` is ``None`` and the point clouds are dense, the
+    point clouds are passed to GUDHI as they are and only the distances needed
+    by the sparse filtration are computed. Memory then scales with the size of
+    the sparse complex instead of quadratically with the number of points.
+    Otherwise, the full distance matrix of each point cloud is computed
+    first.
 
     References
     ----------
@@ -409,6 +666,17 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         Manual <http://gudhi.gforge.inria.fr/doc/3.1.0/group__persistent_\
         cohomology.html>`_.
 
+    [2] J.-D. Boissonnat and S. Pritam, "Edge Collapse and Persistence of \
+        Flag Complexes"; in *36th International Symposium on Computational \
+        Geometry (SoCG 2020)*, pp. 19:1–19:15, Schloss
+        Dagstuhl-Leibniz–Zentrum für Informatik, 2020;
+        `DOI: 10.4230/LIPIcs.SoCG.2020.19 \
+        <https://doi.org/10.4230/LIPIcs.SoCG.2020.19>`_.
+
+    [3] U. Bauer, "Ripser: efficient computation of Vietoris–Rips persistence \
+        barcodes", 2019; `arXiv:1908.02518 \
+        <https://arxiv.org/abs/1908.02518>`_.
+
     """
 
     _hyperparameters = {
@@ -419,40 +687,131 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             },
         'coeff': {'type': int, 'in': Interval(2, np.inf, closed='left')},
         'epsilon': {'type': Real, 'in': Interval(0, 1, closed='both')},
+        'collapse_edges': {'type': bool},
         'max_edge_length': {'type': Real},
         'infinity_values': {'type': (Real, type(None))},
-        'reduced_homology': {'type': bool}
+        'reduced_homology': {'type': bool},
+        'n_perm': {'type': (int, type(None)),
+                   'in': Interval(1, np.inf, closed='left')},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
         }
 
     def __init__(self, metric='euclidean', homology_dimensions=(0, 1),
-                 coeff=2, epsilon=0.1, max_edge_length=np.inf,
-                 infinity_values=None, reduced_homology=True, n_jobs=None):
+                 coeff=2, epsilon=0.1, collapse_edges=False,
+                 max_edge_length=np.inf, infinity_values=None,
+                 reduced_homology=True, n_perm=None, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64,
+                 n_jobs=None, prefer=None):
         self.metric = metric
         self.homology_dimensions = homology_dimensions
         self.coeff = coeff
         self.epsilon = epsilon
+        self.collapse_edges = collapse_edges
         self.max_edge_length = max_edge_length
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
+        self.n_perm = n_perm
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
         self.n_jobs = n_jobs
+        self.prefer = prefer
 
     def _gudhi_diagram(self, X):
-        Xdgm = pairwise_distances(X, metric=self.metric)
+        r_cover = 0.
+        if self.n_perm is None and self.metric in _NATIVE_SPARSE_RIPS_METRICS \
+                and not issparse(X):
+            # GUDHI only evaluates the distances it needs between the points,
+            # so that memory scales with the size of the sparse complex
+            n_points = X.shape[0]
+            complex_input = {'points': X}
+        else:
+            if self.n_perm is None:
+                Xdgm = pairwise_distances(X, metric=self.metric)
+            else:
+                idx_perm, lambdas, dperm2all = get_greedy_perm(
+                    X, n_perm=min(self.n_perm, X.shape[0]), metric=self.metric
+                    )
+                Xdgm = dperm2all[:, idx_perm]
+                r_cover = lambdas[-1]
+            n_points = Xdgm.shape[0]
+            complex_input = {'distance_matrix': Xdgm}
         sparse_rips_complex = SparseRipsComplex(
-            distance_matrix=Xdgm, max_edge_length=self.max_edge_length,
+            **complex_input, max_edge_length=self.max_edge_length,
             sparse=self.epsilon
             )
+        if self.collapse_edges:
+            # The sparse filtration is the flag filtration of its graph of
+            # edges, which Ripser collapses and processes
+            simplex_tree = sparse_rips_complex.create_simplex_tree(
+                max_dimension=1
+                )
+            edges = np.array([simplex + [filtration] for simplex, filtration
+                              in simplex_tree.get_skeleton(1)
+                              if len(simplex) == 2], dtype=float)
+            edges = edges.reshape(-1, 3)
+            graph = coo_matrix(
+                (edges[:, 2], (edges[:, 0].astype(int),
+                               edges[:, 1].astype(int))),
+                shape=(n_points, n_points)
+                )
+            Xdgm = ripser(graph, maxdim=self._max_homology_dimension,
+                          coeff=self.coeff, metric='precomputed',
+                          collapse_edges=True)['dgms']
+
+            return Xdgm, r_cover
+
         simplex_tree = sparse_rips_complex.create_simplex_tree(
             max_dimension=max(self._homology_dimensions) + 1
             )
         Xdgm = simplex_tree.persistence(
-            homology_coeff_field=self.coeff, min_persistence=0
+            homology_coeff_field=self.coeff, min_persistence=0, as_array=True
             )
 
-        return Xdgm
+        return Xdgm, r_cover
+
+    def _fit(self, X):
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters, exclude=['n_jobs'])
+        self._is_precomputed = self.metric == 'precomputed'
+        X = check_point_clouds(X, accept_sparse=True,
+                               distance_matrices=self._is_precomputed)
+
+        if self.infinity_values is None:
+            self.infinity_values_ = self.max_edge_length
+        else:
+            self.infinity_values_ = self.infinity_values
+
+        self._homology_dimensions = sorted(self.homology_dimensions)
+        self._max_homology_dimension = self._homology_dimensions[-1]
+
+        return X
+
+    def _transform(self, X):
+        costs = _simplicial_costs(X, self._max_homology_dimension,
+                                  precomputed=self._is_precomputed)
+        Xt, r_cover = zip(*_parallel_diagrams(self._gudhi_diagram, X, costs,
+                                              self.n_jobs, prefer=self.prefer))
+
+        Xt = _postprocess_diagrams(
+            Xt, "ripser" if self.collapse_edges else "gudhi",
+            self._homology_dimensions, self.infinity_values_,
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
+            )
+        return Xt, r_cover
 
     def fit(self, X, y=None):
-        """Calculate :attr:`infinity_values_`. Then, return the estimator.
+        """Calculate :attr:`infinity_values_` and, if `n_perm` is not
+        ``None``, :attr:`r_cover_`. Then, return the estimator.
 
         This method is here to implement the usual scikit-learn API and hence
         work in pipelines.
@@ -480,19 +839,12 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs'])
-        self._is_precomputed = self.metric == 'precomputed'
-        check_point_clouds(X, accept_sparse=True,
-                           distance_matrices=self._is_precomputed)
+        X = self._fit(X)
+        if self.n_perm is not None:
+            self.r_cover_ = _covering_radii(X, self.n_perm, self.metric,
+                                            n_jobs=self.n_jobs,
+                                            prefer=self.prefer)
 
-        if self.infinity_values is None:
-            self.infinity_values_ = self.max_edge_length
-        else:
-            self.infinity_values_ = self.infinity_values
-
-        self._homology_dimensions = sorted(self.homology_dimensions)
-        self._max_homology_dimension = self._homology_dimensions[-1]
         return self
 
     def transform(self, X, y=None):
@@ -532,20 +884,27 @@ class SparseRipsPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             distance matrices in `X`. ``n_features`` equals
             :math:`\\sum_q n_q`, where :math:`n_q` is the maximum number of
             topological features in dimension :math:`q` across all samples in
-            `X`.
+            `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         X = check_point_clouds(X, accept_sparse=True,
                                distance_matrices=self._is_precomputed)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(
-            delayed(self._gudhi_diagram)(x) for x in X)
+        Xt, _ = self._transform(X)
+        return Xt
+
+    def fit_transform(self, X, y=None):
+        """Fit to data, then transform it. The covering radii in
+        :attr:`r_cover_` are obtained from the same landmark subsets as the
+        diagrams, instead of being computed twice."""
+        X = self._fit(X)
+        Xt, r_cover = self._transform(X)
+        if self.n_perm is not None:
+            self.r_cover_ = np.array(r_cover)
 
-        Xt = _postprocess_diagrams(
-            Xt, "gudhi", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
-            )
         return Xt
 
     @staticmethod
@@ -637,11 +996,44 @@ class WeakAlphaPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        infinite death is discarded from each diagram computed in
        :meth:`transform`.
 
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
         processors.
 
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
+
     Attributes
     ----------
     infinity_values_ : float
@@ -677,18 +1069,32 @@ class WeakAlphaPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         'coeff': {'type': int, 'in': Interval(2, np.inf, closed='left')},
         'max_edge_length': {'type': Real},
         'infinity_values': {'type': (Real, type(None))},
-        'reduced_homology': {'type': bool}
+        'reduced_homology': {'type': bool},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
         }
 
     def __init__(self, homology_dimensions=(0, 1), coeff=2,
                  max_edge_length=np.inf, infinity_values=None,
-                 reduced_homology=True, n_jobs=None):
+                 reduced_homology=True, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64,
+                 n_jobs=None, prefer=None):
         self.homology_dimensions = homology_dimensions
         self.coeff = coeff
         self.max_edge_length = max_edge_length
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
         self.n_jobs = n_jobs
+        self.prefer = prefer
 
     def _weak_alpha_diagram(self, X):
         # `indices` will serve as the array of column indices
@@ -738,8 +1144,9 @@ class WeakAlphaPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         self : object
 
         """
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs'])
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters, exclude=['n_jobs'])
         check_point_clouds(X)
 
         if self.infinity_values is None:
@@ -784,18 +1191,22 @@ class WeakAlphaPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             distance matrices in `X`. ``n_features`` equals
             :math:`\\sum_q n_q`, where :math:`n_q` is the maximum number of
             topological features in dimension :math:`q` across all samples in
-            `X`.
+            `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         X = check_point_clouds(X)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(
-            delayed(self._weak_alpha_diagram)(x) for x in X)
+        costs = _simplicial_costs(X, self._max_homology_dimension)
+        Xt = _parallel_diagrams(self._weak_alpha_diagram, X, costs,
+                                self.n_jobs, prefer=self.prefer)
 
         Xt = _postprocess_diagrams(
             Xt, "ripser", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
             )
         return Xt
 
@@ -877,11 +1288,44 @@ class EuclideanCechPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
        If ``True``, the earliest-born triple in homology dimension 0 which has
        infinite death is discarded in :meth:`transform`.
 
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
         processors.
 
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
+
     Attributes
     ----------
     infinity_values_ : float
@@ -917,18 +1361,32 @@ class EuclideanCechPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
                             'in': Interval(0, np.inf, closed='right')},
         'infinity_values': {'type': (Real, type(None)),
                             'in': Interval(0, np.inf, closed='neither')},
-        'reduced_homology': {'type': bool}
+        'reduced_homology': {'type': bool},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
         }
 
     def __init__(self, homology_dimensions=(0, 1), coeff=2,
                  max_edge_length=np.inf, infinity_values=None,
-                 reduced_homology=True, n_jobs=None):
+                 reduced_homology=True, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64,
+                 n_jobs=None, prefer=None):
         self.homology_dimensions = homology_dimensions
         self.coeff = coeff
         self.max_edge_length = max_edge_length
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
         self.n_jobs = n_jobs
+        self.prefer = prefer
 
     def _gudhi_diagram(self, X):
         cech_complex = CechComplex(points=X, max_radius=self.max_edge_length)
@@ -936,7 +1394,7 @@ class EuclideanCechPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             max_dimension=max(self._homology_dimensions) + 1
             )
         Xdgm = simplex_tree.persistence(homology_coeff_field=self.coeff,
-                                        min_persistence=0)
+                                        min_persistence=0, as_array=True)
 
         return Xdgm
 
@@ -965,8 +1423,9 @@ class EuclideanCechPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
 
         """
         check_point_clouds(X)
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs'])
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters, exclude=['n_jobs'])
 
         if self.infinity_values is None:
             self.infinity_values_ = self.max_edge_length
@@ -1009,18 +1468,386 @@ class EuclideanCechPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             Array of persistence diagrams computed from the feature arrays in
             `X`. ``n_features`` equals :math:`\\sum_q n_q`, where :math:`n_q`
             is the maximum number of topological features in dimension
-            :math:`q` across all samples in `X`.
+            :math:`q` across all samples in `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
+
+        """
+        check_is_fitted(self)
+        X = check_point_clouds(X)
+
+        costs = _simplicial_costs(X, self._max_homology_dimension)
+        Xt = _parallel_diagrams(self._gudhi_diagram, X, costs, self.n_jobs,
+                                prefer=self.prefer)
+
+        Xt = _postprocess_diagrams(
+            Xt, "gudhi", self._homology_dimensions, self.infinity_values_,
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
+            )
+        return Xt
+
+    @staticmethod
+    def plot(Xt, sample=0, homology_dimensions=None, plotly_params=None):
+        """Plot a sample from a collection of persistence diagrams, with
+        homology in multiple dimensions.
+
+        Parameters
+        ----------
+        Xt : ndarray of shape (n_samples, n_features, 3)
+            Collection of persistence diagrams, such as returned by
+            :meth:`transform`.
+
+        sample : int, optional, default: ``0``
+            Index of the sample in `Xt` to be plotted.
+
+        homology_dimensions : list, tuple or None, optional, default: ``None``
+            Which homology dimensions to include in the plot. ``None`` means
+            plotting all dimensions present in ``Xt[sample]``.
+
+        plotly_params : dict or None, optional, default: ``None``
+            Custom parameters to configure the plotly figure. Allowed keys are
+            ``"traces"`` and ``"layout"``, and the corresponding values should
+            be dictionaries containing keyword arguments as would be fed to the
+            :meth:`update_traces` and :meth:`update_layout` methods of
+            :class:`plotly.graph_objects.Figure`.
+
+        Returns
+        -------
+        fig : :class:`plotly.graph_objects.Figure` object
+            Plotly figure.
+
+        """
+        return plot_diagram(
+            Xt[sample], homology_dimensions=homology_dimensions,
+            plotly_params=plotly_params
+            )
+
+
+@adapt_fit_transform_docs
+class WitnessPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
+    """:ref:`Persistence diagrams <persistence_diagram>` resulting from
+    filtrations of witness complexes built on landmarks.
+
+    Given a :ref:`point cloud <finite_metric_spaces_and_point_clouds>`, a
+    subset of its points is selected as landmarks and the remaining points act
+    as witnesses of the simplices spanned by the landmarks close to them.
+    Information about the appearance and disappearance of topological features
+    (technically, :ref:`homology classes <homology_and_cohomology>`) of
+    various dimensions and at different scales is then summarised in the
+    persistence diagram of the resulting filtered complex. As simplices only
+    have landmarks as vertices, the size of the complex, and hence the cost of
+    the persistence computation, depends on the number of landmarks and not on
+    the size of the point cloud.
+
+    **Important notes**:
+
+        - Persistence diagrams produced by this class must be interpreted with
+          care due to the presence of padding triples which carry no
+          information. See :meth:`transform` for additional information.
+        - Filtration values are relaxation parameters measured in squared
+          distances, see [1]_.
+
+    Parameters
+    ----------
+    n_landmarks : int, optional, default: ``100``
+        Number of landmarks selected in each point cloud. Point clouds with
+        fewer points use all of them as landmarks.
+
+    landmarks : ``'farthest'`` | ``'random'``, optional, default: \
+        ``'farthest'``
+        How landmarks are selected. ``'farthest'`` means by farthest point
+        sampling, starting from the first point of each point cloud.
+        ``'random'`` means uniformly at random, without replacement.
+
+    n_neighbors : int or None, optional, default: ``None``
+        Number of nearest landmarks recorded for each witness. Simplices with
+        more vertices than this are not witnessed, and lower values make the
+        complexes smaller. ``None`` means using all landmarks.
+
+    strong : bool, optional, default: ``False``
+        If ``True``, strong witness complexes are built instead of (weak)
+        witness complexes, see [1]_.
+
+    metric : string or callable, optional, default: ``'euclidean'``
+        Metric used to compute distances between landmarks and witnesses. It
+        must be one of the options allowed by
+        :class:`sklearn.neighbors.NearestNeighbors`, other than
+        ``'precomputed'``.
+
+    homology_dimensions : list or tuple, optional, default: ``(0, 1)``
+        Dimensions (non-negative integers) of the topological features to be
+        detected.
+
+    coeff : int prime, optional, default: ``2``
+        Compute homology with coefficients in the prime field
+        :math:`\\mathbb{F}_p = \\{ 0, \\ldots, p - 1 \\}` where :math:`p`
+        equals `coeff`.
+
+    max_alpha_square : float, optional, default: ``numpy.inf``
+        Maximum value of the relaxation parameter of the filtration.
+        Topological features at scales larger than this value will not be
+        detected.
+
+    infinity_values : float or None, default: ``None``
+        Which death value to assign to features which are still alive at
+        filtration value `max_alpha_square`. ``None`` means that this death
+        value is declared to be equal to `max_alpha_square`.
+
+    reduced_homology : bool, optional, default: ``True``
+       If ``True``, the earliest-born triple in homology dimension 0 which has
+       infinite death is discarded in :meth:`transform`.
+
+    random_state : int, RandomState instance or None, optional, default: \
+        ``None``
+        Seeds the selection of landmarks when `landmarks` is ``'random'``. An
+        integer gives the same selection for point clouds of equal size.
+
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
+    n_jobs : int or None, optional, default: ``None``
+        The number of jobs to use for the computation. ``None`` means 1 unless
+        in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
+        processors.
+
+    prefer : str or None, optional, default: ``None``
+        Soft hint to :class:`joblib.Parallel` on the backend to use when
+        `n_jobs` is not 1, overridden by any :obj:`joblib.parallel_backend`
+        context. Can be ``'processes'``, ``'threads'`` or ``None``, meaning the
+        default, process-based backend. The C++ persistence routines release
+        the GIL, so ``'threads'`` runs them in parallel within one process,
+        without copying the input to the workers and the diagrams back.
+
+    Attributes
+    ----------
+    infinity_values_ : float
+        Effective death value to assign to features which are still alive at
+        filtration value `max_alpha_square`.
+
+    See also
+    --------
+    VietorisRipsPersistence, SparseRipsPersistence, WeakAlphaPersistence,
+    EuclideanCechPersistence
+
+    Notes
+    -----
+    `GUDHI <https://github.com/GUDHI/gudhi-devel>`_ is used as a C++ backend
+    for computing witness complexes and their persistent homology. The table
+    of nearest landmarks to each witness is obtained from a single query to
+    :class:`sklearn.neighbors.NearestNeighbors` and passed to the backend as
+    arrays.
+
+    References
+    ----------
+    [1] S. Kachanovich, "Witness complex", 2020; `GUDHI User and Reference \
+        Manual <http://gudhi.gforge.inria.fr/doc/3.1.0/group__witness__\
+        complex.html>`_.
+
+    [2] V. de Silva and G. Carlsson, "Topological estimation using witness \
+        complexes"; in *Eurographics Symposium on Point-Based Graphics*, \
+        pp. 157–166, 2004; `DOI: 10.2312/SPBG/SPBG04/157-166 \
+        <https://doi.org/10.2312/SPBG/SPBG04/157-166>`_.
+
+    """
+
+    _hyperparameters = {
+        'n_landmarks': {'type': int, 'in': Interval(1, np.inf, closed='left')},
+        'landmarks': {'type': str, 'in': ['farthest', 'random']},
+        'n_neighbors': {'type': (int, type(None)),
+                        'in': Interval(1, np.inf, closed='left')},
+        'strong': {'type': bool},
+        'metric': {'type': (str, FunctionType)},
+        'homology_dimensions': {
+            'type': (list, tuple),
+            'of': {'type': int, 'in': Interval(0, np.inf, closed='left')}
+            },
+        'coeff': {'type': int, 'in': Interval(2, np.inf, closed='left')},
+        'max_alpha_square': {'type': Real,
+                             'in': Interval(0, np.inf, closed='right')},
+        'infinity_values': {'type': (Real, type(None)),
+                            'in': Interval(0, np.inf, closed='neither')},
+        'reduced_homology': {'type': bool},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'prefer': {'type': (str, type(None)),
+                   'in': ['processes', 'threads']}
+        }
+
+    def __init__(self, n_landmarks=100, landmarks='farthest',
+                 n_neighbors=None, strong=False, metric='euclidean',
+                 homology_dimensions=(0, 1), coeff=2,
+                 max_alpha_square=np.inf, infinity_values=None,
+                 reduced_homology=True, random_state=None, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64,
+                 n_jobs=None, prefer=None):
+        self.n_landmarks = n_landmarks
+        self.landmarks = landmarks
+        self.n_neighbors = n_neighbors
+        self.strong = strong
+        self.metric = metric
+        self.homology_dimensions = homology_dimensions
+        self.coeff = coeff
+        self.max_alpha_square = max_alpha_square
+        self.infinity_values = infinity_values
+        self.reduced_homology = reduced_homology
+        self.random_state = random_state
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.prefer = prefer
+
+    def _nearest_landmark_table(self, X):
+        n_landmarks = min(self.n_landmarks, len(X))
+        if self.landmarks == 'farthest':
+            idx_landmarks = get_greedy_perm(X, n_perm=n_landmarks,
+                                            metric=self.metric)[0]
+        else:
+            idx_landmarks = check_random_state(self.random_state).choice(
+                len(X), size=n_landmarks, replace=False
+                )
+        n_neighbors = n_landmarks if self.n_neighbors is None \
+            else min(self.n_neighbors, n_landmarks)
+
+        # Rows are sorted by distance, as required by the witness complexes
+        distances, indices = NearestNeighbors(
+            n_neighbors=n_neighbors, metric=self.metric
+            ).fit(X[idx_landmarks]).kneighbors(X)
+
+        return indices, distances ** 2
+
+    def _gudhi_diagram(self, X):
+        indices, sq_distances = self._nearest_landmark_table(X)
+        complex_cls = StrongWitnessComplex if self.strong else WitnessComplex
+        witness_complex = complex_cls(landmark_indices=indices,
+                                      landmark_distances=sq_distances)
+        simplex_tree = witness_complex.create_simplex_tree(
+            max_alpha_square=self.max_alpha_square,
+            limit_dimension=self._max_homology_dimension + 1
+            )
+        Xdgm = simplex_tree.persistence(homology_coeff_field=self.coeff,
+                                        min_persistence=0, as_array=True)
+
+        return Xdgm
+
+    def fit(self, X, y=None):
+        """Calculate :attr:`infinity_values_`. Then, return the estimator.
+
+        This method is here to implement the usual scikit-learn API and hence
+        work in pipelines.
+
+        Parameters
+        ----------
+        X : ndarray or list of length n_samples
+            Input data representing a collection of point clouds. Can be either
+            a 3D ndarray whose zeroth dimension has size ``n_samples``, or a
+            list containing ``n_samples`` 2D ndarrays. Point cloud arrays have
+            shape ``(n_points, n_dimensions)``, and if `X` is a list these
+            shapes can vary between point clouds.
+
+        y : None
+            There is no need for a target in a transformer, yet the pipeline
+            API requires this parameter.
+
+        Returns
+        -------
+        self : object
+
+        """
+        check_point_clouds(X)
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters,
+                        exclude=['random_state', 'n_jobs'])
+        if self.metric == 'precomputed':
+            raise ValueError("`metric` cannot be 'precomputed': witness "
+                             "complexes are built from point clouds.")
+
+        if self.infinity_values is None:
+            self.infinity_values_ = self.max_alpha_square
+        else:
+            self.infinity_values_ = self.infinity_values
+
+        self._homology_dimensions = sorted(self.homology_dimensions)
+        self._max_homology_dimension = self._homology_dimensions[-1]
+
+        return self
+
+    def transform(self, X, y=None):
+        """For each point cloud in `X`, compute the relevant persistence
+        diagram as an array of triples [b, d, q]. Each triple represents a
+        persistent topological feature in dimension q (belonging to
+        `homology_dimensions`) which is born at b and dies at d. Only triples
+        in which b < d are meaningful. Triples in which b and d are equal
+        ("diagonal elements") may be artificially introduced during the
+        computation for padding purposes, since the number of non-trivial
+        persistent topological features is typically not constant across
+        samples. They carry no information and hence should be effectively
+        ignored by any further computation.
+
+        Parameters
+        ----------
+        X : ndarray or list of length n_samples
+            Input data representing a collection of point clouds. Can be either
+            a 3D ndarray whose zeroth dimension has size ``n_samples``, or a
+            list containing ``n_samples`` 2D ndarrays. Point cloud arrays have
+            shape ``(n_points, n_dimensions)``, and if `X` is a list these
+            shapes can vary between point clouds.
+
+        y : None
+            There is no need for a target in a transformer, yet the pipeline
+            API requires this parameter.
+
+        Returns
+        -------
+        Xt : ndarray of shape (n_samples, n_features, 3)
+            Array of persistence diagrams computed from the feature arrays in
+            `X`. ``n_features`` equals :math:`\\sum_q n_q`, where :math:`n_q`
+            is the maximum number of topological features in dimension
+            :math:`q` across all samples in `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         X = check_point_clouds(X)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(delayed(self._gudhi_diagram)(x)
-                                          for x in X)
+        costs = _simplicial_costs(X, self._max_homology_dimension,
+                                  max_vertices=self.n_landmarks)
+        Xt = _parallel_diagrams(self._gudhi_diagram, X, costs, self.n_jobs,
+                                prefer=self.prefer)
 
         Xt = _postprocess_diagrams(
             Xt, "gudhi", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
             )
         return Xt
 
@@ -1108,6 +1935,14 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         :math:`\\mathbb{F}_p = \\{ 0, \\ldots, p - 1 \\}` where :math:`p`
         equals `coeff`.
 
+    collapse_edges : bool, optional, default: ``False``
+        Whether to run the edge collapse algorithm in [2]_ on each graph prior
+        to the persistent homology computation. Only supported when
+        `directed` is ``False`` and `filtration` is ``'max'``, in which case
+        the diagrams are unchanged. Graphs with non-zero vertex weights are
+        not collapsed. Can reduce the runtime dramatically when the graphs or
+        the maximum homology dimension are large.
+
     max_edge_weight : float, optional, default: ``numpy.inf``
         Maximum edge weight to be considered in the filtration. All edge
         weights greater than this value will be considered as absent from the
@@ -1132,6 +1967,39 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         decrease for faster computation. A good value is often ``100000`` in
         hard problems. A negative value computes highest possible precision.
 
+    ragged : bool, optional, default: ``False``
+        If ``True``, :meth:`transform` returns a
+        :class:`~gtda.diagrams.RaggedDiagrams` storing only the non-trivial
+        birth-death pairs, instead of a 3D ndarray in which all subdiagrams
+        are padded to the largest number of features in their homology
+        dimension. This saves memory when the numbers of features vary a lot
+        between samples.
+
+    max_features_per_dimension : int or None, optional, default: ``None``
+        If not ``None``, only this many most persistent features of each
+        diagram are kept in each homology dimension, before padding. The size
+        of the output, and the cost of any vectorization of it, then scale
+        with this number rather than with the number of features of the
+        noisiest sample. ``None`` means that all features are kept.
+
+    dtype : type or str, optional, default: ``numpy.float64``
+        Floating point type of the birth and death values returned by
+        :meth:`transform`, either ``numpy.float32`` or ``numpy.float64``, or
+        an equivalent specification such as ``'float32'``. Single precision
+        halves the memory taken by the diagrams, and is preserved by
+        :class:`~gtda.diagrams.PersistenceLandscape`,
+        :class:`~gtda.diagrams.HeatKernel`,
+        :class:`~gtda.diagrams.PersistenceImage` and
+        :class:`~gtda.diagrams.Silhouette`.
+
+    cache : :class:`DiagramCache`, str or None, optional, default: ``None``
+        Cache in which :meth:`transform` stores and looks up the persistence
+        computation for each sample, so that only samples not seen before
+        with the same hyperparameters (other than `infinity_values`,
+        `reduced_homology`, `ragged`, `max_features_per_dimension`, `dtype`
+        and `n_jobs`) are processed. If a string, a :class:`DiagramCache` with
+        default parameters in this folder is used. ``None`` means no caching.
+
     n_jobs : int or None, optional, default: ``None``
         The number of jobs to use for the computation. ``None`` means 1 unless
         in a :obj:`joblib.parallel_backend` context. ``-1`` means using all
@@ -1143,6 +2011,9 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         Effective death value to assign to features which are still alive at
         filtration value `max_edge_weight`.
 
+    cache_ : :class:`DiagramCache` or None
+        Effective cache, holding hit and miss statistics. Set in :meth:`fit`.
+
     See also
     --------
     VietorisRipsPersistence, SparseRipsPersistence, WeakAlphaPersistence,
@@ -1163,6 +2034,13 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
         persistent homology of directed flag complexes", Algorithms, 13(1), \
         2020.
 
+    [2] J.-D. Boissonnat and S. Pritam, "Edge Collapse and Persistence of \
+        Flag Complexes"; in *36th International Symposium on Computational \
+        Geometry (SoCG 2020)*, pp. 19:1–19:15, Schloss
+        Dagstuhl-Leibniz–Zentrum für Informatik, 2020;
+        `DOI: 10.4230/LIPIcs.SoCG.2020.19 \
+        <https://doi.org/10.4230/LIPIcs.SoCG.2020.19>`_.
+
     """
 
     _hyperparameters = {
@@ -1172,27 +2050,44 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             },
         'directed': {'type': bool},
         'coeff': {'type': int, 'in': Interval(2, np.inf, closed='left')},
+        'collapse_edges': {'type': bool},
         'max_edge_weight': {'type': Real},
         'infinity_values': {'type': (Real, type(None))},
         'reduced_homology': {'type': bool},
-        'max_entries': {'type': int}
+        'max_entries': {'type': int},
+        'ragged': {'type': bool},
+        'max_features_per_dimension': {
+            'type': (int, type(None)),
+            'in': Interval(1, np.inf, closed='left')
+            },
+        'dtype': {'type': type, 'in': [np.float32, np.float64]},
+        'cache': {'type': (DiagramCache, str, type(None))}
         }
 
     def __init__(self, homology_dimensions=(0, 1), directed=True,
-                 filtration='max', coeff=2, max_edge_weight=np.inf,
-                 infinity_values=None, reduced_homology=True, max_entries=-1,
+                 filtration='max', coeff=2, collapse_edges=False,
+                 max_edge_weight=np.inf, infinity_values=None,
+                 reduced_homology=True, max_entries=-1, ragged=False,
+                 max_features_per_dimension=None, dtype=np.float64, cache=None,
                  n_jobs=None):
         self.homology_dimensions = homology_dimensions
         self.directed = directed
         self.filtration = filtration
         self.coeff = coeff
+        self.collapse_edges = collapse_edges
         self.max_edge_weight = max_edge_weight
         self.infinity_values = infinity_values
         self.reduced_homology = reduced_homology
         self.max_entries = max_entries
+        self.ragged = ragged
+        self.max_features_per_dimension = max_features_per_dimension
+        self.dtype = dtype
+        self.cache = cache
         self.n_jobs = n_jobs
 
     def _flagser_diagram(self, X):
+        if self.collapse_edges:
+            X = _collapse_graph_edges(X, self.max_edge_weight)
         Xdgms = [np.empty((0, 2), dtype=float)] * self._min_homology_dimension
         Xdgms += flagser_weighted(X, max_edge_weight=self.max_edge_weight,
                                   min_dimension=self._min_homology_dimension,
@@ -1241,15 +2136,24 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
 
         """
         check_point_clouds(X, accept_sparse=True, distance_matrices=True)
-        validate_params(
-            self.get_params(), self._hyperparameters, exclude=['n_jobs',
-                                                               'filtration'])
+        self._dtype = _dtype_type(self.dtype)
+        params = {**self.get_params(), 'dtype': self._dtype}
+        validate_params(params, self._hyperparameters,
+                        exclude=['n_jobs', 'filtration'])
 
         if self.infinity_values is None:
             self.infinity_values_ = self.max_edge_weight
         else:
             self.infinity_values_ = self.infinity_values
 
+        if self.collapse_edges and (self.directed or self.filtration != 'max'):
+            raise ValueError(
+                f"Edge collapses are only supported for undirected graphs and "
+                f"filtration 'max', but `directed` is {self.directed} and "
+                f"`filtration` is {self.filtration!r}."
+                )
+
+        self.cache_ = _check_cache(self.cache)
         self._homology_dimensions = sorted(self.homology_dimensions)
         self._min_homology_dimension = self._homology_dimensions[0]
         self._max_homology_dimension = self._homology_dimensions[-1]
@@ -1298,18 +2202,24 @@ class FlagserPersistence(BaseEstimator, TransformerMixin, PlotterMixin):
             distance matrices in `X`. ``n_features`` equals
             :math:`\\sum_q n_q`, where :math:`n_q` is the maximum number of
             topological features in dimension :math:`q` across all samples in
-            `X`.
+            `X`. If `ragged` is ``True``, a
+            :class:`~gtda.diagrams.RaggedDiagrams` without padding triples is
+            returned instead.
 
         """
         check_is_fitted(self)
         X = check_point_clouds(X, accept_sparse=True, distance_matrices=True)
 
-        Xt = Parallel(n_jobs=self.n_jobs)(
-            delayed(self._flagser_diagram)(x) for x in X)
+        costs = _simplicial_costs(X, self._max_homology_dimension,
+                                  precomputed=True)
+        Xt = _parallel_diagrams(self._flagser_diagram, X, costs, self.n_jobs,
+                                cache=self.cache_,
+                                cache_params=_cache_params(self))
 
         Xt = _postprocess_diagrams(
             Xt, "flagser", self._homology_dimensions, self.infinity_values_,
-            self.reduced_homology
+            self.reduced_homology, ragged=self.ragged,
+            max_features=self.max_features_per_dimension, dtype=self._dtype
             )
         return Xt
 
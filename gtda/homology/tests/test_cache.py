@@ -0,0 +1,94 @@
+"""Testing for the persistent cache of per-sample persistence
+computations."""
+# License: GNU AGPLv3
+
+import os
+
+import numpy as np
+from numpy.testing import assert_almost_equal
+from scipy.sparse import csr_matrix
+
+from gtda.homology import DiagramCache, VietorisRipsPersistence
+
+rng = np.random.default_rng(0)
+X = rng.random((4, 10, 2))
+
+
+def test_keys_depend_on_content_and_params(tmp_path):
+    cache = DiagramCache(str(tmp_path))
+    keys = cache.keys(list(X) + [X[0].copy()], ('A', []))
+    assert len(set(keys)) == len(X)
+    assert keys[0] == keys[-1]
+    assert cache.keys(X, ('B', [])) != keys[:len(X)]
+    assert cache.keys([X[0].astype(np.float32)], ('A', []))[0] != keys[0]
+    assert cache.keys([csr_matrix(X[0])], ('A', []))[0] != keys[0]
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiagramCache(str(tmp_path), max_bytes=None)
+    keys = cache.keys(X, ('A', []))
+    for i, (key, x) in enumerate(zip(keys, X)):
+        cache.set(key, [x])
+        # Make the order of last use unambiguous
+        os.utime(os.path.join(str(tmp_path), key + '.pkl'), (i, i))
+    size = cache.n_bytes // len(X)
+
+    # Reopen, bounding the size so that only the last three results fit
+    cache = DiagramCache(str(tmp_path), max_bytes=3 * size)
+    assert cache.get(keys[0]) is not None
+    cache.set(keys[1], [X[1]])
+    assert cache.evictions == 1
+    assert cache.get(keys[2]) is None
+    assert_almost_equal(cache.get(keys[0])[0], X[0])
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(os.listdir(str(tmp_path))) == 3
+
+    cache.clear()
+    assert not os.listdir(str(tmp_path))
+
+
+def test_concurrent_eviction(tmp_path, monkeypatch):
+    """Results evicted by another instance between the moment they are read
+    or written and the moment their size is looked up are not counted."""
+    cache = DiagramCache(str(tmp_path), max_bytes=None)
+    key = cache.keys(X[:1], ('A', []))[0]
+    cache.set(key, [X[0]])
+
+    def vanished(*args, **kwargs):
+        raise FileNotFoundError
+
+    monkeypatch.setattr(os.path, 'getsize', vanished)
+    cache.set(key, [X[0]])
+    assert cache.n_bytes == 0
+
+    monkeypatch.setattr(os, 'utime', vanished)
+    assert_almost_equal(cache.get(key)[0], X[0])
+    assert cache.hits == 1
+    assert cache.n_bytes == 0
+
+
+def test_vrp_transform_cache(tmp_path):
+    cache = DiagramCache(str(tmp_path))
+    vrp = VietorisRipsPersistence(cache=cache)
+    X_res = vrp.fit_transform(X[:3])
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # Hyperparameters only used in post-processing do not affect the keys
+    vrp.set_params(reduced_homology=False, n_jobs=2)
+    X_res = vrp.fit_transform(X)
+    assert (cache.hits, cache.misses) == (3, 4)
+    assert_almost_equal(
+        X_res, VietorisRipsPersistence(reduced_homology=False).fit_transform(X)
+        )
+
+    vrp.set_params(coeff=3)
+    vrp.fit_transform(X)
+    assert cache.misses == 8
+
+
+def test_cache_duplicate_samples(tmp_path):
+    cache = DiagramCache(str(tmp_path))
+    vrp = VietorisRipsPersistence(cache=cache)
+    vrp.fit_transform([X[0], X[1], X[0], X[0]])
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(os.listdir(str(tmp_path))) == 2
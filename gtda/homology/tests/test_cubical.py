@@ -43,6 +43,19 @@ def test_cp_fit_transform_plot(hom_dims):
                          [(None, X_cp_res),
                           (np.array([False, False]), X_cp_res),
                           (np.array([True, True]), X_cp_res_periodic)])
-def test_cp_transform(periodic_dimensions, expected):
-    cp = CubicalPersistence(periodic_dimensions=periodic_dimensions)
+@pytest.mark.parametrize("n_jobs, prefer", [(1, None), (2, 'threads')])
+def test_cp_transform(periodic_dimensions, expected, n_jobs, prefer):
+    cp = CubicalPersistence(periodic_dimensions=periodic_dimensions,
+                            n_jobs=n_jobs, prefer=prefer)
     assert_almost_equal(cp.fit_transform(X), expected)
+
+
+def test_cp_transform_cache(tmp_path):
+    cp = CubicalPersistence(cache=str(tmp_path))
+    X_new = np.concatenate([X, X + 1.])
+    assert_almost_equal(cp.fit_transform(X), X_cp_res)
+    assert (cp.cache_.hits, cp.cache_.misses) == (0, 1)
+
+    X_res = cp.fit(X_new).transform(X_new)
+    assert (cp.cache_.hits, cp.cache_.misses) == (1, 1)
+    assert_almost_equal(X_res, CubicalPersistence().fit_transform(X_new))
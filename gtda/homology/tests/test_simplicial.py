@@ -10,8 +10,10 @@ from scipy.spatial.distance import pdist, squareform
 from scipy.spatial.qhull import QhullError
 from sklearn.exceptions import NotFittedError
 
+from gtda.diagrams import RaggedDiagrams
 from gtda.homology import VietorisRipsPersistence, SparseRipsPersistence, \
-    WeakAlphaPersistence, EuclideanCechPersistence, FlagserPersistence
+    WeakAlphaPersistence, EuclideanCechPersistence, WitnessPersistence, \
+    FlagserPersistence
 
 pio.renderers.default = 'plotly_mimetype'
 
@@ -91,12 +93,240 @@ def test_vrp_transform(X, metric, collapse_edges, max_edge_length,
     assert_almost_equal(vrp.fit_transform(X), X_exp)
 
 
+# Lists of point clouds are processed sample by sample, so that the minimum
+# spanning tree engine is compared with Ripser and not with `ripser_batch`
+@pytest.mark.parametrize('X, metric', [(X_pc_list, 'euclidean'),
+                                       (X_pc_sparse, 'euclidean'),
+                                       (X_circle, 'manhattan'),
+                                       (X_dist, 'precomputed'),
+                                       (X_dist_sparse, 'precomputed')])
+@pytest.mark.parametrize('max_edge_length', [np.inf, 0.5])
+def test_vrp_h0_mst_consistent_with_ripser(X, metric, max_edge_length):
+    """Check that the minimum spanning tree engine used when only homology
+    dimension 0 is requested agrees with Ripser."""
+    vrp_h0 = VietorisRipsPersistence(metric=metric, homology_dimensions=(0,),
+                                     max_edge_length=max_edge_length,
+                                     infinity_values=10)
+    vrp = VietorisRipsPersistence(metric=metric, homology_dimensions=(0, 1),
+                                  max_edge_length=max_edge_length,
+                                  infinity_values=10)
+    X_h0 = vrp_h0.fit_transform(X)
+    X_res = vrp.fit_transform(X)
+    X_res = X_res[:, X_res[0, :, 2] == 0]
+    assert_almost_equal(X_h0, X_res)
+
+
+def test_vrp_h0_mst_edge_at_threshold():
+    """Check that edges of length exactly `max_edge_length` are found by the
+    minimum spanning tree engine, also when they tie with the distance to the
+    furthest of the nearest neighbours queried."""
+    # Two chains of 17 points, further apart than the number of neighbours
+    # first queried, whose ends are at distance exactly 15
+    x = np.concatenate([np.arange(17), np.arange(31, 48)]).astype(float)
+    X = [np.stack([x, np.zeros_like(x)], axis=1)]
+    vrp_h0 = VietorisRipsPersistence(homology_dimensions=(0,),
+                                     max_edge_length=15., infinity_values=30)
+    vrp = VietorisRipsPersistence(homology_dimensions=(0, 1),
+                                  max_edge_length=15., infinity_values=30)
+    X_h0 = vrp_h0.fit_transform(X)
+    X_res = vrp.fit_transform(X)
+    X_res = X_res[:, X_res[0, :, 2] == 0]
+    assert np.sum(X_h0[0, :, 1] == 15.) == 1
+    assert np.all(X_h0[0, :, 1] < 30)
+    assert_almost_equal(X_h0, X_res)
+
+
+@pytest.mark.parametrize('X, metric', [(X_circle, 'euclidean'),
+                                       (X_pc_sparse, 'euclidean'),
+                                       (X_dist, 'precomputed')])
+@pytest.mark.parametrize('n_perm', [1, 3, 100])
+def test_vrp_n_perm(X, metric, n_perm):
+    """Check that landmark subsampling gives the full diagrams when all
+    points are selected, and sets the covering radii."""
+    vrp = VietorisRipsPersistence(metric=metric, n_perm=n_perm)
+    Xt = vrp.fit_transform(X)
+    assert vrp.r_cover_.shape == (len(X),)
+    if n_perm >= X[0].shape[0]:
+        assert_almost_equal(vrp.r_cover_, 0)
+        X_exp = VietorisRipsPersistence(metric=metric).fit_transform(X)
+        assert_almost_equal(np.sort(Xt, axis=1), np.sort(X_exp, axis=1),
+                            decimal=6)
+    else:
+        assert np.all(vrp.r_cover_ > 0)
+
+
+@pytest.mark.parametrize('transformer_cls',
+                         [VietorisRipsPersistence, SparseRipsPersistence])
+def test_r_cover_set_in_fit(transformer_cls):
+    """Check that the covering radii are fitted attributes, which agree
+    between :meth:`fit` and :meth:`fit_transform` and are not modified by
+    :meth:`transform`."""
+    transformer = transformer_cls(n_perm=3)
+    r_cover = transformer.fit(X_circle).r_cover_
+    transformer.transform(X_pc)
+    assert_almost_equal(transformer.r_cover_, r_cover)
+    transformer.fit_transform(X_circle)
+    assert_almost_equal(transformer.r_cover_, r_cover)
+
+
+def test_vrp_batch_consistent_with_split_jobs():
+    """Check that stacks of point clouds give the same diagrams when they are
+    processed by `ripser_batch`, with as many samples as jobs, and sample by
+    sample, with fewer samples than jobs."""
+    X = np.random.default_rng(0).random((3, 20, 2))
+    X_batch = VietorisRipsPersistence(n_jobs=1).fit_transform(X)
+    X_per_sample = VietorisRipsPersistence(n_jobs=4).fit_transform(X)
+    assert_almost_equal(np.sort(X_batch, axis=1),
+                        np.sort(X_per_sample, axis=1), decimal=6)
+
+
 def test_vrp_list_of_arrays_different_size():
     X_2 = np.array([[0., 1.], [1., 2.]])
     vrp = VietorisRipsPersistence()
     assert_almost_equal(vrp.fit_transform([X_pc[0], X_2])[0], X_vrp_exp[0])
 
 
+@pytest.mark.parametrize('transformer_cls', [VietorisRipsPersistence,
+                                             SparseRipsPersistence,
+                                             WeakAlphaPersistence,
+                                             EuclideanCechPersistence])
+def test_ragged_collection_order_preserved(transformer_cls):
+    """Test that scheduling samples by decreasing estimated cost does not
+    change the order of the output diagrams."""
+    rng = np.random.default_rng(0)
+    X = [rng.random((n_points, 2)) for n_points in [5, 40, 3, 20, 4, 10]]
+    transformer = transformer_cls(n_jobs=2)
+    X_res = transformer.fit_transform(X)
+    for x, x_res in zip(X, X_res):
+        x_exp = transformer.fit_transform([x])[0]
+        x_exp = x_exp[x_exp[:, 0] != x_exp[:, 1]]
+        x_res = x_res[x_res[:, 0] != x_res[:, 1]]
+        assert_almost_equal(x_res, x_exp)
+
+
+@pytest.mark.parametrize('transformer_cls', [VietorisRipsPersistence,
+                                             SparseRipsPersistence,
+                                             WeakAlphaPersistence,
+                                             EuclideanCechPersistence])
+@pytest.mark.parametrize('reduced_homology', [True, False])
+def test_ragged_output(transformer_cls, reduced_homology):
+    rng = np.random.default_rng(0)
+    X = [rng.random((n_points, 2)) for n_points in [5, 40, 3, 20]]
+    transformer = transformer_cls(reduced_homology=reduced_homology)
+    X_exp = transformer.fit_transform(X)
+    transformer.set_params(ragged=True)
+    X_res = transformer.fit_transform(X)
+    assert isinstance(X_res, RaggedDiagrams)
+    assert_almost_equal(np.asarray(X_res), X_exp)
+
+
+@pytest.mark.parametrize('transformer_cls', [VietorisRipsPersistence,
+                                             SparseRipsPersistence,
+                                             WeakAlphaPersistence,
+                                             EuclideanCechPersistence])
+@pytest.mark.parametrize('max_features', [1, 3])
+def test_max_features_per_dimension(transformer_cls, max_features):
+    rng = np.random.default_rng(0)
+    X = [rng.random((n_points, 2)) for n_points in [5, 40, 3, 20]]
+    transformer = transformer_cls(ragged=True)
+    X_full = transformer.fit_transform(X)
+    transformer.set_params(max_features_per_dimension=max_features)
+    X_res = transformer.fit_transform(X)
+    for i in range(len(X)):
+        for dim in transformer.homology_dimensions:
+            x_full = X_full[i][X_full[i][:, 2] == dim]
+            x_res = X_res[i][X_res[i][:, 2] == dim]
+            lifetimes = np.sort(x_full[:, 1] - x_full[:, 0])[::-1]
+            assert len(x_res) == min(len(x_full), max_features)
+            assert_almost_equal(np.sort(x_res[:, 1] - x_res[:, 0])[::-1],
+                                lifetimes[:max_features])
+
+
+@pytest.mark.parametrize('transformer_cls', [VietorisRipsPersistence,
+                                             SparseRipsPersistence,
+                                             WeakAlphaPersistence,
+                                             EuclideanCechPersistence])
+@pytest.mark.parametrize('ragged', [True, False])
+def test_dtype_float32(transformer_cls, ragged):
+    transformer = transformer_cls(ragged=ragged)
+    X_exp = np.asarray(transformer.fit_transform(X_pc))
+    transformer.set_params(dtype=np.float32)
+    X_res = np.asarray(transformer.fit_transform(X_pc))
+    assert X_res.dtype == np.float32
+    assert_almost_equal(X_res, X_exp, decimal=5)
+
+
+@pytest.mark.parametrize('dtype', ['float32', np.dtype('float32')])
+def test_dtype_equivalent_specifications(dtype):
+    X_res = VietorisRipsPersistence(dtype=dtype).fit_transform(X_pc)
+    assert X_res.dtype == np.float32
+
+
+@pytest.mark.parametrize('dtype, error', [('int64', ValueError),
+                                          (np.int32, ValueError),
+                                          (None, TypeError),
+                                          ('not_defined', TypeError)])
+def test_dtype_invalid(dtype, error):
+    with pytest.raises(error):
+        VietorisRipsPersistence(dtype=dtype).fit_transform(X_pc)
+
+
+@pytest.mark.parametrize('ragged', [True, False])
+def test_vrp_duplicate_samples(ragged):
+    """Test that duplicate samples in a batch, which are only computed once,
+    are given the same diagrams as if they were computed separately."""
+    rng = np.random.default_rng(0)
+    X = [rng.random((n_points, 2)) for n_points in [5, 40, 3]]
+    X_dup = [X[1], X[0], X[1], X[2], X[0].copy(), X[1]]
+    vrp = VietorisRipsPersistence(ragged=ragged)
+    X_res = np.asarray(vrp.fit_transform(X_dup))
+    X_exp = np.asarray(vrp.fit_transform(X))
+    assert_almost_equal(X_res, X_exp[[1, 0, 1, 2, 0, 1]])
+
+
+@pytest.mark.parametrize('homology_dimensions', [(0,), (0, 1)])
+def test_vrp_fewer_samples_than_jobs(homology_dimensions):
+    """Test that jobs left idle by parallelism across samples, which are
+    used within each sample instead, do not change the diagrams."""
+    # A list, as 3D arrays are processed in a single batch
+    X = list(np.random.default_rng(0).random((2, 40, 2)))
+    vrp = VietorisRipsPersistence(homology_dimensions=homology_dimensions)
+    X_exp = vrp.fit_transform(X)
+    vrp.set_params(n_jobs=4, prefer='threads')
+    assert_almost_equal(vrp.fit_transform(X), X_exp)
+
+
+@pytest.mark.parametrize('homology_dimensions', [(0,), (1,), (0, 1, 2)])
+@pytest.mark.parametrize('max_edge_length', [np.inf, 0.3])
+@pytest.mark.parametrize('reduced_homology', [True, False])
+@pytest.mark.parametrize('n_jobs', [None, 2])
+def test_vrp_batch_consistent_with_per_sample(homology_dimensions,
+                                              max_edge_length,
+                                              reduced_homology, n_jobs):
+    """Test that stacks of point clouds, processed in a single batch, give
+    the same diagrams as lists of point clouds, processed one by one."""
+    X = np.random.default_rng(0).random((6, 20, 2))
+    vrp = VietorisRipsPersistence(homology_dimensions=homology_dimensions,
+                                  max_edge_length=max_edge_length,
+                                  reduced_homology=reduced_homology,
+                                  n_jobs=n_jobs)
+    X_res = vrp.fit_transform(X)
+    X_exp = vrp.fit_transform(list(X))
+    assert_almost_equal(np.sort(X_res, axis=1), np.sort(X_exp, axis=1),
+                        decimal=5)
+
+
+@pytest.mark.parametrize('transformer_cls', [VietorisRipsPersistence,
+                                             SparseRipsPersistence,
+                                             WeakAlphaPersistence,
+                                             EuclideanCechPersistence])
+def test_prefer_threads(transformer_cls):
+    X = np.concatenate([X_pc, X_circle[:, :5]])
+    X_exp = transformer_cls().fit_transform(X)
+    transformer = transformer_cls(n_jobs=2, prefer='threads')
+    assert_almost_equal(transformer.fit_transform(X), X_exp)
+
+
 @pytest.mark.parametrize('X, metric', [(X_pc, 'euclidean'),
                                        (X_pc_list, 'euclidean'),
                                        (X_pc_sparse, 'euclidean'),
@@ -154,13 +384,28 @@ X_srp_exp = np.array([
                                        (X_dist_list, 'precomputed')])
 @pytest.mark.parametrize("epsilon, diagrams",
                          [(0.0, X_vrp_exp), (1.0, X_srp_exp)])
-def test_srp_transform(X, metric, epsilon, diagrams):
-    srp = SparseRipsPersistence(metric=metric, epsilon=epsilon)
+@pytest.mark.parametrize('collapse_edges', [False, True])
+def test_srp_transform(X, metric, epsilon, diagrams, collapse_edges):
+    srp = SparseRipsPersistence(metric=metric, epsilon=epsilon,
+                                collapse_edges=collapse_edges)
 
     assert_almost_equal(np.sort(srp.fit_transform(X), axis=1),
                         np.sort(diagrams, axis=1))
 
 
+@pytest.mark.parametrize('epsilon', [0.3, 1.])
+def test_srp_point_clouds_consistent_with_precomputed(epsilon):
+    """Test that sparse filtrations built by GUDHI from Euclidean point
+    clouds give the same diagrams as those built from distance matrices."""
+    X = np.random.default_rng(0).random((3, 50, 2))
+    X_dist_rng = np.array([squareform(pdist(x)) for x in X])
+    X_res = SparseRipsPersistence(epsilon=epsilon).fit_transform(X)
+    X_exp = SparseRipsPersistence(
+        metric='precomputed', epsilon=epsilon
+        ).fit_transform(X_dist_rng)
+    assert_almost_equal(np.sort(X_res, axis=1), np.sort(X_exp, axis=1))
+
+
 @pytest.mark.parametrize('X, metric', [(X_pc, 'euclidean'),
                                        (X_pc_list, 'euclidean'),
                                        (X_pc_sparse, 'euclidean'),
@@ -294,6 +539,78 @@ def test_cp_fit_transform_plot(X, hom_dims):
         X, sample=0, homology_dimensions=hom_dims)
 
 
+def test_wp_params():
+    landmarks = 'not_defined'
+    wp = WitnessPersistence(landmarks=landmarks)
+
+    with pytest.raises(ValueError):
+        wp.fit_transform(X_pc)
+
+
+def test_wp_precomputed_not_supported():
+    wp = WitnessPersistence(metric='precomputed')
+
+    with pytest.raises(ValueError):
+        wp.fit(X_dist)
+
+
+def test_wp_not_fitted():
+    wp = WitnessPersistence()
+
+    with pytest.raises(NotFittedError):
+        wp.transform(X_pc)
+
+
+@pytest.mark.parametrize('landmarks', ['farthest', 'random'])
+@pytest.mark.parametrize('n_neighbors', [None, 2])
+def test_wp_nearest_landmark_table(landmarks, n_neighbors):
+    """Test that each witness gets its nearest landmarks, sorted by squared
+    distance, and that landmarks are their own nearest landmark."""
+    X = np.random.default_rng(0).random((30, 2))
+    wp = WitnessPersistence(n_landmarks=5, landmarks=landmarks,
+                            n_neighbors=n_neighbors, random_state=0)
+    indices, sq_distances = wp._nearest_landmark_table(X)
+    n_neighbors_exp = 5 if n_neighbors is None else n_neighbors
+    assert indices.shape == sq_distances.shape == (30, n_neighbors_exp)
+    assert np.all(np.diff(sq_distances, axis=1) >= 0)
+    assert np.count_nonzero(sq_distances[:, 0] == 0) >= 5
+
+
+@pytest.mark.parametrize('strong', [False, True])
+def test_wp_transform_circle(strong):
+    """Test that, on a sampled circle, WitnessPersistence detects exactly
+    one dominant loop and at most as many connected components as there are
+    landmarks."""
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 2 * np.pi, 200)
+    X = np.stack([np.cos(angles), np.sin(angles)], axis=1)[None, :, :]
+    wp = WitnessPersistence(n_landmarks=20, strong=strong,
+                            infinity_values=10)
+    X_res = wp.fit_transform(X)
+    subdiagram_0 = X_res[0][X_res[0, :, 2] == 0]
+    subdiagram_1 = X_res[0][X_res[0, :, 2] == 1]
+    assert len(subdiagram_0) <= 19
+    # Padding triples have zero lifetime
+    lifetimes_1 = np.sort(np.append(subdiagram_1[:, 1] - subdiagram_1[:, 0],
+                                    [0.]))[::-1]
+    assert lifetimes_1[0] > 0.5
+    assert lifetimes_1[1] < lifetimes_1[0] / 4
+
+
+def test_wp_random_state():
+    X = np.random.default_rng(1).random((2, 40, 2))
+    wp = WitnessPersistence(n_landmarks=10, landmarks='random',
+                            random_state=42)
+    assert_almost_equal(wp.fit_transform(X), wp.fit_transform(X))
+
+
+@pytest.mark.parametrize('X', [X_pc, X_pc_list])
+@pytest.mark.parametrize('hom_dims', [None, (0,), (1,), (0, 1)])
+def test_wp_fit_transform_plot(X, hom_dims):
+    WitnessPersistence().fit_transform_plot(
+        X, sample=0, homology_dimensions=hom_dims)
+
+
 def test_fp_params():
     coeff = 'not_defined'
     fp = FlagserPersistence(coeff=coeff)
@@ -345,9 +662,12 @@ def test_fp_transform_directed(X, max_edge_weight, infinity_values):
 @pytest.mark.parametrize('X', [X_dist, X_dist_list, X_dist_sparse])
 @pytest.mark.parametrize('max_edge_weight', [np.inf, 0.8, 0.6])
 @pytest.mark.parametrize('infinity_values', [10, 30])
-def test_fp_transform_undirected(X, max_edge_weight, infinity_values):
+@pytest.mark.parametrize('collapse_edges', [False, True])
+def test_fp_transform_undirected(X, max_edge_weight, infinity_values,
+                                 collapse_edges):
     fp = FlagserPersistence(directed=False, max_edge_weight=max_edge_weight,
-                            infinity_values=infinity_values)
+                            infinity_values=infinity_values,
+                            collapse_edges=collapse_edges)
     # In the undirected case with "max" filtration, the results are always the
     # same as the one of VietorisRipsPersistence
     X_exp = X_vrp_exp.copy()
@@ -362,6 +682,14 @@ def test_fp_transform_undirected(X, max_edge_weight, infinity_values):
     assert_almost_equal(fp.fit_transform(X), X_exp)
 
 
+@pytest.mark.parametrize('params', [{'directed': True},
+                                    {'directed': False, 'filtration': 'sum'}])
+def test_fp_collapse_edges_unsupported(params):
+    fp = FlagserPersistence(collapse_edges=True, **params)
+    with pytest.raises(ValueError):
+        fp.fit(X_dist)
+
+
 @pytest.mark.parametrize('delta', range(1, 4))
 def test_fp_transform_high_hom_dim(delta):
     """Test that if the maximum homology dimension is greater than or equal to
@@ -0,0 +1,225 @@
+"""Compact storage for collections of persistence diagrams of varying
+sizes."""
+# License: GNU AGPLv3
+
+import numpy as np
+
+
+class RaggedDiagrams:
+    """Collection of persistence diagrams stored without padding.
+
+    Padded collections of persistence diagrams, as returned by default by the
+    transformers in :mod:`gtda.homology`, are 3D arrays in which every
+    subdiagram is padded with trivial triples up to the largest number of
+    features observed in that homology dimension across the collection. When
+    a few diagrams are much larger than the rest, most of such an array is
+    padding. Here, all birth-death pairs are instead stored in a single flat
+    array, sorted by sample and then by homology dimension, together with the
+    offsets at which each subdiagram starts, as in the CSR format for sparse
+    matrices.
+
+    Instances can be passed directly to :class:`~gtda.diagrams.Scaler`,
+    :class:`~gtda.diagrams.Filtering`, :class:`~gtda.diagrams.BettiCurve`,
+    :class:`~gtda.diagrams.PersistenceLandscape`,
+    :class:`~gtda.diagrams.PairwiseDistance`,
+    :class:`~gtda.diagrams.Amplitude` and
+    :class:`~gtda.diagrams.PersistenceEntropy`, which process them without
+    padding. Other consumers of collections of persistence diagrams see them
+    as the equivalent padded 3D ndarray, see :meth:`to_padded`.
+
+    Parameters
+    ----------
+    pairs : ndarray of shape (n_pairs, 2)
+        Birth-death pairs of all diagrams, sorted by sample and then by
+        homology dimension. Stored in single precision if of dtype
+        ``float32``, and in double precision otherwise.
+
+    offsets : ndarray of shape (n_samples * n_homology_dimensions + 1,)
+        Non-decreasing indices into `pairs`, starting at 0 and ending at
+        ``n_pairs``. The subdiagram of sample i in the j-th homology
+        dimension of `homology_dimensions` consists of the pairs with indices
+        from ``offsets[i * n_homology_dimensions + j]`` (included) to
+        ``offsets[i * n_homology_dimensions + j + 1]`` (excluded).
+
+    homology_dimensions : list or tuple
+        Homology dimensions of the subdiagrams, sorted in ascending order.
+
+    """
+
+    def __init__(self, pairs, offsets, homology_dimensions):
+        self.pairs = np.asarray(pairs, dtype=_float_dtype(pairs)).\
+            reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.homology_dimensions = tuple(homology_dimensions)
+
+        n_dimensions = len(self.homology_dimensions)
+        if not n_dimensions:
+            raise ValueError("At least one homology dimension is required.")
+        if (self.offsets.ndim != 1 or (len(self.offsets) - 1) % n_dimensions
+                or self.offsets[0] != 0
+                or self.offsets[-1] != len(self.pairs)
+                or np.any(np.diff(self.offsets) < 0)):
+            raise ValueError(
+                f"`offsets` must be a non-decreasing 1D array of length "
+                f"n_samples * {n_dimensions} + 1 starting at 0 and ending at "
+                f"{len(self.pairs)}."
+                )
+
+    def __len__(self):
+        return (len(self.offsets) - 1) // len(self.homology_dimensions)
+
+    def __repr__(self):
+        return (f"RaggedDiagrams(n_samples={len(self)}, "
+                f"n_pairs={len(self.pairs)}, "
+                f"homology_dimensions={self.homology_dimensions})")
+
+    def __array__(self, dtype=None):
+        Xt = self.to_padded()
+        return Xt if dtype is None else Xt.astype(dtype)
+
+    def __getitem__(self, key):
+        """Return the triples [b, d, q] of a single diagram if `key` is an
+        integer, and a :class:`RaggedDiagrams` containing the selected
+        diagrams if it is a slice or an array of indices or booleans."""
+        n_dimensions = len(self.homology_dimensions)
+        if np.issubdtype(type(key), np.integer):
+            idx = range(len(self))[key]
+            start = self.offsets[idx * n_dimensions]
+            end = self.offsets[(idx + 1) * n_dimensions]
+            counts = np.diff(
+                self.offsets[idx * n_dimensions:(idx + 1) * n_dimensions + 1]
+                )
+            return np.hstack([
+                self.pairs[start:end],
+                np.repeat(np.array(self.homology_dimensions,
+                                   dtype=self.pairs.dtype), counts)[:, None]
+                ])
+
+        samples = np.arange(len(self))[key]
+        starts = self.offsets[:-1].reshape(-1, n_dimensions)[samples].ravel()
+        counts = np.diff(self.offsets).reshape(-1, n_dimensions)[samples].\
+            ravel()
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return RaggedDiagrams(self.pairs[_ranges(starts, counts)], offsets,
+                              self.homology_dimensions)
+
+    def copy(self):
+        return RaggedDiagrams(self.pairs.copy(), self.offsets.copy(),
+                              self.homology_dimensions)
+
+    def _block_ids(self):
+        """Index ``i * n_homology_dimensions + j`` of the subdiagram of each
+        pair."""
+        return np.repeat(np.arange(len(self.offsets) - 1),
+                         np.diff(self.offsets))
+
+    def subdiagram(self, homology_dimension):
+        """Birth-death pairs in a given homology dimension.
+
+        Parameters
+        ----------
+        homology_dimension : int or float
+            One of the entries of :attr:`homology_dimensions`.
+
+        Returns
+        -------
+        pairs : ndarray of shape (n_pairs_in_dimension, 2)
+            Birth-death pairs in `homology_dimension` for all samples, sorted
+            by sample.
+
+        offsets : ndarray of shape (n_samples + 1,)
+            The pairs of sample i are ``pairs[offsets[i]:offsets[i + 1]]``.
+
+        """
+        j = self.homology_dimensions.index(homology_dimension)
+        n_dimensions = len(self.homology_dimensions)
+        starts = self.offsets[j:-1:n_dimensions]
+        counts = self.offsets[j + 1::n_dimensions] - starts
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return self.pairs[_ranges(starts, counts)], offsets
+
+    @classmethod
+    def from_padded(cls, X):
+        """Build a :class:`RaggedDiagrams` from a 3D ndarray of triples
+        [b, d, q], dropping all triples with b = d.
+
+        Parameters
+        ----------
+        X : ndarray of shape (n_samples, n_features, 3)
+            Padded collection of persistence diagrams.
+
+        Returns
+        -------
+        Xr : :class:`RaggedDiagrams`
+            Same collection, without padding triples. Its homology dimensions
+            are the ones found in ``X[0]``.
+
+        """
+        X = np.asarray(X, dtype=_float_dtype(X))
+        homology_dimensions = np.unique(X[0, :, 2])
+        n_dimensions = len(homology_dimensions)
+        sample_ids, feature_ids = np.nonzero(X[:, :, 0] != X[:, :, 1])
+        triples = X[sample_ids, feature_ids]
+        blocks = sample_ids * n_dimensions + \
+            np.searchsorted(homology_dimensions, triples[:, 2])
+        order = np.argsort(blocks, kind="stable")
+        counts = np.bincount(blocks, minlength=len(X) * n_dimensions)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return cls(triples[order, :2], offsets,
+                   [int(dim) if dim != np.inf else dim
+                    for dim in homology_dimensions])
+
+    def to_padded(self):
+        """Convert to a 3D ndarray of triples [b, d, q].
+
+        Each subdiagram is padded up to the largest number of pairs in its
+        homology dimension (or to one pair if there are none) with triples
+        [m, m, q], where m is the smallest birth in that dimension across
+        the collection, as done by the transformers in :mod:`gtda.homology`.
+
+        Returns
+        -------
+        Xt : ndarray of shape (n_samples, n_features, 3)
+            Padded collection of persistence diagrams, of the same dtype as
+            :attr:`pairs`.
+
+        """
+        n_samples = len(self)
+        n_dimensions = len(self.homology_dimensions)
+        counts = np.diff(self.offsets).reshape(n_samples, n_dimensions)
+        block_ids = self._block_ids()
+        dim_idx = block_ids % n_dimensions
+        positions = np.arange(len(self.pairs)) - self.offsets[block_ids]
+
+        n_features_per_dim = np.maximum(counts.max(axis=0, initial=0), 1)
+        start_idx_per_dim = np.cumsum(n_features_per_dim) - n_features_per_dim
+        min_values = np.full(n_dimensions, np.inf, dtype=self.pairs.dtype)
+        np.minimum.at(min_values, dim_idx, self.pairs[:, 0])
+        min_values[min_values == np.inf] = 0
+        Xt = np.empty((n_samples, n_features_per_dim.sum(), 3),
+                      dtype=self.pairs.dtype)
+        Xt[:, :, :2] = np.repeat(min_values, n_features_per_dim)[:, None]
+        Xt[:, :, 2] = np.repeat(self.homology_dimensions, n_features_per_dim)
+        Xt[block_ids // n_dimensions,
+           start_idx_per_dim[dim_idx] + positions, :2] = self.pairs
+
+        return Xt
+
+
+def _float_dtype(X):
+    """Floating point dtype in which to store persistence diagrams obtained
+    from `X`: single precision if `X` already is, double otherwise."""
+    return np.float32 if getattr(X, 'dtype', None) == np.float32 \
+        else np.float64
+
+
+def _ranges(starts, counts):
+    """Concatenation of ``np.arange(start, start + count)`` over all pairs of
+    entries of `starts` and `counts`."""
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    return np.repeat(np.asarray(starts, dtype=np.int64) - ends + counts,
+                     counts) + np.arange(ends[-1] if len(ends) else 0)
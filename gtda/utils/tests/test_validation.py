@@ -5,6 +5,7 @@ import numpy as np
 import pytest
 from sklearn.exceptions import DataDimensionalityWarning
 
+from gtda.diagrams import RaggedDiagrams
 from gtda.utils import check_collection, check_point_clouds, check_diagrams, \
     validate_params
 
@@ -58,6 +59,33 @@ def test_inputs_arrayStruc_V():
         check_diagrams(X)
 
 
+def test_check_diagrams_ragged():
+    X = np.array([[[0, 1, 0], [0, 0, 0], [2, 4, 1]],
+                  [[0, 2, 0], [1, 3, 0], [2, 2, 1]]])
+    X_ragged = RaggedDiagrams.from_padded(X)
+    assert len(X_ragged) == 2
+    assert X_ragged.homology_dimensions == (0, 1)
+    assert check_diagrams(X_ragged, accept_ragged=True) is X_ragged
+    assert check_diagrams(X_ragged, copy=True, accept_ragged=True) \
+        is not X_ragged
+    np.testing.assert_array_equal(check_diagrams(X_ragged),
+                                  X_ragged.to_padded())
+
+    X_ragged.pairs[0] = [1, 0]
+    with pytest.raises(ValueError):
+        check_diagrams(X_ragged, accept_ragged=True)
+
+
+def test_check_diagrams_float32():
+    X = np.array([[[0, 1, 0], [0, 0, 0], [2, 4, 1]]])
+    assert check_diagrams(X).dtype == np.float64
+    X_32 = check_diagrams(X.astype(np.float32))
+    assert X_32.dtype == np.float32
+    X_ragged = RaggedDiagrams.from_padded(X_32)
+    assert X_ragged.pairs.dtype == np.float32
+    assert X_ragged.to_padded().dtype == np.float32
+
+
 # Testing check_point_clouds
 # Create several kinds of inputs
 class CreateInputs:
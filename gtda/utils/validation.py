@@ -10,14 +10,17 @@ from scipy.sparse import issparse
 from sklearn.exceptions import DataDimensionalityWarning
 from sklearn.utils.validation import check_array
 
+from ._ragged import RaggedDiagrams, _float_dtype
 
-def check_diagrams(X, copy=False):
+
+def check_diagrams(X, copy=False, accept_ragged=False):
     """Input validation for collections of persistence diagrams.
 
     Basic type and sanity checks are run on the input collection and the
-    array is converted to float type before returning. In particular,
-    the input is checked to be an ndarray of shape ``(n_samples, n_points,
-    3)``.
+    array is converted to float type before returning. Arrays of dtype
+    ``float32`` are kept in single precision, all others are converted to
+    ``float64``. In particular, the input is checked to be an ndarray of shape
+    ``(n_samples, n_points, 3)``.
 
     Parameters
     ----------
@@ -27,12 +30,21 @@ def check_diagrams(X, copy=False):
     copy : bool, optional, default: ``False``
         Whether a forced copy should be triggered.
 
+    accept_ragged : bool, optional, default: ``False``
+        If ``True``, instances of :class:`~gtda.diagrams.RaggedDiagrams` are
+        validated and returned as they are. Otherwise, they are converted to
+        padded 3D ndarrays.
+
     Returns
     -------
-    X_validated : ndarray of shape (n_samples, n_points, 3)
-        The converted and validated array of persistence diagrams.
+    X_validated : ndarray of shape (n_samples, n_points, 3) or \
+        :class:`~gtda.diagrams.RaggedDiagrams`
+        The converted and validated collection of persistence diagrams.
 
     """
+    if accept_ragged and isinstance(X, RaggedDiagrams):
+        return _check_ragged_diagrams(X, copy=copy)
+
     X_array = np.asarray(X)
     if X_array.ndim == 0:
         raise ValueError(
@@ -48,7 +60,7 @@ def check_diagrams(X, copy=False):
             f"components, but there are {X_array.shape[2]} components."
             )
 
-    X_array = X_array.astype(float, copy=False)
+    X_array = X_array.astype(_float_dtype(X_array), copy=False)
     homology_dimensions = sorted(np.unique(X_array[0, :, 2]))
     for dim in homology_dimensions:
         if dim == np.inf:
@@ -83,6 +95,33 @@ def check_diagrams(X, copy=False):
     return X_array
 
 
+def _check_ragged_diagrams(X, copy=False):
+    for dim in X.homology_dimensions:
+        if dim == np.inf:
+            if len(X.homology_dimensions) != 1:
+                raise ValueError(
+                    f"np.inf is a valid homology dimension for a stacked "
+                    f"diagram but it should be the only one: "
+                    f"homology_dimensions = {X.homology_dimensions}."
+                    )
+        elif dim != int(dim) or dim < 0:
+            raise ValueError(
+                f"All homology dimensions should be integer valued: "
+                f"{dim} can't be cast to an int of the same value."
+                )
+
+    n_points_below_diag = np.sum(X.pairs[:, 1] < X.pairs[:, 0])
+    if n_points_below_diag:
+        raise ValueError(
+            f"All points of all persistence diagrams should be above the "
+            f"diagonal. {n_points_below_diag} points are below the diagonal."
+            )
+    if copy:
+        X = X.copy()
+
+    return X
+
+
 def check_graph(X):
     # TODO
     return X